@@ -5,104 +5,311 @@
 
 import sys
 import re
+import os
+import json
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
 
-def add_yo(text):
-    """Заменяет 'е' на 'ё' в частых словах"""
-
-    # Список замен: (паттерн, замена)
-    replacements = [
-        # Местоимения
-        (r'\bвсе\b', 'всё'),
-        (r'\bее\b', 'её'),
-        (r'\bеще\b', 'ещё'),
-        (r'\bмое\b', 'моё'),
-        (r'\bтвое\b', 'твоё'),
-        (r'\bсвое\b', 'своё'),
-
-        # Наречия и союзы
-        (r'\bчем\b', 'чём'),
-        (r'\bо чем\b', 'о чём'),
-        (r'\bв чем\b', 'в чём'),
-        (r'\bна чем\b', 'на чём'),
-        (r'\bзачем\b', 'зачём'),
-        (r'\bпочем\b', 'почём'),
-        (r'\bнем\b', 'нём'),
-        (r'\bо нем\b', 'о нём'),
-        (r'\bв нем\b', 'в нём'),
-        (r'\bна нем\b', 'на нём'),
-
-        # Глаголы 3-го лица
-        (r'\bдает\b', 'даёт'),
-        (r'\bведет\b', 'ведёт'),
-        (r'\bнесет\b', 'несёт'),
-        (r'\bберет\b', 'берёт'),
-        (r'\bживет\b', 'живёт'),
-        (r'\bидет\b', 'идёт'),
-        (r'\bпоет\b', 'поёт'),
-        (r'\bвезет\b', 'везёт'),
-        (r'\bтечет\b', 'течёт'),
-        (r'\bвозьмет\b', 'возьмёт'),
-        (r'\bпридет\b', 'придёт'),
-        (r'\bнайдет\b', 'найдёт'),
-        (r'\bуйдет\b', 'уйдёт'),
-        (r'\bподойдет\b', 'подойдёт'),
-        (r'\bперейдет\b', 'перейдёт'),
-        (r'\bвернет\b', 'вернёт'),
-        (r'\bначнет\b', 'начнёт'),
-        (r'\bпоймет\b', 'поймёт'),
-        (r'\bумрет\b', 'умрёт'),
-
-        # Существительные
-        (r'\bлед\b', 'лёд'),
-        (r'\bмед\b', 'мёд'),
-        (r'\bполет\b', 'полёт'),
-        (r'\bсчет\b', 'счёт'),
-        (r'\bучет\b', 'учёт'),
-        (r'\bприем\b', 'приём'),
-        (r'\bподъем\b', 'подъём'),
-        (r'\bнаем\b', 'наём'),
-        (r'\bстекл', 'стёкл'),
-
-        # Прилагательные
-        (r'\bчерн', 'чёрн'),
-        (r'\bжелт', 'жёлт'),
-        (r'\bзелен', 'зелён'),
-        (r'\bчетк', 'чётк'),
-
-        # Частицы и предлоги
-        (r'\bо ней\b', 'о ней'),  # не меняется
-    ]
-
-    # Применяем замены с учётом регистра
-    result = text
-    for pattern, replacement in replacements:
-        result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
-        # Также с заглавной буквы
-        pattern_cap = pattern.replace(r'\b', r'\b').replace(pattern[2], pattern[2].upper(), 1) if len(pattern) > 2 else pattern
-        replacement_cap = replacement[0].upper() + replacement[1:] if len(replacement) > 0 else replacement
-        result = re.sub(pattern_cap, replacement_cap, result)
-
-    return result
+# Встроенные правила: слова с ё. Звёздочка в конце - замена в начале
+# слова (основа с любым окончанием), без звёздочки - только слово целиком.
+DEFAULT_RULES = [
+    # Местоимения
+    'всё', 'её', 'ещё', 'моё', 'твоё', 'своё',
+
+    # Наречия и союзы
+    'чём', 'зачём', 'почём', 'нём',
+
+    # Глаголы 3-го лица
+    'даёт', 'ведёт', 'несёт', 'берёт', 'живёт', 'идёт', 'поёт', 'везёт',
+    'течёт', 'возьмёт', 'придёт', 'найдёт', 'уйдёт', 'подойдёт', 'перейдёт',
+    'вернёт', 'начнёт', 'поймёт', 'умрёт',
+
+    # Существительные
+    'лёд', 'мёд', 'полёт', 'счёт', 'учёт', 'приём', 'подъём', 'наём',
+    'стёкл*',
+
+    # Прилагательные
+    'чёрн*', 'жёлт*', 'зелён*', 'чётк*',
+]
+
+_WORD = re.compile(r'\w+')
+# Незаконченное слово в конце блока - переносится в следующий блок
+_TAIL = re.compile(r'\w*\Z')
+
+# Реестр уже обработанных текстов: хэши содержимого по версиям словаря
+DEFAULT_REGISTRY = Path('.cache') / 'add_yo.json'
+BLOCK_SIZE = 64 * 1024
+
+
+class YoDictionary:
+    """
+    Словарь замен е -> ё: точные формы и основы (префиксы) в хэш-таблицах.
+    Ключ - слово в нижнем регистре с е вместо ё.
+    """
+
+    def __init__(self, rules=()):
+        self.words = {}
+        self.prefixes = {}
+        self.prefix_lengths = []
+        self.update(rules)
+
+    def update(self, rules):
+        """
+        Добавляет правила: слово с ё, со звёздочкой на конце - основа
+        """
+        for rule in rules:
+            rule = rule.strip().lower()
+            if not rule or 'ё' not in rule:
+                continue
+            if rule.endswith('*'):
+                stem = rule[:-1]
+                self.prefixes[stem.replace('ё', 'е')] = stem
+            else:
+                self.words[rule.replace('ё', 'е')] = rule
+
+        self.prefix_lengths = sorted({len(stem) for stem in self.prefixes}, reverse=True)
+
+    def __len__(self):
+        return len(self.words) + len(self.prefixes)
+
+    def fingerprint(self):
+        """
+        Хэш набора правил: тексты, обработанные другим словарём, не считаются готовыми
+        """
+        digest = hashlib.sha256()
+        for word in sorted(self.words.values()):
+            digest.update(word.encode('utf-8') + b'\n')
+        for stem in sorted(self.prefixes.values()):
+            digest.update(stem.encode('utf-8') + b'*\n')
+        return digest.hexdigest()[:16]
+
+    def lookup(self, word):
+        """
+        Вариант слова с ё в нижнем регистре или None
+        """
+        key = word.lower()
+        if 'е' not in key:
+            return None
+
+        replacement = self.words.get(key)
+        if replacement is not None:
+            return replacement
+
+        for length in self.prefix_lengths:
+            if length > len(key):
+                continue
+            stem = self.prefixes.get(key[:length])
+            if stem is not None:
+                return stem + key[length:]
+
+        return None
+
+
+def load_dictionary(path, include_defaults=True):
+    """
+    Загружает словарь из файла: по одному слову с ё на строку,
+    звёздочка на конце - основа, строки с # - комментарии
+    """
+    dictionary = YoDictionary(DEFAULT_RULES if include_defaults else ())
+    with open(path, 'r', encoding='utf-8') as f:
+        dictionary.update(line.split('#', 1)[0] for line in f)
+    return dictionary
+
+
+_default_dictionary = None
+
+
+def default_dictionary():
+    """
+    Словарь из встроенных правил (создаётся один раз)
+    """
+    global _default_dictionary
+    if _default_dictionary is None:
+        _default_dictionary = YoDictionary(DEFAULT_RULES)
+    return _default_dictionary
 
-def main():
-    if len(sys.argv) < 2:
-        print("Использование: python3 add_yo.py input.txt")
-        sys.exit(1)
 
-    input_file = sys.argv[1]
+def _match_case(source, target):
+    """
+    Переносит регистр букв исходного слова на замену той же длины
+    """
+    if source.islower():
+        return target
+    if source.isupper():
+        return target.upper()
+    return ''.join(t.upper() if s.isupper() else t for s, t in zip(source, target))
 
-    # Читаем файл
-    with open(input_file, 'r', encoding='utf-8') as f:
-        text = f.read()
 
-    # Добавляем ё
-    fixed_text = add_yo(text)
+def add_yo(text, dictionary=None):
+    """Заменяет 'е' на 'ё' в словах из словаря за один проход по тексту"""
+    if dictionary is None:
+        dictionary = default_dictionary()
+    lookup = dictionary.lookup
+
+    def replace(match):
+        word = match.group()
+        replacement = lookup(word)
+        if replacement is None:
+            return word
+        return _match_case(word, replacement)
+
+    return _WORD.sub(replace, text)
+
+
+def iter_add_yo(stream, dictionary=None, block_size=BLOCK_SIZE):
+    """
+    Обрабатывает текстовый поток блоками, не разрывая слова.
+    Память не зависит от размера файла.
+    """
+    tail = ''
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        buffer = tail + block
+        cut = _TAIL.search(buffer).start()
+        tail = buffer[cut:]
+        if cut:
+            yield add_yo(buffer[:cut], dictionary)
+    if tail:
+        yield add_yo(tail, dictionary)
+
+
+def file_hash(path):
+    """
+    SHA-256 содержимого файла
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_registry(registry_path):
+    try:
+        with open(registry_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_registry(registry_path, registry):
+    registry_path = Path(registry_path)
+    registry_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=registry_path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(registry, f)
+        os.replace(tmp_path, registry_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def is_processed(path, dictionary=None, registry_path=DEFAULT_REGISTRY):
+    """
+    Проверяет по реестру, что в файле уже расставлены ё этим словарём
+    """
+    if dictionary is None:
+        dictionary = default_dictionary()
+    registry = _load_registry(registry_path)
+    processed = registry.get(dictionary.fingerprint(), [])
+    return bool(processed) and file_hash(path) in processed
+
+
+def mark_processed(path, dictionary=None, registry_path=DEFAULT_REGISTRY, content_hash=None):
+    """
+    Записывает хэш обработанного файла в реестр
+    """
+    if dictionary is None:
+        dictionary = default_dictionary()
+    registry = _load_registry(registry_path)
+    processed = registry.setdefault(dictionary.fingerprint(), [])
+    content_hash = content_hash or file_hash(path)
+    if content_hash not in processed:
+        processed.append(content_hash)
+        _save_registry(registry_path, registry)
+
+
+def add_yo_file(input_path, output_path=None, dictionary=None,
+                registry_path=DEFAULT_REGISTRY, force=False):
+    """
+    Расставляет ё в файле потоково и атомарно пишет результат в output_path
+    (по умолчанию - на место исходного). Возвращает False, если файл уже
+    был обработан и работа пропущена.
+    """
+    if dictionary is None:
+        dictionary = default_dictionary()
+    output_path = Path(output_path or input_path)
+
+    if not force and registry_path is not None and is_processed(input_path, dictionary, registry_path):
+        if output_path.exists() and os.path.samefile(input_path, output_path):
+            return False
+        force_copy = True
+    else:
+        force_copy = False
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, suffix='.tmp')
+    digest = hashlib.sha256()
+    try:
+        with open(input_path, 'r', encoding='utf-8', newline='') as src, \
+                os.fdopen(fd, 'w', encoding='utf-8', newline='') as dst:
+            parts = iter(lambda: src.read(BLOCK_SIZE), '') if force_copy else iter_add_yo(src, dictionary)
+            for part in parts:
+                dst.write(part)
+                digest.update(part.encode('utf-8'))
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if registry_path is not None:
+        mark_processed(output_path, dictionary, registry_path, digest.hexdigest())
+    return not force_copy
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Автоматическая расстановка буквы ё в тексте'
+    )
+    parser.add_argument(
+        'input_file',
+        help='Исходный текстовый файл'
+    )
+    parser.add_argument(
+        'output_file',
+        nargs='?',
+        help='Куда сохранить результат (по умолчанию: на место исходного)'
+    )
+    parser.add_argument(
+        '--dict',
+        dest='dictionary',
+        help='Дополнительный словарь: слово с ё на строку, * на конце - основа'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Обработать файл, даже если он уже отмечен как обработанный'
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input_file):
+        print(f"Ошибка: файл '{args.input_file}' не найден")
+        sys.exit(1)
 
-    # Сохраняем обратно
-    with open(input_file, 'w', encoding='utf-8') as f:
-        f.write(fixed_text)
+    dictionary = load_dictionary(args.dictionary) if args.dictionary else None
+    output_file = args.output_file or args.input_file
 
-    print(f"✓ Буква ё расставлена в файле: {input_file}")
+    if add_yo_file(args.input_file, output_file, dictionary, force=args.force):
+        print(f"✓ Буква ё расставлена в файле: {output_file}")
+    else:
+        print(f"✓ Файл уже обработан ранее, повторная расстановка не нужна: {args.input_file}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,212 @@
+"""
+Кэш синтезированных частей аудио на диске.
+
+Ключ - хэш от нормализованного текста, движка, голоса и скорости, поэтому
+один кэш подходит для edge, gtts и coqui. Размер кэша ограничен: при
+переполнении удаляются давно не использованные записи (LRU по времени
+последнего обращения к файлу).
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+from pathlib import Path
+
+
+DEFAULT_CACHE_DIR = Path('.cache') / 'audio'
+DEFAULT_MAX_SIZE_MB = 2048
+
+
+def normalize_text(text):
+    """
+    Приводит текст к виду, который не влияет на озвучку:
+    единая юникод-форма и схлопнутые пробелы.
+    """
+    text = unicodedata.normalize('NFC', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def make_key(text, engine, voice='', rate=''):
+    """
+    Возвращает ключ кэша для части текста
+    """
+    payload = json.dumps(
+        [normalize_text(text), engine, str(voice), str(rate)],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AudioCache:
+    """
+    Контентно-адресуемый кэш аудио частей с LRU вытеснением.
+
+    Файлы лежат в cache_dir/<первые 2 символа ключа>/<ключ>.<расширение>.
+    Запись атомарная, так что кэш можно делить между параллельными запусками.
+    Внутри процесса get/put/evict можно вызывать из нескольких потоков:
+    статистика и учёт размера защищены блокировкой.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+        # Реентерабельная: put вызывает evict, а тот - size
+        self._lock = threading.RLock()
+
+    def _path(self, key, ext):
+        return self.cache_dir / key[:2] / f"{key}.{ext}"
+
+    def get(self, text, engine, voice='', rate='', ext='mp3'):
+        """
+        Возвращает закэшированные байты или None
+        """
+        path = self._path(make_key(text, engine, voice, rate), ext)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Обновляем время обращения - по нему работает LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def contains(self, text, engine, voice='', rate='', ext='mp3'):
+        """
+        Есть ли запись в кэше (без чтения и без учёта в статистике)
+        """
+        return self._path(make_key(text, engine, voice, rate), ext).exists()
+
+    def put(self, text, engine, voice='', rate='', data=b'', ext='mp3'):
+        """
+        Сохраняет байты в кэш и при необходимости освобождает место
+        """
+        path = self._path(make_key(text, engine, voice, rate), ext)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is not None:
+                self._size += len(data)
+            self.evict()
+
+        return path
+
+    def get_meta(self, text, engine, voice='', rate=''):
+        """
+        Возвращает метаданные части (JSON рядом с аудио) или None.
+        В статистику попаданий не входит.
+        """
+        path = self._path(make_key(text, engine, voice, rate), 'json')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return meta
+
+    def put_meta(self, text, engine, voice='', rate='', meta=None):
+        """
+        Сохраняет метаданные части (например, границы слов) рядом с аудио
+        """
+        data = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+        return self.put(text, engine, voice, rate, data, ext='json')
+
+    def _entries(self):
+        """
+        Все записи кэша: (время обращения, размер, путь)
+        """
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+
+        for subdir in self.cache_dir.iterdir():
+            if not subdir.is_dir():
+                continue
+            for path in subdir.iterdir():
+                if path.suffix == '.tmp':
+                    continue
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+        return entries
+
+    def size(self):
+        """
+        Текущий размер кэша в байтах
+        """
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            return self._size
+
+    def evict(self):
+        """
+        Удаляет самые давние записи, пока кэш не уложится в лимит
+        """
+        with self._lock:
+            if self.size() <= self.max_size:
+                return
+
+            entries = sorted(self._entries())
+            self._size = sum(size for _, size, _ in entries)
+
+            for _, size, path in entries:
+                if self._size <= self.max_size:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                self._size -= size
+
+    def stats(self):
+        """
+        Статистика обращений за этот запуск
+        """
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0,
+            'size_bytes': self.size(),
+            'max_size_bytes': self.max_size,
+        }
+
+    def format_stats(self):
+        stats = self.stats()
+        return (
+            f"Кэш аудио: попаданий {stats['hits']}, промахов {stats['misses']} "
+            f"({stats['hit_rate']:.0%}), размер {stats['size_bytes'] / 1024 / 1024:.1f} "
+            f"из {stats['max_size_bytes'] / 1024 / 1024:.0f} МБ"
+        )
@@ -0,0 +1,159 @@
+"""
+Склейка частей аудио без декодирования.
+
+MP3 части склеиваются на уровне кадров: у каждой части отрезаются ID3
+теги и служебный Xing/Info кадр, остальные кадры дописываются в файл
+как есть. WAV части склеиваются через модуль wave. Части добавляются по
+мере готовности, поэтому память не растёт с длиной аудио. Декодирование
+(ffmpeg) нужно только для смены скорости, громкости или формата.
+"""
+
+import io
+import os
+import wave
+
+from audio_probe import parse_frame_header, iter_mp3_frames, is_xing_frame
+from audio_post import needs_postprocess, postprocess_audio
+
+
+def mp3_frames_range(data):
+    """
+    Границы аудио кадров в MP3 данных: (начало, конец, частота, каналов).
+    Теги ID3v2/ID3v1 и Xing/Info кадр в диапазон не входят.
+    """
+    size = len(data)
+    if size >= 128 and data[size - 128:size - 125] == b'TAG':
+        size -= 128
+
+    for offset, length, samples, sample_rate in iter_mp3_frames(data):
+        channels = parse_frame_header(data[offset:offset + 4])[3]
+        if is_xing_frame(data, offset):
+            offset += length
+        return offset, size, sample_rate, channels
+
+    return 0, 0, None, None
+
+
+class Mp3Concatenator:
+    """
+    Дописывает MP3 части в открытый файл кадрами, без перекодирования
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.format = None
+
+    def add(self, data):
+        start, end, sample_rate, channels = mp3_frames_range(data)
+        if start >= end:
+            return
+
+        if self.format is None:
+            self.format = (sample_rate, channels)
+        elif self.format != (sample_rate, channels):
+            raise ValueError(
+                f"части MP3 в разных форматах: {self.format} и {(sample_rate, channels)}"
+            )
+
+        self.fileobj.write(memoryview(data)[start:end])
+
+
+class WavConcatenator:
+    """
+    Дописывает WAV части (bytes) в один WAV файл
+    """
+
+    def __init__(self, path):
+        self.writer = None
+        self.path = path
+        self.params = None
+
+    def add(self, data):
+        with wave.open(io.BytesIO(data), 'rb') as part:
+            params = (part.getnchannels(), part.getsampwidth(), part.getframerate())
+            if self.writer is None:
+                self.params = params
+                self.writer = wave.open(str(self.path), 'wb')
+                self.writer.setnchannels(params[0])
+                self.writer.setsampwidth(params[1])
+                self.writer.setframerate(params[2])
+            elif params != self.params:
+                raise ValueError(f"части WAV в разных форматах: {self.params} и {params}")
+
+            while True:
+                frames = part.readframes(65536)
+                if not frames:
+                    break
+                self.writer.writeframes(frames)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def convert_audio(input_path, output_path, speed=1.0, bitrate='192k', loudness=None):
+    """
+    Единственный проход с декодированием: смена скорости, громкости
+    и/или формата (см. audio_post).
+    Формат результата определяется по расширению output_path.
+    """
+    postprocess_audio(input_path, output_path, speed, loudness, bitrate)
+
+
+class AudioJoiner:
+    """
+    Собирает части одного формата (mp3 или wav) в output_path.
+    Если формат результата совпадает, а скорость и громкость не меняются,
+    части склеиваются без декодирования прямо в результат; иначе - во
+    временный файл рядом, который затем один раз проходит через ffmpeg.
+    loudness - целевая громкость в LUFS (None - не выравнивать).
+
+        with AudioJoiner(output, 'mp3', speed) as joiner:
+            for part in parts:
+                joiner.add(part)
+    """
+
+    def __init__(self, output_path, part_format, speed=1.0, bitrate='192k', loudness=None):
+        self.output_path = str(output_path)
+        self.part_format = part_format
+        self.speed = speed
+        self.bitrate = bitrate
+        self.loudness = loudness
+
+        output_ext = os.path.splitext(self.output_path)[1].lower().lstrip('.')
+        self.direct = not needs_postprocess(speed, loudness) and output_ext == part_format
+        if self.direct:
+            self.target = self.output_path
+        else:
+            self.target = f"{self.output_path}.parts.{part_format}"
+
+        if part_format == 'mp3':
+            self._file = open(self.target, 'wb')
+            self._concat = Mp3Concatenator(self._file)
+        elif part_format == 'wav':
+            self._file = None
+            self._concat = WavConcatenator(self.target)
+        else:
+            raise ValueError(f"неподдерживаемый формат частей: {part_format}")
+
+    def add(self, data):
+        self._concat.add(data)
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+        else:
+            self._concat.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._close()
+            if exc_type is None and not self.direct:
+                convert_audio(self.target, self.output_path, self.speed, self.bitrate, self.loudness)
+        finally:
+            if not self.direct and os.path.exists(self.target):
+                os.remove(self.target)
+        return False
@@ -0,0 +1,102 @@
+"""
+Постобработка аудио: смена темпа и выравнивание громкости за один проход.
+
+Вместо покадровой склейки с перекрёстным затуханием в Python (pydub
+speedup) - цепочка фильтров ffmpeg atempo (WSOLA, без изменения высоты
+голоса) и loudnorm (EBU R128 в однопроходном режиме). ffmpeg читает файл
+потоком, поэтому время и память не зависят от длины трека сверх
+линейного. loudnorm внутри работает на 192 кГц - результат возвращается
+к частоте исходника.
+
+Подходит любому движку: gTTS и Coqui меняют скорость только так, Edge TTS
+и остальные - только выравнивают громкость.
+
+    postprocess_audio('story.wav', 'story.mp3', speed=1.2, loudness=-16)
+"""
+
+import os
+
+from audio_probe import probe_sample_rate
+from ffmpeg_tools import run_ffmpeg
+
+
+# Целевая громкость для речи (LUFS): -16 - подкасты и аудиокниги
+DEFAULT_LOUDNESS = -16.0
+TRUE_PEAK = -1.5
+LOUDNESS_RANGE = 11.0
+
+# Если частоту исходника определить не удалось
+FALLBACK_SAMPLE_RATE = 44100
+
+
+def atempo_filter(speed):
+    """
+    Цепочка atempo для произвольной скорости (один фильтр - от 0.5 до 2.0).
+    При скорости не больше нуля выбрасывает ValueError.
+    """
+    if not speed > 0:
+        raise ValueError(f"скорость должна быть больше нуля: {speed}")
+
+    filters = []
+    while speed > 2.0:
+        filters.append('atempo=2.0')
+        speed /= 2.0
+    while speed < 0.5:
+        filters.append('atempo=0.5')
+        speed /= 0.5
+    filters.append(f'atempo={speed:.6g}')
+    return ','.join(filters)
+
+
+def loudnorm_filter(loudness=DEFAULT_LOUDNESS, true_peak=TRUE_PEAK, loudness_range=LOUDNESS_RANGE):
+    return f'loudnorm=I={loudness:g}:TP={true_peak:g}:LRA={loudness_range:g}'
+
+
+def audio_filters(speed=1.0, loudness=None, sample_rate=None):
+    """
+    Цепочка фильтров для -filter:a или None, если обработка не нужна.
+    Темп меняется до выравнивания громкости: loudnorm видит итоговый сигнал.
+    """
+    filters = []
+    if speed != 1.0:
+        filters.append(atempo_filter(speed))
+    if loudness is not None:
+        filters.append(loudnorm_filter(loudness))
+        filters.append(f'aresample={sample_rate or FALLBACK_SAMPLE_RATE}')
+    return ','.join(filters) or None
+
+
+def needs_postprocess(speed=1.0, loudness=None):
+    return speed != 1.0 or loudness is not None
+
+
+def postprocess_audio(input_path, output_path, speed=1.0, loudness=None, bitrate='192k'):
+    """
+    Единственный проход с декодированием: темп, громкость и/или формат.
+    Формат результата определяется по расширению output_path.
+    """
+    sample_rate = probe_sample_rate(input_path) if loudness is not None else None
+    filters = audio_filters(speed, loudness, sample_rate)
+
+    args = ['-i', str(input_path), '-vn']
+    if filters:
+        args += ['-filter:a', filters]
+    if str(output_path).lower().endswith('.mp3'):
+        args += ['-c:a', 'libmp3lame', '-b:a', bitrate]
+    run_ffmpeg(args + [str(output_path)])
+
+
+def postprocess_in_place(path, speed=1.0, loudness=None, bitrate='192k'):
+    """
+    Обрабатывает готовый файл и заменяет его результатом
+    """
+    if not needs_postprocess(speed, loudness):
+        return
+    root, ext = os.path.splitext(str(path))
+    tmp_path = f"{root}.post{ext}"
+    try:
+        postprocess_audio(path, tmp_path, speed, loudness, bitrate)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,289 @@
+"""
+Определение длительности аудио по заголовкам, без декодирования.
+
+Для MP3 проходим по заголовкам MPEG кадров (или берём число кадров из
+Xing/Info заголовка), для WAV читаем заголовок RIFF. Это заменяет открытие
+файла через moviepy AudioFileClip, который ради .duration запускает ffmpeg.
+"""
+
+import io
+import mmap
+import re
+import subprocess
+import wave
+
+from ffmpeg_tools import get_ffmpeg_binary
+
+# Битрейты в кбит/с: [версия MPEG][слой]
+_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    25: [11025, 12000, 8000],
+}
+
+
+def parse_frame_header(header):
+    """
+    Разбирает 4 байта заголовка MPEG кадра.
+    Возвращает (длина кадра в байтах, сэмплов в кадре, частота, каналов,
+    битрейт в бит/с) или None, если это не заголовок кадра.
+    """
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+
+    version_bits = (header[1] >> 3) & 0x03
+    layer_bits = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    channel_mode = header[3] >> 6
+
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    version = {3: 1, 2: 2, 0: 25}[version_bits]
+    layer = 4 - layer_bits
+
+    bitrate = _BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    channels = 1 if channel_mode == 3 else 2
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or version == 1:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+
+    return length, samples, sample_rate, channels, bitrate
+
+
+def id3v2_size(data, offset=0):
+    """
+    Размер ID3v2 тега в начале данных (0, если тега нет)
+    """
+    if data[offset:offset + 3] != b'ID3' or len(data) < offset + 10:
+        return 0
+    size_bytes = data[offset + 6:offset + 10]
+    size = 0
+    for b in size_bytes:
+        size = (size << 7) | (b & 0x7F)
+    footer = 10 if data[offset + 5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _xing_tag_offset(offset, version, channels):
+    """
+    Где в кадре лежит метка Xing/Info (сразу после side info)
+    """
+    if version == 1:
+        side_info = 17 if channels == 1 else 32
+    else:
+        side_info = 9 if channels == 1 else 17
+    return offset + 4 + side_info
+
+
+def is_xing_frame(data, offset):
+    """
+    Проверяет, что кадр по смещению - служебный Xing/Info, а не звук
+    """
+    header = data[offset:offset + 4]
+    info = parse_frame_header(header)
+    if info is None:
+        return False
+    version = {3: 1, 2: 2, 0: 25}[(header[1] >> 3) & 0x03]
+    tag_offset = _xing_tag_offset(offset, version, info[3])
+    return data[tag_offset:tag_offset + 4] in (b'Xing', b'Info')
+
+
+def _xing_frames(data, offset, version, channels):
+    """
+    Число кадров из Xing/Info заголовка первого кадра, если он есть
+    """
+    tag_offset = _xing_tag_offset(offset, version, channels)
+    tag = data[tag_offset:tag_offset + 4]
+    if tag in (b'Xing', b'Info'):
+        flags = int.from_bytes(data[tag_offset + 4:tag_offset + 8], 'big')
+        if flags & 0x01:
+            return int.from_bytes(data[tag_offset + 8:tag_offset + 12], 'big')
+    return None
+
+
+def iter_mp3_frames(data, offset=0):
+    """
+    Проходит по MPEG кадрам в data (bytes или mmap), пропуская теги и мусор.
+    Возвращает (смещение, длина, сэмплов, частота) для каждого кадра.
+    """
+    size = len(data)
+    offset += id3v2_size(data, offset)
+
+    while offset + 4 <= size:
+        info = parse_frame_header(data[offset:offset + 4])
+        if info is None or offset + info[0] > size:
+            # Ищем следующую синхронизацию
+            next_sync = data.find(b'\xff', offset + 1)
+            if next_sync < 0:
+                return
+            offset = next_sync
+            continue
+
+        length, samples, sample_rate = info[:3]
+        yield offset, length, samples, sample_rate
+        offset += length
+
+
+def _bitrate_at(data, offset):
+    """
+    Битрейт первого надёжного кадра начиная с offset (два заголовка подряд)
+    """
+    size = len(data)
+    for _ in range(64):
+        offset = data.find(b'\xff', offset)
+        if offset < 0 or offset + 4 > size:
+            return None
+        info = parse_frame_header(data[offset:offset + 4])
+        if info is not None:
+            following = offset + info[0]
+            if following + 4 > size or parse_frame_header(data[following:following + 4]) is not None:
+                return info[4]
+        offset += 1
+    return None
+
+
+def mp3_duration_bytes(data):
+    """
+    Длительность MP3 данных в секундах по заголовкам кадров
+    """
+    size = len(data)
+    offset = id3v2_size(data)
+    first = None
+
+    for frame_offset, length, samples, sample_rate in iter_mp3_frames(data, offset):
+        first = (frame_offset, samples, sample_rate)
+        break
+
+    if first is None:
+        return 0.0
+
+    frame_offset, samples, sample_rate = first
+    header = data[frame_offset:frame_offset + 4]
+    version = {3: 1, 2: 2, 0: 25}[(header[1] >> 3) & 0x03]
+    info = parse_frame_header(header)
+    channels, bitrate = info[3], info[4]
+
+    # VBR файлы с Xing/Info заголовком: берём число кадров оттуда
+    frames = _xing_frames(data, frame_offset, version, channels)
+    if frames is not None:
+        return frames * samples / sample_rate
+
+    # Постоянный битрейт (как у Edge TTS): если кадры в разных частях файла
+    # одного битрейта, длительность считается по размеру данных
+    end = size - 128 if size >= 128 and data[size - 128:size - 125] == b'TAG' else size
+    probes = [frame_offset + (end - frame_offset) * k // 4 for k in (1, 2, 3)]
+    if all(_bitrate_at(data, probe) == bitrate for probe in probes):
+        return (end - frame_offset) * 8 / bitrate
+
+    # Переменный битрейт без Xing: суммируем сэмплы всех кадров
+    total_samples = 0
+    for _, _, samples, sample_rate in iter_mp3_frames(data, frame_offset):
+        total_samples += samples
+    return total_samples / sample_rate
+
+
+def mp3_duration(path):
+    """
+    Длительность MP3 файла в секундах. Файл не читается в память целиком.
+    """
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Пустой файл
+            return 0.0
+        with data:
+            return mp3_duration_bytes(data)
+
+
+def wav_duration_bytes(data):
+    """
+    Длительность WAV данных по заголовку
+    """
+    with wave.open(io.BytesIO(data), 'rb') as w:
+        return w.getnframes() / w.getframerate()
+
+
+def wav_duration(path):
+    """
+    Длительность WAV файла по заголовку
+    """
+    with wave.open(str(path), 'rb') as w:
+        return w.getnframes() / w.getframerate()
+
+
+def _ffmpeg_duration(path):
+    """
+    Запасной вариант для прочих форматов: длительность из вывода ffmpeg -i
+    (только чтение контейнера, без декодирования)
+    """
+    result = subprocess.run(
+        [get_ffmpeg_binary(), '-hide_banner', '-i', str(path)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    match = re.search(rb'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)', result.stderr)
+    if not match:
+        raise ValueError(f"не удалось определить длительность: {path}")
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def probe_duration(path):
+    """
+    Длительность аудио файла в секундах (MP3, WAV, прочее через ffmpeg)
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(12)
+
+    if magic[:4] == b'RIFF' and magic[8:12] == b'WAVE':
+        return wav_duration(path)
+
+    if magic[:3] == b'ID3' or parse_frame_header(magic[:4]) is not None:
+        return mp3_duration(path)
+
+    return _ffmpeg_duration(path)
+
+
+def probe_sample_rate(path):
+    """
+    Частота дискретизации MP3 или WAV файла по заголовкам; для прочих
+    форматов - None
+    """
+    with open(path, 'rb') as f:
+        head = f.read(64 * 1024)
+
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        with wave.open(str(path), 'rb') as w:
+            return w.getframerate()
+
+    offset = id3v2_size(head)
+    if offset > len(head):
+        # Длинный ID3 тег (обложка) - дочитываем начало кадров
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            head = f.read(64 * 1024)
+        offset = 0
+
+    for _, _, _, sample_rate in iter_mp3_frames(head, offset):
+        return sample_rate
+    return None
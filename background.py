@@ -0,0 +1,241 @@
+"""
+Подготовка фонового изображения для видео и постера.
+
+Картинка декодируется один раз, масштабируется "с заполнением" и
+обрезается по центру, градиент накладывается векторно. Обрезанный кадр
+без градиента общий для видео и постера: он кэшируется в памяти процесса
+и на диске - по хэшу картинки и разрешению, так что пакетные задачи
+с общей обложкой серии не повторяют работу. Кадр с градиентом для видео
+получается из него и хранится только в памяти.
+
+Дисковый кэш ограничен по размеру: при переполнении удаляются давно не
+использованные кадры (LRU по времени обращения, как в AudioCache). Кэш
+в памяти тоже ограничен - по числу картинок и кадров, - чтобы долгоживущие
+процессы пакетной сборки не копили обложки всех историй. Хэш картинки
+запоминается по пути, времени изменения и размеру файла и заново не
+считается.
+"""
+
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+
+DEFAULT_CACHE_DIR = Path('.cache') / 'backgrounds'
+DEFAULT_MAX_SIZE_MB = 256
+
+# Непрозрачность чёрного градиента: 204/255 слева (прозрачность 20%),
+# 128/255 справа (прозрачность 50%)
+GRADIENT_ALPHA = (204, 128)
+
+# Версия алгоритма подготовки - входит в ключ дискового кэша
+_PREPARE_VERSION = 2
+
+# Сколько декодированных картинок, готовых кадров и хэшей файлов держать
+# в памяти процесса
+MAX_DECODED_IMAGES = 2
+MAX_PREPARED_FRAMES = 8
+MAX_FILE_HASHES = 256
+
+_decoded_images = OrderedDict()
+_prepared_frames = OrderedDict()
+_file_hashes = OrderedDict()
+
+
+def _lru_get(cache, key):
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _lru_put(cache, key, value, limit):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > limit:
+        cache.popitem(last=False)
+
+
+def file_hash(path):
+    """
+    SHA-256 содержимого файла
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def image_hash_of(path):
+    """
+    Хэш картинки; повторно для того же неизменённого файла не считается
+    """
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    digest = _lru_get(_file_hashes, key)
+    if digest is None:
+        digest = file_hash(path)
+        _lru_put(_file_hashes, key, digest, MAX_FILE_HASHES)
+    return digest
+
+
+def load_image(path, image_hash=None):
+    """
+    Декодирует картинку в RGB один раз за процесс
+    """
+    from PIL import Image
+
+    image_hash = image_hash or image_hash_of(path)
+    image = _lru_get(_decoded_images, image_hash)
+    if image is None:
+        with Image.open(path) as src:
+            image = src.convert('RGB')
+        _lru_put(_decoded_images, image_hash, image, MAX_DECODED_IMAGES)
+    return image
+
+
+def cover_crop(image, width, height):
+    """
+    Масштабирует картинку так, чтобы она закрыла весь кадр без искажений,
+    и обрезает по центру. Возвращает RGB numpy массив height x width.
+    """
+    from PIL import Image
+
+    scale = max(width / image.width, height / image.height)
+    new_w = max(width, round(image.width * scale))
+    new_h = max(height, round(image.height * scale))
+
+    resized = image.resize((new_w, new_h), Image.LANCZOS)
+
+    left = (new_w - width) // 2
+    top = (new_h - height) // 2
+    return np.asarray(resized.crop((left, top, left + width, top + height)))
+
+
+def gradient_alpha(width, alpha=GRADIENT_ALPHA):
+    """
+    Строка непрозрачности горизонтального градиента (uint8, длина width)
+    """
+    left, right = alpha
+    x = np.arange(width)
+    return (left - (left - right) * (x / width)).astype(np.uint8)
+
+
+def apply_gradient(frame, alpha=GRADIENT_ALPHA):
+    """
+    Накладывает чёрный горизонтальный градиент на RGB кадр
+    """
+    keep = 1.0 - gradient_alpha(frame.shape[1], alpha) / 255.0
+    shaded = frame.astype(np.float32) * keep[np.newaxis, :, np.newaxis]
+    return np.clip(shaded + 0.5, 0, 255).astype(np.uint8)
+
+
+def _cache_key(image_hash, width, height):
+    payload = f"{_PREPARE_VERSION}:{image_hash}:{width}x{height}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _evict(cache_dir, max_size):
+    """
+    Удаляет самые давние кадры, пока дисковый кэш не уложится в max_size
+    """
+    entries = []
+    for path in Path(cache_dir).glob('*.npy'):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+
+
+def _load_cached(cache_path):
+    try:
+        frame = np.load(cache_path)
+    except (OSError, ValueError):
+        return None
+    # Обновляем время обращения - по нему работает LRU
+    try:
+        os.utime(cache_path)
+    except OSError:
+        pass
+    return frame
+
+
+def _save_cached(cache_path, frame, max_size):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, frame)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _evict(cache_path.parent, max_size)
+
+
+def crop_background(image_path, width, height, cache_dir=DEFAULT_CACHE_DIR,
+                    max_size_mb=DEFAULT_MAX_SIZE_MB, image_hash=None):
+    """
+    Кадр фона width x height без градиента - общий для видео и постера.
+    cache_dir=None отключает дисковый кэш.
+    """
+    image_hash = image_hash or image_hash_of(image_path)
+    key = _cache_key(image_hash, width, height)
+
+    frame = _lru_get(_prepared_frames, key)
+    if frame is not None:
+        return frame
+
+    cache_path = Path(cache_dir) / f"{key}.npy" if cache_dir is not None else None
+    if cache_path is not None and cache_path.exists():
+        frame = _load_cached(cache_path)
+
+    if frame is None:
+        frame = np.ascontiguousarray(cover_crop(load_image(image_path, image_hash), width, height),
+                                     dtype=np.uint8)
+        if cache_path is not None:
+            _save_cached(cache_path, frame, int(max_size_mb * 1024 * 1024))
+
+    frame.flags.writeable = False
+    _lru_put(_prepared_frames, key, frame, MAX_PREPARED_FRAMES)
+    return frame
+
+
+def prepare_background(image_path, width, height, gradient=GRADIENT_ALPHA,
+                       cache_dir=DEFAULT_CACHE_DIR, max_size_mb=DEFAULT_MAX_SIZE_MB):
+    """
+    Возвращает готовый RGB кадр фона width x height.
+    gradient - (непрозрачность слева, справа) или None без градиента.
+    cache_dir=None отключает дисковый кэш.
+
+    Возвращаемый массив общий для всех вызовов и доступен только для чтения.
+    """
+    image_hash = image_hash_of(image_path)
+    frame = crop_background(image_path, width, height, cache_dir, max_size_mb, image_hash)
+    if gradient is None:
+        return frame
+
+    key = (_cache_key(image_hash, width, height), gradient)
+    shaded = _lru_get(_prepared_frames, key)
+    if shaded is None:
+        shaded = apply_gradient(frame, gradient)
+        shaded.flags.writeable = False
+        _lru_put(_prepared_frames, key, shaded, MAX_PREPARED_FRAMES)
+    return shaded
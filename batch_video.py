@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Пакетная генерация видео для всех рассказов в директории src.
+
+Находит пары <имя>.txt + <имя>.png|jpg|jpeg и обрабатывает их в одном
+процессе: синтез речи (сеть) идёт на одном asyncio цикле с собственным
+лимитом, кодирование видео (процессор) - в пуле процессов со своим
+лимитом. Пока одни рассказы кодируются, следующие уже озвучиваются.
+Соединения с Edge TTS общие для всех рассказов и не открываются заново.
+
+Результат пишется под временным именем и переименовывается только
+целиком готовым, поэтому файл, оборванный сбоем, не считается готовым
+при следующем запуске.
+"""
+
+import os
+import sys
+import argparse
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from text_to_video import (
+    EDGE_TTS_AVAILABLE,
+    MOVIEPY_AVAILABLE,
+    load_story,
+    generate_audio,
+    create_video,
+    create_poster,
+)
+from add_yo import add_yo, is_processed
+from audio_cache import AudioCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE_MB
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def find_stories(src_dir):
+    """
+    Возвращает список (имя, путь к тексту, путь к картинке или None)
+    """
+    stories = []
+    for text_path in sorted(Path(src_dir).glob('*.txt')):
+        image_path = None
+        for ext in IMAGE_EXTENSIONS:
+            candidate = text_path.with_suffix(ext)
+            if candidate.exists():
+                image_path = candidate
+                break
+        stories.append((text_path.stem, text_path, image_path))
+    return stories
+
+
+def partial_path(path):
+    """
+    Временное имя результата в той же директории (с тем же расширением,
+    по нему ffmpeg выбирает формат)
+    """
+    path = Path(path)
+    return path.with_name(f".{path.stem}.part{path.suffix}")
+
+
+def prepare_text(text_path, audio_only):
+    """
+    Читает рассказ и расставляет ё, если файл ещё не обработан
+    """
+    title, text = load_story(text_path, audio_only)
+    if not is_processed(text_path):
+        if title:
+            title = add_yo(title)
+        text = add_yo(text)
+    return title, text
+
+
+def render_story(audio_path, output_path, poster_path, title, width, height,
+                 bg_color, image_path, render_mode, still_fps, duration):
+    """
+    Кодирует видео и постер одного рассказа. Выполняется в пуле процессов.
+    Видео появляется под своим именем последним, когда всё уже готово.
+    """
+    tmp_path = partial_path(output_path)
+    try:
+        create_video(
+            str(audio_path),
+            str(tmp_path),
+            width,
+            height,
+            bg_color,
+            image_path,
+            render_mode,
+            still_fps,
+            duration
+        )
+
+        if image_path:
+            create_poster(image_path, title, poster_path, width, height)
+
+        os.replace(tmp_path, output_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+async def process_story(name, text_path, image_path, args, tts_semaphore, encode_pool, cache, edge_pool):
+    """
+    Полный цикл для одного рассказа: текст -> аудио -> видео и постер
+    """
+    output_dir = Path(args.output_dir)
+    loop = asyncio.get_running_loop()
+
+    # Чтение и расстановка ё - не на цикле, чтобы не задерживать озвучку
+    # остальных рассказов
+    title, text = await loop.run_in_executor(None, prepare_text, text_path, args.audio_only)
+
+    if args.audio_only:
+        audio_path = partial_path(output_dir / f"{name}.mp3")
+    else:
+        work_dir = output_dir / '.work'
+        work_dir.mkdir(parents=True, exist_ok=True)
+        audio_path = work_dir / f"{name}.mp3"
+
+    try:
+        async with tts_semaphore:
+            print(f"[{name}] Озвучиваю {len(text)} символов...")
+            duration = await generate_audio(
+                text,
+                audio_path,
+                args.voice,
+                args.speed,
+                args.tts_concurrency,
+                cache,
+                pool=edge_pool
+            )
+        print(f"[{name}] Аудио готово: {duration:.1f} секунд")
+
+        if args.audio_only:
+            os.replace(audio_path, output_dir / f"{name}.mp3")
+            return
+
+        print(f"[{name}] Отправляю на кодирование...")
+        await loop.run_in_executor(
+            encode_pool,
+            render_story,
+            audio_path,
+            output_dir / f"{name}.mp4",
+            output_dir / f"{name}.png",
+            title,
+            args.width,
+            args.height,
+            args.bg_color,
+            str(image_path) if image_path else None,
+            args.render_mode,
+            args.still_fps,
+            duration
+        )
+        print(f"[{name}] ✓ Видео готово")
+    finally:
+        # Для --audio-only здесь остаётся только оборванный файл
+        if audio_path.exists():
+            audio_path.unlink()
+
+
+async def run_batch(stories, args):
+    """
+    Запускает все рассказы и возвращает список (имя, ошибка) для неудачных
+    """
+    # Импорт здесь: наличие edge_tts main проверяет до запуска
+    from edge_session import EdgeSessionPool
+
+    tts_semaphore = asyncio.Semaphore(args.tts_jobs)
+    cache = None if args.no_cache else AudioCache(args.cache_dir, args.cache_size)
+    failures = []
+
+    async def guarded(name, text_path, image_path):
+        try:
+            await process_story(name, text_path, image_path, args, tts_semaphore, encode_pool, cache,
+                                edge_pool)
+        except Exception as e:
+            print(f"[{name}] ✗ Ошибка: {e}")
+            failures.append((name, e))
+
+    edge_pool = EdgeSessionPool(args.tts_jobs * args.tts_concurrency, verify_ssl=not args.insecure_ssl)
+    async with edge_pool:
+        with ProcessPoolExecutor(max_workers=args.encode_jobs) as encode_pool:
+            await asyncio.gather(*(guarded(*story) for story in stories))
+
+    print(edge_pool.format_stats())
+    if cache is not None:
+        print(cache.format_stats())
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Пакетное создание видео для всех рассказов в директории src'
+    )
+    parser.add_argument(
+        '--src-dir',
+        default='src',
+        help='Директория с текстами и картинками (по умолчанию: src)'
+    )
+    parser.add_argument(
+        '--output-dir',
+        default='output',
+        help='Директория для результатов (по умолчанию: output)'
+    )
+    parser.add_argument(
+        '--tts-jobs',
+        type=int,
+        default=4,
+        help='Сколько рассказов озвучивать одновременно (по умолчанию: 4)'
+    )
+    parser.add_argument(
+        '--encode-jobs',
+        type=int,
+        default=max(1, (os.cpu_count() or 2) // 2),
+        help='Сколько видео кодировать одновременно (по умолчанию: половина ядер)'
+    )
+    parser.add_argument(
+        '-j', '--tts-concurrency',
+        type=int,
+        default=4,
+        help='Параллельных запросов к Edge TTS внутри одного рассказа (по умолчанию: 4)'
+    )
+    parser.add_argument(
+        '-v', '--voice',
+        default='ru-RU-DmitryNeural',
+        help='Голос для Edge TTS (по умолчанию: ru-RU-DmitryNeural - мужской)'
+    )
+    parser.add_argument(
+        '-s', '--speed',
+        type=float,
+        default=1.1,
+        help='Скорость речи (по умолчанию: 1.1 - чуть ускоренная)'
+    )
+    parser.add_argument(
+        '--width',
+        type=int,
+        default=1920,
+        help='Ширина видео (по умолчанию: 1920)'
+    )
+    parser.add_argument(
+        '--height',
+        type=int,
+        default=1080,
+        help='Высота видео (по умолчанию: 1080)'
+    )
+    parser.add_argument(
+        '--bg-color',
+        default='20,20,30',
+        help='Цвет фона RGB через запятую для рассказов без картинки (по умолчанию: 20,20,30)'
+    )
+    parser.add_argument(
+        '--render-mode',
+        choices=['still', 'compose'],
+        default='still',
+        help='Режим кодирования видео (по умолчанию: still)'
+    )
+    parser.add_argument(
+        '--still-fps',
+        type=int,
+        default=1,
+        help='Частота кадров в режиме still (по умолчанию: 1)'
+    )
+    parser.add_argument(
+        '--audio-only',
+        action='store_true',
+        help='Создать только аудио файлы без видео'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Пересоздать результаты, даже если они уже есть'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Не использовать кэш синтезированных частей аудио'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=str(DEFAULT_CACHE_DIR),
+        help=f'Директория кэша аудио (по умолчанию: {DEFAULT_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=DEFAULT_MAX_SIZE_MB,
+        help=f'Максимальный размер кэша аудио в МБ (по умолчанию: {DEFAULT_MAX_SIZE_MB})'
+    )
+    parser.add_argument(
+        '--insecure-ssl',
+        action='store_true',
+        help='Не проверять SSL сертификат Edge TTS (только если у сервиса истёк сертификат)'
+    )
+
+    args = parser.parse_args()
+    if not args.speed > 0:
+        print(f"Ошибка: скорость речи должна быть больше нуля (--speed {args.speed})")
+        sys.exit(1)
+    args.bg_color = tuple(int(x) for x in args.bg_color.split(','))
+
+    if not EDGE_TTS_AVAILABLE:
+        print("Ошибка: edge-tts не установлен")
+        print("Установите: pip install edge-tts")
+        sys.exit(1)
+
+    if not args.audio_only and not MOVIEPY_AVAILABLE:
+        print("Ошибка: moviepy не установлен")
+        print("Установите: pip install moviepy")
+        sys.exit(1)
+
+    Path(args.output_dir).mkdir(exist_ok=True)
+
+    suffix = '.mp3' if args.audio_only else '.mp4'
+    stories = []
+    for name, text_path, image_path in find_stories(args.src_dir):
+        if not args.force and (Path(args.output_dir) / f"{name}{suffix}").exists():
+            print(f"Пропускаю {name}: результат уже есть (--force для пересоздания)")
+            continue
+        stories.append((name, text_path, image_path))
+
+    if not stories:
+        print("Нечего обрабатывать")
+        return
+
+    print(f"Рассказов к обработке: {len(stories)} "
+          f"(озвучка: {args.tts_jobs} одновременно, кодирование: {args.encode_jobs} одновременно)")
+
+    start = time.perf_counter()
+    failures = asyncio.run(run_batch(stories, args))
+    elapsed = time.perf_counter() - start
+
+    print(f"\n✓ Обработано: {len(stories) - len(failures)} из {len(stories)} за {elapsed:.0f} с")
+    if failures:
+        print("✗ Не удалось:")
+        for name, error in failures:
+            print(f"  - {name}: {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Сравнение скорости add_yo: прежний вариант (около 60 шаблонов, по два
+re.sub на каждый) против однопроходного словарного.
+
+Запуск: python3 benchmarks/bench_add_yo.py [--size-mb 2] [--repeat 3]
+Для проверки совпадения результатов оба варианта сравниваются без учёта
+регистра: прежний вариант приводил найденные слова к нижнему регистру.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from add_yo import add_yo, YoDictionary, DEFAULT_RULES
+
+
+SAMPLE_WORDS = (
+    "все ее еще мое твое свое чем зачем почем нем дает ведет несет берет живет "
+    "идет поет везет течет возьмет придет найдет уйдет подойдет перейдет вернет "
+    "начнет поймет умрет лед мед полет счет учет прием подъем наем стекло "
+    "черный желтая зеленые четкий о чем в нем на нем о ней "
+    "он она они был была было сказал посмотрел дом дорога лес поле небо вечер "
+    "утро ветер тихо медленно быстро человек время жизнь рука глаза голос "
+    "дверь окно город улица старый новый большой маленький первый последний"
+).split()
+
+
+def legacy_add_yo(text):
+    """Заменяет 'е' на 'ё' в частых словах"""
+
+    # Список замен: (паттерн, замена)
+    replacements = [
+        # Местоимения
+        (r'\bвсе\b', 'всё'),
+        (r'\bее\b', 'её'),
+        (r'\bеще\b', 'ещё'),
+        (r'\bмое\b', 'моё'),
+        (r'\bтвое\b', 'твоё'),
+        (r'\bсвое\b', 'своё'),
+
+        # Наречия и союзы
+        (r'\bчем\b', 'чём'),
+        (r'\bо чем\b', 'о чём'),
+        (r'\bв чем\b', 'в чём'),
+        (r'\bна чем\b', 'на чём'),
+        (r'\bзачем\b', 'зачём'),
+        (r'\bпочем\b', 'почём'),
+        (r'\bнем\b', 'нём'),
+        (r'\bо нем\b', 'о нём'),
+        (r'\bв нем\b', 'в нём'),
+        (r'\bна нем\b', 'на нём'),
+
+        # Глаголы 3-го лица
+        (r'\bдает\b', 'даёт'),
+        (r'\bведет\b', 'ведёт'),
+        (r'\bнесет\b', 'несёт'),
+        (r'\bберет\b', 'берёт'),
+        (r'\bживет\b', 'живёт'),
+        (r'\bидет\b', 'идёт'),
+        (r'\bпоет\b', 'поёт'),
+        (r'\bвезет\b', 'везёт'),
+        (r'\bтечет\b', 'течёт'),
+        (r'\bвозьмет\b', 'возьмёт'),
+        (r'\bпридет\b', 'придёт'),
+        (r'\bнайдет\b', 'найдёт'),
+        (r'\bуйдет\b', 'уйдёт'),
+        (r'\bподойдет\b', 'подойдёт'),
+        (r'\bперейдет\b', 'перейдёт'),
+        (r'\bвернет\b', 'вернёт'),
+        (r'\bначнет\b', 'начнёт'),
+        (r'\bпоймет\b', 'поймёт'),
+        (r'\bумрет\b', 'умрёт'),
+
+        # Существительные
+        (r'\bлед\b', 'лёд'),
+        (r'\bмед\b', 'мёд'),
+        (r'\bполет\b', 'полёт'),
+        (r'\bсчет\b', 'счёт'),
+        (r'\bучет\b', 'учёт'),
+        (r'\bприем\b', 'приём'),
+        (r'\bподъем\b', 'подъём'),
+        (r'\bнаем\b', 'наём'),
+        (r'\bстекл', 'стёкл'),
+
+        # Прилагательные
+        (r'\bчерн', 'чёрн'),
+        (r'\bжелт', 'жёлт'),
+        (r'\bзелен', 'зелён'),
+        (r'\bчетк', 'чётк'),
+
+        # Частицы и предлоги
+        (r'\bо ней\b', 'о ней'),  # не меняется
+    ]
+
+    # Применяем замены с учётом регистра
+    result = text
+    for pattern, replacement in replacements:
+        result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
+        # Также с заглавной буквы
+        pattern_cap = pattern.replace(r'\b', r'\b').replace(pattern[2], pattern[2].upper(), 1) if len(pattern) > 2 else pattern
+        replacement_cap = replacement[0].upper() + replacement[1:] if len(replacement) > 0 else replacement
+        result = re.sub(pattern_cap, replacement_cap, result)
+
+    return result
+
+
+def make_text(size_bytes, seed=1):
+    """
+    Псевдослучайный русский текст нужного размера (в байтах UTF-8)
+    """
+    rng = random.Random(seed)
+    sentences = []
+    size = 0
+    while size < size_bytes:
+        words = [rng.choice(SAMPLE_WORDS) for _ in range(rng.randint(5, 15))]
+        if rng.random() < 0.3:
+            words = [w.upper() if rng.random() < 0.1 else w for w in words]
+        sentence = ' '.join(words).capitalize() + rng.choice('.!?…') + ' '
+        sentences.append(sentence)
+        size += len(sentence.encode('utf-8'))
+        if rng.random() < 0.1:
+            sentences.append('\n\n')
+    return ''.join(sentences)
+
+
+def best_time(func, text, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк add_yo')
+    parser.add_argument('--size-mb', type=float, default=2.0,
+                        help='Размер текста в МБ (по умолчанию: 2 - объём книги)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Число повторов, берётся лучшее время (по умолчанию: 3)')
+    parser.add_argument('--dict-size', type=int, default=50000,
+                        help='Размер синтетического внешнего словаря (по умолчанию: 50000)')
+    args = parser.parse_args()
+
+    text = make_text(int(args.size_mb * 1024 * 1024))
+    print(f"Текст: {len(text)} символов, {len(text.encode('utf-8')) / 1024 / 1024:.1f} МБ")
+
+    legacy_time, legacy_result = best_time(legacy_add_yo, text, args.repeat)
+    new_time, new_result = best_time(add_yo, text, args.repeat)
+
+    print(f"Прежний вариант:   {legacy_time:.3f} с")
+    print(f"Словарный вариант: {new_time:.3f} с (быстрее в {legacy_time / new_time:.1f} раз)")
+
+    if legacy_result.lower() != new_result.lower():
+        print("✗ Результаты различаются")
+        sys.exit(1)
+    print("✓ Результаты совпадают (без учёта регистра)")
+
+    # Большой внешний словарь: скорость почти не зависит от числа форм
+    rng = random.Random(2)
+    alphabet = 'абвгдежзийклмнопрстуфхцчшщыьэюя'
+    sample = set(SAMPLE_WORDS)
+    forms = []
+    while len(forms) < args.dict_size:
+        stem = ''.join(rng.choice(alphabet) for _ in range(rng.randint(3, 8)))
+        form = stem + 'ё' + ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 4)))
+        # Случайная форма не должна совпасть со словом из текста
+        if form.replace('ё', 'е') not in sample:
+            forms.append(form)
+    dictionary = YoDictionary(DEFAULT_RULES)
+    start = time.perf_counter()
+    dictionary.update(forms)
+    load_time = time.perf_counter() - start
+
+    big_time, big_result = best_time(lambda t: add_yo(t, dictionary), text, args.repeat)
+    print(f"Словарь на {len(dictionary)} форм: загрузка {load_time:.3f} с, обработка {big_time:.3f} с")
+    if big_result != new_result:
+        print("✗ Внешний словарь изменил результат для встроенных правил")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
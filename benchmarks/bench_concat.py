@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Склейка частей аудио: pydub (AudioSegment += часть, экспорт в MP3 192k)
+против audio_concat (кадры MP3 / блоки WAV без декодирования).
+
+Каждый вариант запускается в отдельном процессе, чтобы честно измерить
+пиковое потребление памяти (ru_maxrss).
+
+Запуск: python3 benchmarks/bench_concat.py [--minutes 60] [--part-seconds 30]
+"""
+
+import argparse
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ffmpeg_tools import run_ffmpeg, get_ffmpeg_binary
+
+
+def make_parts(work_dir, minutes, part_seconds):
+    """
+    Создаёт MP3 (как у gTTS) и WAV (как у Coqui) части общей длиной minutes
+    """
+    count = max(1, int(minutes * 60 // part_seconds))
+    mp3_part = os.path.join(work_dir, 'part.mp3')
+    wav_part = os.path.join(work_dir, 'part.wav')
+    run_ffmpeg(['-f', 'lavfi', '-i', f'sine=f=220:d={part_seconds}',
+                '-ar', '24000', '-ac', '1', '-b:a', '32k', mp3_part])
+    run_ffmpeg(['-f', 'lavfi', '-i', f'sine=f=220:d={part_seconds}',
+                '-ar', '22050', '-ac', '1', wav_part])
+    return count
+
+
+def worker(mode, work_dir, count):
+    """
+    Один замер в отдельном процессе: печатает время и пиковую память
+    """
+    part_format = 'mp3' if mode.endswith('mp3') else 'wav'
+    with open(os.path.join(work_dir, f'part.{part_format}'), 'rb') as f:
+        part = f.read()
+    output = os.path.join(work_dir, f'out_{mode}.mp3')
+
+    start = time.perf_counter()
+    if mode.startswith('pydub'):
+        from pydub import AudioSegment
+        AudioSegment.converter = get_ffmpeg_binary()
+        combined = AudioSegment.empty()
+        for _ in range(count):
+            if part_format == 'mp3':
+                combined += AudioSegment.from_file(io.BytesIO(part), format='mp3')
+            else:
+                combined += AudioSegment.from_wav(io.BytesIO(part))
+        combined.export(output, format='mp3', bitrate='192k')
+    else:
+        from audio_concat import AudioJoiner
+        with AudioJoiner(output, part_format) as joiner:
+            for _ in range(count):
+                joiner.add(part)
+    elapsed = time.perf_counter() - start
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{elapsed:.3f} {peak_kb}")
+
+
+def measure(mode, work_dir, count):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', mode, work_dir, str(count)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        reason = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'ошибка'
+        return None, reason
+    elapsed, peak_kb = result.stdout.split()
+    return (float(elapsed), int(peak_kb) / 1024), None
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        worker(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        return
+
+    parser = argparse.ArgumentParser(description='Бенчмарк склейки аудио')
+    parser.add_argument('--minutes', type=float, default=60,
+                        help='Общая длина аудио в минутах (по умолчанию: 60)')
+    parser.add_argument('--part-seconds', type=int, default=30,
+                        help='Длина одной части в секундах (по умолчанию: 30)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        count = make_parts(work_dir, args.minutes, args.part_seconds)
+        print(f"Частей: {count} по {args.part_seconds} с, всего {args.minutes:g} мин\n")
+        print(f"{'Вариант':<30}{'Время, с':>10}{'Пик RSS, МБ':>14}")
+
+        for mode, title in [
+            ('pydub-wav', 'pydub, WAV -> MP3'),
+            ('concat-wav', 'audio_concat, WAV -> MP3'),
+            ('pydub-mp3', 'pydub, MP3 -> MP3'),
+            ('concat-mp3', 'audio_concat, MP3 -> MP3'),
+        ]:
+            result, error = measure(mode, work_dir, count)
+            if result is None:
+                print(f"{title:<30}  пропущено: {error}")
+            else:
+                print(f"{title:<30}{result[0]:>10.2f}{result[1]:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Real-time factor параллельной озвучки Coqui для разного числа процессов.
+
+RTF = время синтеза / длительность полученного аудио (меньше - лучше,
+меньше 1 - быстрее реального времени). Время загрузки моделей в пуле
+считается отдельно: перед замером каждый процесс пула прогревается.
+
+Запуск: python3 benchmarks/bench_coqui_workers.py [--workers 1,2,4] [--chunks 16]
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import sys
+import time
+import wave
+from importlib.util import find_spec
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coqui_parallel import default_threads, _init_worker, _synthesize
+from coqui_worker import COQUI_MODEL
+
+
+SAMPLE = (
+    "Вечером над рекой поднялся туман, и дальний берег исчез, будто его и не было. "
+    "Старый паромщик долго смотрел на воду, потом зажёг фонарь и сел на скамью у причала. "
+    "Он знал, что в такую погоду никто не переправляется, но всё равно ждал."
+)
+
+
+def wav_seconds(data):
+    with wave.open(io.BytesIO(data), 'rb') as w:
+        return w.getnframes() / w.getframerate()
+
+
+def run(workers, chunks, language, threads):
+    """
+    Озвучивает chunks в прогретом пуле; возвращает (загрузка, синтез, длительность аудио)
+    """
+    context = multiprocessing.get_context('spawn')
+    start = time.perf_counter()
+    with context.Pool(workers, initializer=_init_worker, initargs=(COQUI_MODEL, threads)) as pool:
+        # Прогрев: каждый процесс загружает модель и озвучивает короткую фразу
+        pool.map(_synthesize, [(i, "Проверка.", language) for i in range(workers)], chunksize=1)
+        loaded = time.perf_counter()
+
+        audio = 0.0
+        jobs = [(i, chunk, language) for i, chunk in enumerate(chunks)]
+        for data in pool.imap(_synthesize, jobs, chunksize=1):
+            audio += wav_seconds(data)
+        end = time.perf_counter()
+
+    return loaded - start, end - loaded, audio
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк пула Coqui')
+    parser.add_argument('--workers', default=None,
+                        help='Число процессов через запятую (по умолчанию: 1,2,4,... до числа ядер)')
+    parser.add_argument('--chunks', type=int, default=16,
+                        help='Сколько частей озвучивать (по умолчанию: 16)')
+    parser.add_argument('--language', default='ru',
+                        help='Язык (по умолчанию: ru)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Потоков torch на процесс (по умолчанию: ядра поровну)')
+    args = parser.parse_args()
+
+    if find_spec('TTS') is None:
+        print("Ошибка: Coqui TTS не установлен")
+        print("Установите: pip install TTS")
+        sys.exit(1)
+
+    cores = os.cpu_count() or 1
+    if args.workers:
+        counts = [int(x) for x in args.workers.split(',')]
+    else:
+        counts = []
+        n = 1
+        while n <= cores:
+            counts.append(n)
+            n *= 2
+
+    chunks = [SAMPLE] * args.chunks
+    print(f"Ядер: {cores}, частей: {len(chunks)} по {len(SAMPLE)} символов\n")
+    print(f"{'Процессов':>10}{'Потоков':>9}{'Загрузка, с':>13}{'Синтез, с':>11}{'Аудио, с':>10}{'RTF':>8}")
+
+    for workers in counts:
+        threads = args.threads or default_threads(workers)
+        load, synth, audio = run(workers, chunks, args.language, threads)
+        print(f"{workers:>10}{threads:>9}{load:>13.1f}{synth:>11.1f}{audio:>10.1f}{synth / audio:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
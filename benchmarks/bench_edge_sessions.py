@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Новое соединение на каждую часть (как edge_tts.Communicate) против пула
+постоянных соединений EdgeSessionPool.
+
+Работает без сети: запросы идут в fake_edge_server.FakeEdgeServer, у
+которого задержка рукопожатия имитирует DNS + TCP + TLS до настоящего
+сервиса. Без переиспользования каждая часть платит за рукопожатие.
+
+Запуск: python3 benchmarks/bench_edge_sessions.py [--chunks 200] [-j 4] [--handshake-delay 0.15]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edge_session import EdgeSessionPool, IDLE_TIMEOUT
+from edge_synth import iter_synthesized_chunks
+from fake_edge_server import FakeEdgeServer
+
+
+SAMPLE = (
+    "Вечером над рекой поднялся туман, и дальний берег исчез, будто его и не было. "
+    "Старый паромщик долго смотрел на воду, потом зажёг фонарь и сел на скамью у причала."
+)
+
+
+async def run(chunks, concurrency, handshake_delay, response_delay, reuse, fail_rate):
+    server = FakeEdgeServer(handshake_delay=handshake_delay, response_delay=response_delay,
+                            fail_rate=fail_rate)
+    url = await server.start()
+    # Отрицательный idle_timeout: соединение не переиспользуется - как у Communicate
+    pool = EdgeSessionPool(concurrency, url=url, idle_timeout=IDLE_TIMEOUT if reuse else -1, backoff=0.05)
+
+    start = time.perf_counter()
+    audio = 0
+    async with pool:
+        async for chunk in iter_synthesized_chunks(chunks, 'ru-RU-DmitryNeural', '+0%', concurrency,
+                                                   pool=pool):
+            audio += len(chunk.audio)
+    elapsed = time.perf_counter() - start
+
+    await server.stop()
+    return elapsed, pool.connects, pool.retried, audio
+
+
+async def main_async(args):
+    chunks = [f"{i}. {SAMPLE}" for i in range(args.chunks)]
+    print(f"Частей: {len(chunks)}, параллельно: {args.tts_concurrency}, "
+          f"рукопожатие: {args.handshake_delay * 1000:.0f} мс, ответ: {args.response_delay * 1000:.0f} мс, "
+          f"обрывов: {args.fail_rate:.0%}\n")
+    print(f"{'Вариант':<28}{'Время, с':>10}{'Частей/с':>10}{'Соединений':>12}{'Повторов':>10}")
+
+    for title, reuse in [('Соединение на часть', False), ('Пул соединений', True)]:
+        elapsed, connects, retried, _ = await run(chunks, args.tts_concurrency, args.handshake_delay,
+                                                  args.response_delay, reuse, args.fail_rate)
+        print(f"{title:<28}{elapsed:>10.2f}{len(chunks) / elapsed:>10.1f}{connects:>12}{retried:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк пула соединений Edge TTS')
+    parser.add_argument('--chunks', type=int, default=200,
+                        help='Сколько частей озвучивать (по умолчанию: 200)')
+    parser.add_argument('-j', '--tts-concurrency', type=int, default=4,
+                        help='Параллельных запросов (по умолчанию: 4)')
+    parser.add_argument('--handshake-delay', type=float, default=0.15,
+                        help='Задержка рукопожатия, с (по умолчанию: 0.15)')
+    parser.add_argument('--response-delay', type=float, default=0.05,
+                        help='Задержка ответа на запрос, с (по умолчанию: 0.05)')
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help='Доля запросов с обрывом соединения (по умолчанию: 0)')
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Сквозной бенчмарк без сети: чтение -> add_yo -> TTS -> длительность ->
+create_video -> create_poster на текстах разного размера.
+
+Озвучка идёт через синтетический движок (тишина длиной по тексту), так
+что результат не зависит от сети и воспроизводим. Каждый размер текста
+обрабатывается в отдельном процессе. Этапы замеряет тот же
+profiling.StageProfiler, что и --profile: время, процессорное время,
+пик RSS процесса во время этапа и максимум RSS дочерних процессов (ffmpeg).
+
+Запуск: python3 benchmarks/bench_pipeline.py [--sizes 1k,10k,100k,500k] [--width 640 --height 360]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+STAGES = ['read', 'add_yo', 'tts', 'duration', 'create_video', 'create_poster']
+
+# Слова с "е" вместо "ё" - чтобы add_yo было что делать
+WORDS = (
+    "еще все ее идет поет живет берет дорога река туман берег паромщик "
+    "вода фонарь скамья причал вечер ветер лодка весло звезда ночь утро "
+    "тишина огонь голос шаг дверь окно дом лес поле небо"
+).split()
+
+
+def make_text(size_chars, seed=1):
+    """
+    Псевдослучайный русский текст примерно из size_chars символов
+    """
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < size_chars:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(5, 15))]
+        sentence = ' '.join(words).capitalize() + rng.choice('.!?…') + ' '
+        parts.append(sentence)
+        size += len(sentence)
+        if rng.random() < 0.1:
+            parts.append('\n\n')
+    return ''.join(parts)
+
+
+def worker(size, width, height):
+    """
+    Один размер текста в отдельном процессе; результат - строка JSON
+    """
+    from PIL import Image
+
+    from add_yo import add_yo
+    from audio_probe import probe_duration
+    from profiling import StageProfiler
+    from synthetic_tts import SyntheticEngine
+    from text_to_video import load_story, generate_audio, create_video, create_poster
+
+    profiler = StageProfiler()
+
+    def stage(name, func):
+        with profiler.stage(name):
+            return func()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        text_path = os.path.join(work_dir, 'story.txt')
+        image_path = os.path.join(work_dir, 'background.png')
+        audio_path = os.path.join(work_dir, 'story.mp3')
+        video_path = os.path.join(work_dir, 'story.mp4')
+        poster_path = os.path.join(work_dir, 'story.png')
+
+        with open(text_path, 'w', encoding='utf-8') as f:
+            f.write("Паромщик\n" + make_text(size))
+        Image.new('RGB', (width, height), (70, 90, 120)).save(image_path)
+
+        # Вывод этапов не нужен - только результат
+        with open(os.devnull, 'w') as devnull:
+            stdout = sys.stdout
+            sys.stdout = devnull
+            try:
+                title, text = stage('read', lambda: load_story(text_path))
+                text = stage('add_yo', lambda: add_yo(text))
+                stage('tts', lambda: asyncio.run(
+                    generate_audio(text, audio_path, concurrency=4, pool=SyntheticEngine())
+                ))
+                duration = stage('duration', lambda: probe_duration(audio_path))
+                stage('create_video', lambda: create_video(
+                    audio_path, video_path, width, height, (20, 20, 30), image_path,
+                    'still', 1, duration
+                ))
+                stage('create_poster', lambda: create_poster(image_path, title, poster_path, width, height))
+            finally:
+                sys.stdout = stdout
+
+    results = {s['name']: s for s in profiler.report()['stages']}
+    print(json.dumps({'chars': len(text), 'audio_seconds': duration, 'stages': results}))
+
+
+def parse_size(value):
+    value = value.strip().lower()
+    if value.endswith('k'):
+        return int(float(value[:-1]) * 1000)
+    return int(value)
+
+
+def measure(size, width, height):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', str(size), str(width), str(height)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else 'ошибка')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        worker(int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4]))
+        return
+
+    parser = argparse.ArgumentParser(description='Сквозной бенчмарк без сети')
+    parser.add_argument('--sizes', default='1k,10k,100k,500k',
+                        help='Размеры текста в символах через запятую (по умолчанию: 1k,10k,100k,500k)')
+    parser.add_argument('--width', type=int, default=640,
+                        help='Ширина видео (по умолчанию: 640)')
+    parser.add_argument('--height', type=int, default=360,
+                        help='Высота видео (по умолчанию: 360)')
+    parser.add_argument('--json', default=None,
+                        help='Сохранить результаты в JSON файл (для сравнения между версиями)')
+    args = parser.parse_args()
+
+    sizes = [parse_size(s) for s in args.sizes.split(',')]
+    print(f"Видео {args.width}x{args.height}, движок: synthetic\n")
+
+    all_results = []
+    for size in sizes:
+        try:
+            result = measure(size, args.width, args.height)
+        except RuntimeError as e:
+            print(f"{size} символов: ошибка: {e}\n")
+            continue
+        all_results.append(result)
+
+        total = sum(s['wall_s'] for s in result['stages'].values())
+        print(f"Текст {result['chars']} символов, аудио {result['audio_seconds'] / 60:.1f} мин, "
+              f"всего {total:.2f} с")
+        print(f"  {'Этап':<16}{'Время, с':>10}{'CPU, с':>10}{'Пик RSS, МБ':>14}{'ffmpeg, МБ':>12}")
+        for name in STAGES:
+            stage = result['stages'][name]
+            print(f"  {name:<16}{stage['wall_s']:>10.3f}{stage['cpu_s']:>10.3f}"
+                  f"{stage['peak_rss_mb']:>14.0f}{stage['children_max_rss_mb']:>12.0f}")
+        print()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(all_results, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
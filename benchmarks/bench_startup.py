@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Холодный старт text_to_video.py: время импорта и `--help` в новом процессе.
+
+Скрипт запускается тысячи раз подряд (batch, generate_video.sh), и каждый
+раз платит за импорт. Бенчмарк проверяет две вещи и завершается с кодом 1,
+если хоть одна нарушена:
+  - медиана времени импорта (за вычетом пустого запуска интерпретатора)
+    не больше бюджета --budget-ms;
+  - тяжёлые зависимости (moviepy, edge_tts, aiohttp, numpy) не загружаются
+    при импорте - их подгружают только этапы, которым они нужны.
+
+При превышении печатаются самые долгие импорты по -X importtime.
+
+Запуск: python3 benchmarks/bench_startup.py [--runs 7] [--budget-ms 400]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULE = 'text_to_video'
+HEAVY_MODULES = ['moviepy', 'edge_tts', 'aiohttp', 'numpy', 'PIL.Image']
+
+
+def run_python(args):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], cwd=ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return elapsed, result
+
+
+def median_ms(args, runs):
+    return statistics.median(run_python(args)[0] for _ in range(runs)) * 1000
+
+
+def loaded_heavy_modules():
+    code = (f"import json, sys, {MODULE}; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    _, result = run_python(['-c', code])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(limit=10):
+    """
+    Самые долгие импорты (суммарно с вложенными) по -X importtime
+    """
+    _, result = run_python(['-X', 'importtime', '-c', f"import {MODULE}"])
+    rows = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        rows.append((int(cumulative), name.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Холодный старт text_to_video.py')
+    parser.add_argument('--runs', type=int, default=7,
+                        help='Запусков на замер, берётся медиана (по умолчанию: 7)')
+    parser.add_argument('--budget-ms', type=float, default=400,
+                        help='Бюджет времени импорта сверх пустого интерпретатора, мс (по умолчанию: 400)')
+    args = parser.parse_args()
+
+    # Первый запуск прогревает кэш файловой системы и .pyc
+    run_python(['-c', f"import {MODULE}"])
+
+    baseline = median_ms(['-c', 'pass'], args.runs)
+    import_ms = median_ms(['-c', f"import {MODULE}"], args.runs) - baseline
+    help_ms = median_ms([f"{MODULE}.py", '--help'], args.runs) - baseline
+    heavy = loaded_heavy_modules()
+
+    print(f"Пустой интерпретатор:      {baseline:7.0f} мс")
+    print(f"import {MODULE}:     {import_ms:7.0f} мс (бюджет {args.budget_ms:.0f} мс)")
+    print(f"{MODULE}.py --help:  {help_ms:7.0f} мс")
+    print(f"Тяжёлые модули при импорте: {', '.join(heavy) if heavy else 'нет'}")
+
+    failed = False
+    if import_ms > args.budget_ms:
+        print(f"\nОшибка: импорт дольше бюджета на {import_ms - args.budget_ms:.0f} мс")
+        failed = True
+    if heavy:
+        print(f"\nОшибка: при импорте загружаются {', '.join(heavy)} - "
+              f"перенесите импорт в этап, которому он нужен")
+        failed = True
+
+    if failed:
+        print("\nСамые долгие импорты (мс, вместе с вложенными):")
+        for cumulative, name in slowest_imports():
+            print(f"  {cumulative / 1000:8.1f}  {name}")
+        sys.exit(1)
+
+    print("\n✓ Холодный старт в бюджете")
+
+
+if __name__ == "__main__":
+    main()
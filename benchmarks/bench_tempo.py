@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Смена темпа длинного трека: pydub speedup (склейка кусков с перекрёстным
+затуханием в Python) против audio_post (ffmpeg atempo, с loudnorm и без).
+
+Каждый вариант запускается в отдельном процессе, чтобы честно измерить
+пиковое потребление памяти (ru_maxrss). Результат везде - MP3 192k.
+
+Запуск: python3 benchmarks/bench_tempo.py [--minutes 60] [--speed 1.2]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ffmpeg_tools import run_ffmpeg, get_ffmpeg_binary
+
+
+def make_track(work_dir, minutes):
+    """
+    Создаёт WAV (24 кГц, моно) длиной minutes. WAV pydub читает без
+    ffprobe, так что замер pydub не упирается в его наличие.
+    """
+    track = os.path.join(work_dir, 'track.wav')
+    run_ffmpeg(['-f', 'lavfi', '-i', f'sine=f=220:d={minutes * 60:g}',
+                '-ar', '24000', '-ac', '1', track])
+    return track
+
+
+def worker(mode, work_dir, speed):
+    """
+    Один замер в отдельном процессе: печатает время и пиковую память
+    """
+    track = os.path.join(work_dir, 'track.wav')
+    output = os.path.join(work_dir, f'out_{mode}.mp3')
+
+    start = time.perf_counter()
+    if mode == 'pydub':
+        from pydub import AudioSegment
+        AudioSegment.converter = get_ffmpeg_binary()
+        audio = AudioSegment.from_wav(track)
+        audio.speedup(playback_speed=speed).export(output, format='mp3', bitrate='192k')
+    else:
+        from audio_post import DEFAULT_LOUDNESS, postprocess_audio
+        loudness = DEFAULT_LOUDNESS if mode == 'atempo-loudnorm' else None
+        postprocess_audio(track, output, speed=speed, loudness=loudness)
+    elapsed = time.perf_counter() - start
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{elapsed:.3f} {peak_kb}")
+
+
+def measure(mode, work_dir, speed):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', mode, work_dir, str(speed)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        reason = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'ошибка'
+        return None, reason
+    elapsed, peak_kb = result.stdout.split()
+    return (float(elapsed), int(peak_kb) / 1024), None
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        worker(sys.argv[2], sys.argv[3], float(sys.argv[4]))
+        return
+
+    parser = argparse.ArgumentParser(description='Бенчмарк смены темпа аудио')
+    parser.add_argument('--minutes', type=float, default=60,
+                        help='Длина трека в минутах (по умолчанию: 60)')
+    parser.add_argument('--speed', type=float, default=1.2,
+                        help='Скорость воспроизведения (по умолчанию: 1.2)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        make_track(work_dir, args.minutes)
+        print(f"Трек {args.minutes:g} мин, скорость {args.speed:g}\n")
+        print(f"{'Вариант':<34}{'Время, с':>10}{'Пик RSS, МБ':>14}")
+
+        for mode, title in [
+            ('pydub', 'pydub speedup'),
+            ('atempo', 'audio_post, atempo'),
+            ('atempo-loudnorm', 'audio_post, atempo + loudnorm'),
+        ]:
+            result, error = measure(mode, work_dir, args.speed)
+            if result is None:
+                print(f"{title:<34}  пропущено: {error}")
+            else:
+                print(f"{title:<34}{result[0]:>10.2f}{result[1]:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Сборка длинной книги по главам с пересборкой только изменённых глав.
+
+Текст делится на главы по строкам-заголовкам (регулярные выражения,
+по умолчанию - "Глава 1", "Часть вторая", "Chapter 3", "# Название",
+римская цифра заглавными отдельной строкой). Каждая глава озвучивается
+и кодируется отдельно в output/.chapters/<id>/, файл главы называется
+по хэшу её текста и параметров сборки. При повторной сборке главы с тем же хэшем берутся
+готовыми - в том числе если они переставлены или перед ними вставлена
+новая глава, - а заново собираются только изменённые.
+
+Готовые главы склеиваются копированием потоков (concat, без
+перекодирования) в один MP4 или M4B с метками глав:
+
+    chapters = split_chapters(text, compile_patterns(DEFAULT_CHAPTER_PATTERNS))
+    store = ChapterStore.for_output('output/book.mp4')
+    ...
+    concat_chapters(paths, 'output/book.mp4', 'Книга', titles, durations)
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import NamedTuple
+
+from audio_cache import normalize_text
+from ffmpeg_tools import run_ffmpeg
+from job_manifest import job_id
+
+
+DEFAULT_CHAPTERS_DIR = Path('output') / '.chapters'
+STORE_NAME = 'chapters.json'
+
+# Порядковые числительные для "Глава первая", "Часть двадцать третья" -
+# явным списком: любое слово на -ая/-ья ("Часть старая, часть новая.")
+# заголовком не считается
+_ORDINAL_UNITS = ('первая', 'вторая', 'третья', 'четв[её]ртая', 'пятая',
+                  'шестая', 'седьмая', 'восьмая', 'девятая')
+_ORDINAL_TEENS = ('десятая', 'одиннадцатая', 'двенадцатая', 'тринадцатая',
+                  'четырнадцатая', 'пятнадцатая', 'шестнадцатая', 'семнадцатая',
+                  'восемнадцатая', 'девятнадцатая')
+_ORDINAL_TENS = ('двадцатая', 'тридцатая', 'сороковая', 'пятидесятая',
+                 'шестидесятая', 'семидесятая', 'восьмидесятая', 'девяностая', 'сотая')
+_CARDINAL_TENS = ('двадцать', 'тридцать', 'сорок', 'пятьдесят', 'шестьдесят',
+                  'семьдесят', 'восемьдесят', 'девяносто')
+RU_ORDINAL = (
+    f"(({'|'.join(_CARDINAL_TENS)})\\s+)?({'|'.join(_ORDINAL_UNITS)})"
+    f"|{'|'.join(_ORDINAL_TEENS)}|{'|'.join(_ORDINAL_TENS)}"
+)
+
+# Римское число от I до CCCXCIX, только заглавными (регистр учитывается и
+# при IGNORECASE): "Mix", "Civil", "Liv", "DC" заголовками не считаются
+ROMAN = r'(?-i:(?=[IVXLC])C{0,3}(XC|XL|L?X{0,3})(IX|IV|V?I{0,3}))'
+
+# Заголовок - целая строка, совпадающая с одним из выражений (без учёта
+# регистра, кроме римских цифр)
+DEFAULT_CHAPTER_PATTERNS = [
+    # Глава 1, Часть II, Глава первая. Название, Часть двадцать третья
+    rf'(глава|часть)\s+(\d+|{ROMAN}|{RU_ORDINAL})\b.*',
+    rf'(chapter|part)\s+(\d+|{ROMAN})\b.*',
+    # Заголовок Markdown
+    r'#{1,3}\s+\S.*',
+    # Римская цифра отдельной строкой: IV или IV.
+    rf'{ROMAN}\.?',
+]
+
+# Более длинная строка - это абзац, даже если начинается как заголовок
+MAX_HEADING_CHARS = 80
+
+_SENTENCE_END = re.compile(r'[.!?…:]["»”)]*$')
+
+
+class Chapter(NamedTuple):
+    """
+    Одна глава: заголовок для метки и текст для озвучки (с заголовком)
+    """
+    title: str
+    text: str
+
+
+def compile_patterns(patterns):
+    """
+    Компилирует выражения заголовков. При ошибке выбрасывает ValueError.
+    """
+    compiled = []
+    for pattern in patterns:
+        try:
+            compiled.append(re.compile(pattern, re.IGNORECASE))
+        except re.error as e:
+            raise ValueError(f"неверное выражение заголовка главы '{pattern}': {e}")
+    return compiled
+
+
+def is_heading(line, patterns):
+    line = line.strip()
+    return (0 < len(line) <= MAX_HEADING_CHARS
+            and any(p.fullmatch(line) for p in patterns))
+
+
+def split_chapters(text, patterns, intro_title='Вступление'):
+    """
+    Делит текст на главы. Текст до первого заголовка становится главой
+    intro_title; если заголовков нет, вся книга - одна глава.
+    Заголовок озвучивается в начале главы, с точкой, чтобы после него
+    была пауза.
+    """
+    chapters = []
+    title = intro_title
+    body = []
+
+    def flush():
+        content = '\n'.join(body).strip()
+        # Пустое вступление (книга начинается с заголовка) пропускаем
+        if content:
+            chapters.append(Chapter(title, content))
+
+    for line in text.split('\n'):
+        if is_heading(line, patterns):
+            flush()
+            title = line.strip().lstrip('#').strip()
+            spoken = title if _SENTENCE_END.search(title) else f"{title}."
+            body = [spoken]
+        else:
+            body.append(line)
+
+    flush()
+    return chapters
+
+
+def chapter_key(chapter, settings):
+    """
+    Хэш главы: нормализованный текст, заголовок и параметры сборки.
+    settings - всё, что влияет на результат (голос, скорость, размер...).
+    """
+    payload = json.dumps(
+        [normalize_text(chapter.text), chapter.title, settings],
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ChapterStore:
+    """
+    Готовые главы одной книги.
+
+        store = ChapterStore.for_output('output/book.mp4')
+        entry = store.get(key)                 # запись или None
+        path = store.path_for(key, 'mp4')      # куда собирать главу
+        store.add(key, path, title, duration, cues)
+        store.prune(keys)                      # удалить главы, которых больше нет
+
+    Запись: {"path", "title", "duration", "cues": [[начало, конец, текст]]}.
+    """
+
+    def __init__(self, build_dir):
+        self.build_dir = Path(build_dir)
+        self.path = self.build_dir / STORE_NAME
+        self.entries = {}
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            # Новая книга или журнал повреждён - главы соберутся заново
+            self.entries = {}
+
+    @classmethod
+    def for_output(cls, output_path, chapters_dir=DEFAULT_CHAPTERS_DIR):
+        return cls(Path(chapters_dir) / job_id(output_path, 'chapters'))
+
+    def path_for(self, key, ext):
+        return self.build_dir / f"{key[:16]}.{ext}"
+
+    def get(self, key):
+        """
+        Готовая глава или None, если её нет или файл удалён
+        """
+        entry = self.entries.get(key)
+        if entry is None or not (self.build_dir / entry['path']).exists():
+            return None
+        return entry
+
+    def file(self, entry):
+        return self.build_dir / entry['path']
+
+    def add(self, key, path, title, duration, cues=()):
+        self.entries[key] = {
+            'path': Path(path).name,
+            'title': title,
+            'duration': duration,
+            'cues': [list(cue) for cue in cues],
+        }
+        self._save()
+
+    def prune(self, keys):
+        """
+        Удаляет главы, которых нет среди keys. Возвращает их число.
+        """
+        keys = set(keys)
+        stale = [key for key in self.entries if key not in keys]
+        for key in stale:
+            path = self.build_dir / self.entries.pop(key)['path']
+            if path.exists():
+                path.unlink()
+        if stale:
+            self._save()
+        return len(stale)
+
+    def _save(self):
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def _escape_metadata(value):
+    return re.sub(r'([=;#\\\n])', r'\\\1', value)
+
+
+def format_ffmetadata(title, chapters):
+    """
+    Метаданные ffmpeg (FFMETADATA1) с метками глав.
+    chapters - [(заголовок, начало, конец)] в секундах.
+    """
+    lines = [';FFMETADATA1']
+    if title:
+        lines.append(f"title={_escape_metadata(title)}")
+    for chapter_title, start, end in chapters:
+        lines += [
+            '',
+            '[CHAPTER]',
+            'TIMEBASE=1/1000',
+            f"START={round(start * 1000)}",
+            f"END={round(end * 1000)}",
+            f"title={_escape_metadata(chapter_title)}",
+        ]
+    return '\n'.join(lines) + '\n'
+
+
+def chapter_starts(durations):
+    """
+    Начало каждой главы в склеенном файле
+    """
+    starts = []
+    position = 0.0
+    for duration in durations:
+        starts.append(position)
+        position += duration
+    return starts
+
+
+def concat_chapters(paths, output_path, title, chapter_titles, durations, subtitle_file=None):
+    """
+    Склеивает готовые главы копированием потоков и записывает метки глав.
+    Формат результата (MP4 или M4B) - по расширению output_path.
+    subtitle_file (.srt на всю книгу) добавляется дорожкой mov_text.
+    """
+    starts = chapter_starts(durations)
+    marks = [(chapter_title, start, start + duration)
+             for chapter_title, start, duration in zip(chapter_titles, starts, durations)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        list_path = os.path.join(tmp_dir, 'chapters.txt')
+        metadata_path = os.path.join(tmp_dir, 'metadata.txt')
+
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for path in paths:
+                escaped = str(Path(path).resolve()).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        with open(metadata_path, 'w', encoding='utf-8') as f:
+            f.write(format_ffmetadata(title, marks))
+
+        if subtitle_file:
+            subtitle_args = ['-i', subtitle_file, '-map', '2:s', '-c:s', 'mov_text']
+        else:
+            subtitle_args = []
+
+        # M4B - тот же MP4 (ipod), но плееры аудиокниг узнают его по бренду
+        format_args = ['-f', 'ipod', '-brand', 'M4B '] if Path(output_path).suffix.lower() == '.m4b' else []
+        run_ffmpeg([
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-i', metadata_path,
+            *subtitle_args[:2],
+            '-map', '0:v?', '-map', '0:a', '-map_metadata', '1', '-map_chapters', '1',
+            *subtitle_args[2:],
+            '-c:v', 'copy', '-c:a', 'copy',
+            '-movflags', '+faststart',
+            *format_args,
+            output_path
+        ])
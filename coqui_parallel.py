@@ -0,0 +1,90 @@
+"""
+Параллельная озвучка Coqui на CPU в нескольких процессах.
+
+Каждый процесс пула один раз загружает свою копию модели и ограничивает
+torch заданным числом потоков, чтобы процессы не боролись за ядра.
+Части берутся из общей очереди пула, результаты возвращаются в исходном
+порядке. Если процесс не смог загрузить модель (нет TTS, не скачалась
+модель), первая же часть завершается ошибкой с её причиной - пул не
+перезапускает процессы молча.
+"""
+
+import os
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from coqui_worker import COQUI_MODEL
+
+_tts = None
+# Ошибка загрузки модели в этом процессе: отдаётся с первой частью
+_init_error = None
+
+
+def default_threads(workers):
+    """
+    Потоков torch на процесс: ядра делятся поровну между процессами
+    """
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def _init_worker(model_name, threads):
+    """
+    Инициализация процесса пула: потоки torch и загрузка модели
+    """
+    global _tts, _init_error
+
+    # Переменные окружения нужно задать до импорта torch
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[name] = str(threads)
+
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+
+        from TTS.api import TTS
+        _tts = TTS(model_name=model_name)
+    except Exception as e:
+        _init_error = f"{type(e).__name__}: {e}"
+
+
+def _synthesize(job):
+    """
+    Озвучивает одну часть в процессе пула, возвращает WAV байты
+    """
+    if _init_error is not None:
+        raise RuntimeError(f"процесс пула Coqui не загрузил модель ({_init_error})")
+
+    index, text, language = job
+    with tempfile.TemporaryDirectory(prefix='coqui_pool_') as scratch_dir:
+        path = os.path.join(scratch_dir, f"chunk_{index}.wav")
+        _tts.tts_to_file(text=text, file_path=path, language=language)
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+def iter_parallel_synthesis(chunks, language='ru', workers=2, threads=None,
+                            model_name=COQUI_MODEL):
+    """
+    Озвучивает части в пуле из workers процессов и отдаёт WAV байты
+    в порядке частей
+    """
+    threads = threads or default_threads(workers)
+    jobs = [(index, chunk, language) for index, chunk in enumerate(chunks)]
+    if not jobs:
+        return
+
+    # spawn: torch и fork плохо сочетаются. ProcessPoolExecutor, а не
+    # Pool: упавший процесс даёт BrokenProcessPool, а не вечное ожидание
+    pool = ProcessPoolExecutor(
+        max_workers=min(workers, len(jobs)),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(model_name, threads)
+    )
+    try:
+        yield from pool.map(_synthesize, jobs)
+    finally:
+        # При ошибке или досрочной остановке оставшиеся части не озвучиваем
+        pool.shutdown(wait=True, cancel_futures=True)
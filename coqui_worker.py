@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Постоянный локальный сервис Coqui XTTS.
+
+Загрузка модели XTTS занимает намного больше времени, чем озвучка
+короткого рассказа. Сервис загружает модель один раз и принимает запросы
+по HTTP на localhost, поэтому пакет рассказов платит за загрузку один раз
+на машину, а не за каждый файл. text_to_speech.py --engine coqui сам
+использует сервис, если тот запущен.
+
+Запуск:  python3 coqui_worker.py [--host 127.0.0.1] [--port 5002]
+
+API:
+    GET  /health      -> {"status": "ok", "model": ...}
+    POST /synthesize  {"text": ..., "language": "ru"} -> audio/wav
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+COQUI_MODEL = "tts_models/multilingual/multi-dataset/xtts_v2"
+DEFAULT_WORKER_URL = os.environ.get('COQUI_WORKER_URL', 'http://127.0.0.1:5002')
+
+# Таймаут проверки доступности: сервис локальный, долго ждать незачем
+HEALTH_TIMEOUT = 0.5
+SYNTHESIS_TIMEOUT = 600
+
+
+def worker_info(url=DEFAULT_WORKER_URL, timeout=HEALTH_TIMEOUT):
+    """
+    Ответ /health запущенного сервиса или None, если сервис недоступен
+    """
+    try:
+        with urllib.request.urlopen(f"{url.rstrip('/')}/health", timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def synthesize_remote(text, language='ru', url=DEFAULT_WORKER_URL, timeout=SYNTHESIS_TIMEOUT):
+    """
+    Озвучивает текст на сервисе и возвращает WAV байты
+    """
+    payload = json.dumps({'text': text, 'language': language}, ensure_ascii=False).encode('utf-8')
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}/synthesize",
+        data=payload,
+        headers={'Content-Type': 'application/json; charset=utf-8'},
+        method='POST'
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.read()
+    except urllib.error.HTTPError as e:
+        message = e.read().decode('utf-8', errors='replace')
+        raise RuntimeError(f"сервис Coqui вернул ошибку {e.code}: {message}") from e
+
+
+class CoquiWorker:
+    """
+    Загруженная модель XTTS. Модель не потокобезопасна, поэтому запросы
+    выполняются по очереди.
+    """
+
+    def __init__(self, model_name=COQUI_MODEL):
+        from TTS.api import TTS
+
+        print(f"Загружаю модель {model_name}...")
+        self.model_name = model_name
+        self.tts = TTS(model_name=model_name)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def synthesize(self, text, language='ru'):
+        with self.lock, tempfile.TemporaryDirectory(prefix='coqui_worker_') as scratch_dir:
+            path = os.path.join(scratch_dir, 'chunk.wav')
+            self.tts.tts_to_file(text=text, file_path=path, language=language)
+            self.requests += 1
+            with open(path, 'rb') as f:
+                return f.read()
+
+
+def make_handler(worker):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, body, content_type):
+            self.send_response(code)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, code, data):
+            self._send(code, json.dumps(data, ensure_ascii=False).encode('utf-8'),
+                       'application/json; charset=utf-8')
+
+        def do_GET(self):
+            if self.path != '/health':
+                self._send_json(404, {'error': 'not found'})
+                return
+            self._send_json(200, {
+                'status': 'ok',
+                'model': worker.model_name,
+                'requests': worker.requests,
+            })
+
+        def do_POST(self):
+            if self.path != '/synthesize':
+                self._send_json(404, {'error': 'not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length).decode('utf-8'))
+                text = request['text']
+                language = request.get('language', 'ru')
+            except (ValueError, KeyError) as e:
+                self._send_json(400, {'error': f'неверный запрос: {e}'})
+                return
+
+            try:
+                audio = worker.synthesize(text, language)
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+                return
+            self._send(200, audio, 'audio/wav')
+
+        def log_message(self, format, *args):
+            # Без лога на каждый запрос
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Локальный сервис Coqui XTTS с моделью, загруженной один раз'
+    )
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help='Адрес (по умолчанию: 127.0.0.1 - только локальные запросы)'
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=5002,
+        help='Порт (по умолчанию: 5002)'
+    )
+    parser.add_argument(
+        '--model',
+        default=COQUI_MODEL,
+        help=f'Модель Coqui TTS (по умолчанию: {COQUI_MODEL})'
+    )
+    args = parser.parse_args()
+
+    try:
+        worker = CoquiWorker(args.model)
+    except ImportError:
+        print("Ошибка: Coqui TTS не установлен")
+        print("Установите: pip install TTS")
+        sys.exit(1)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(worker))
+    print(f"✓ Сервис Coqui запущен: http://{args.host}:{args.port}")
+    print("  Для остановки нажмите Ctrl+C")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nОстанавливаю сервис...")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+Пул постоянных соединений с Edge TTS.
+
+edge_tts.Communicate на каждый запрос открывает новое websocket
+соединение: DNS, TCP, TLS и рукопожатие websocket повторяются для каждой
+части текста. Сервис принимает несколько запросов подряд по одному
+соединению, поэтому пул держит открытые соединения и отдаёт их частям
+по очереди: speech.config отправляется один раз на соединение, дальше -
+только ssml запросы.
+
+Соединение, простоявшее дольше idle_timeout, не используется повторно -
+сервис сам закрывает простаивающие соединения. При обрыве или ошибке
+соединение выбрасывается, а запрос повторяется на новом, с растущей
+паузой (не больше retries раз).
+
+У каждого пула свой SSL контекст с сертификатами certifi (или первыми
+найденными из CA_PATHS); глобальный модуль ssl и SSL_CERT_FILE не
+трогаются. Адрес сервиса можно подменить переменной
+EDGE_TTS_URL (например, на fake_edge_server.py).
+
+Запросы собираются внутренними функциями edge_tts, а они меняются между
+версиями. Пул проверен на версиях из TESTED_VERSIONS (тот же диапазон
+закреплён в requirements.txt); с другой версией или если чего-то из
+них нет, пул отдаёт каждую часть edge_tts.Communicate - медленнее (новое
+соединение на часть), но с тем же результатом.
+"""
+
+import asyncio
+import json
+import os
+import ssl
+import time
+from xml.sax.saxutils import escape, unescape
+
+import aiohttp
+import certifi
+import edge_tts
+
+from edge_synth import synthesize_chunk
+
+
+# Версии edge-tts, с внутренними функциями которых проверен пул: [от, до)
+TESTED_VERSIONS = ((7, 0), (7, 3))
+
+
+def _version_tuple(version):
+    parts = []
+    for part in version.split('.')[:2]:
+        digits = ''.join(ch for ch in part if ch.isdigit())
+        parts.append(int(digits or 0))
+    return tuple(parts)
+
+
+EDGE_TTS_VERSION = getattr(edge_tts, '__version__', '0')
+
+try:
+    if not TESTED_VERSIONS[0] <= _version_tuple(EDGE_TTS_VERSION) < TESTED_VERSIONS[1]:
+        raise ImportError(f"edge-tts {EDGE_TTS_VERSION} не проверен с пулом соединений")
+    from edge_tts.communicate import (
+        connect_id,
+        date_to_string,
+        get_headers_and_data,
+        mkssml,
+        remove_incompatible_characters,
+        split_text_by_byte_length,
+        ssml_headers_plus_data,
+    )
+    from edge_tts.constants import SEC_MS_GEC_VERSION, WSS_HEADERS, WSS_URL
+    from edge_tts.data_classes import TTSConfig
+    from edge_tts.drm import DRM
+    INTERNALS_AVAILABLE = True
+except (ImportError, AttributeError):
+    INTERNALS_AVAILABLE = False
+    # Адрес не нужен: Communicate соединяется сам
+    WSS_URL = ''
+
+
+DEFAULT_URL = os.environ.get('EDGE_TTS_URL', WSS_URL)
+
+# Сервис закрывает соединение примерно через полминуты простоя
+IDLE_TIMEOUT = 20
+MAX_RETRIES = 3
+BACKOFF = 0.5
+MAX_BACKOFF = 8.0
+
+OUTPUT_FORMAT = 'audio-24khz-48kbitrate-mono-mp3'
+# Edge TTS отдаёт MP3 с постоянным битрейтом 48 кбит/с - по числу байт
+# считается смещение границ слов для запроса из нескольких кусков
+MP3_BYTES_PER_SECOND = 48_000 // 8
+
+# Время в метаданных Edge TTS указано в тиках по 100 нс
+TICKS_PER_SECOND = 10_000_000
+
+
+class EdgeProtocolError(Exception):
+    """
+    Ответ сервиса не по протоколу или соединение оборвалось посреди ответа
+    """
+
+
+# Где искать корневые сертификаты: certifi, загруженные вручную, системные macOS
+CA_PATHS = [
+    certifi.where(),
+    '/tmp/cacert.pem',
+    '/etc/ssl/cert.pem',
+    '/private/etc/ssl/cert.pem',
+]
+
+
+def find_ca_file():
+    """
+    Первый существующий файл сертификатов из CA_PATHS или None
+    (тогда - системные настройки по умолчанию)
+    """
+    return next((path for path in CA_PATHS if os.path.exists(path)), None)
+
+
+def make_ssl_context(verify=True):
+    """
+    SSL контекст для соединений пула. verify=False отключает проверку
+    сертификата только для этих соединений.
+    """
+    context = ssl.create_default_context(cafile=find_ca_file())
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class EdgeSession:
+    """
+    Одно открытое websocket соединение, по которому запросы идут
+    по очереди
+    """
+
+    def __init__(self, websocket, receive_timeout):
+        self.websocket = websocket
+        self.receive_timeout = receive_timeout
+        self.boundary = None
+        self.requests = 0
+        self.last_used = time.monotonic()
+
+    @property
+    def closed(self):
+        return self.websocket.closed
+
+    async def _send_config(self, boundary):
+        word_boundary = boundary == 'WordBoundary'
+        await self.websocket.send_str(
+            f"X-Timestamp:{date_to_string()}\r\n"
+            "Content-Type:application/json; charset=utf-8\r\n"
+            "Path:speech.config\r\n\r\n"
+            '{"context":{"synthesis":{"audio":{"metadataoptions":{'
+            f'"sentenceBoundaryEnabled":"{"false" if word_boundary else "true"}",'
+            f'"wordBoundaryEnabled":"{"true" if word_boundary else "false"}"'
+            '},'
+            f'"outputFormat":"{OUTPUT_FORMAT}"'
+            '}}}}\r\n'
+        )
+        self.boundary = boundary
+
+    async def request(self, escaped_text, config):
+        """
+        Один запрос (turn): возвращает MP3 данные и границы слов
+        [(начало, длительность, слово)] в секундах
+        """
+        if self.boundary != config.boundary:
+            await self._send_config(config.boundary)
+
+        request_id = connect_id()
+        await self.websocket.send_str(
+            ssml_headers_plus_data(request_id, date_to_string(), mkssml(config, escaped_text))
+        )
+
+        audio = []
+        words = []
+        while True:
+            message = await self.websocket.receive(timeout=self.receive_timeout)
+
+            if message.type == aiohttp.WSMsgType.TEXT:
+                data = message.data.encode('utf-8')
+                headers, body = get_headers_and_data(data, data.find(b'\r\n\r\n'))
+                if headers.get(b'X-RequestId', request_id.encode()) != request_id.encode():
+                    # Запоздавшее сообщение чужого запроса
+                    continue
+
+                path = headers.get(b'Path')
+                if path == b'audio.metadata':
+                    for meta in json.loads(body)['Metadata']:
+                        if meta['Type'] in ('WordBoundary', 'SentenceBoundary'):
+                            words.append((
+                                meta['Data']['Offset'] / TICKS_PER_SECOND,
+                                meta['Data']['Duration'] / TICKS_PER_SECOND,
+                                unescape(meta['Data']['text']['Text'])
+                            ))
+                elif path == b'turn.end':
+                    break
+                elif path not in (b'response', b'turn.start'):
+                    raise EdgeProtocolError(f"неизвестное сообщение: {path!r}")
+
+            elif message.type == aiohttp.WSMsgType.BINARY:
+                if len(message.data) < 2:
+                    raise EdgeProtocolError("бинарное сообщение без заголовка")
+                header_length = int.from_bytes(message.data[:2], 'big')
+                # Первые 2 байта - длина заголовков, разбор как в edge_tts
+                headers, body = get_headers_and_data(message.data, header_length)
+                if headers.get(b'Path') != b'audio':
+                    raise EdgeProtocolError("бинарное сообщение не с аудио")
+                if headers.get(b'Content-Type') == b'audio/mpeg' and body:
+                    audio.append(body)
+
+            else:
+                # CLOSE / CLOSED / ERROR - соединение больше не годится
+                raise EdgeProtocolError(f"соединение закрыто сервисом ({message.type.name})")
+
+        if not audio:
+            raise EdgeProtocolError("сервис не вернул аудио")
+
+        self.requests += 1
+        self.last_used = time.monotonic()
+        return b''.join(audio), words
+
+    async def close(self):
+        await self.websocket.close()
+
+
+class EdgeSessionPool:
+    """
+    До size открытых соединений с Edge TTS, которые переиспользуются
+    между частями и между задачами.
+
+        async with EdgeSessionPool(size=4) as pool:
+            audio, words = await pool.synthesize(text, voice, rate)
+    """
+
+    def __init__(self, size=4, url=DEFAULT_URL, verify_ssl=True, idle_timeout=IDLE_TIMEOUT,
+                 retries=MAX_RETRIES, backoff=BACKOFF, connect_timeout=10, receive_timeout=60):
+        self.size = max(1, size)
+        self.url = url
+        self.idle_timeout = idle_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.connect_timeout = connect_timeout
+        self.receive_timeout = receive_timeout
+        self.ssl_context = make_ssl_context(verify_ssl) if url.startswith('wss:') else None
+
+        self.connects = 0
+        self.requests = 0
+        self.retried = 0
+
+        self._http = None
+        self._idle = []
+        self._slots = asyncio.Semaphore(self.size)
+
+        if not INTERNALS_AVAILABLE:
+            print(f"Edge TTS: пул соединений не поддерживает edge-tts {EDGE_TTS_VERSION}, "
+                  f"каждая часть пойдёт отдельным соединением")
+            if not verify_ssl:
+                # Communicate сам задаёт SSL контекст соединения - отключить
+                # проверку сертификата для него нельзя
+                print("Предупреждение: --insecure-ssl не действует без пула соединений, "
+                      "сертификат будет проверяться (поставьте edge-tts из requirements.txt)")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        return False
+
+    def _connect_url(self):
+        separator = '&' if '?' in self.url else '?'
+        return (
+            f"{self.url}{separator}ConnectionId={connect_id()}"
+            f"&Sec-MS-GEC={DRM.generate_sec_ms_gec()}"
+            f"&Sec-MS-GEC-Version={SEC_MS_GEC_VERSION}"
+        )
+
+    async def _connect(self):
+        if self._http is None:
+            self._http = aiohttp.ClientSession(
+                trust_env=True,
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.connect_timeout)
+            )
+        websocket = await self._http.ws_connect(
+            self._connect_url(),
+            compress=15,
+            headers=DRM.headers_with_muid(WSS_HEADERS),
+            ssl=self.ssl_context
+        )
+        self.connects += 1
+        return EdgeSession(websocket, self.receive_timeout)
+
+    async def _acquire(self):
+        """
+        Свободное соединение из пула или новое. Вызывается внутри слота.
+        """
+        now = time.monotonic()
+        while self._idle:
+            session = self._idle.pop()
+            if not session.closed and now - session.last_used < self.idle_timeout:
+                return session
+            await session.close()
+        return await self._connect()
+
+    async def _release(self, session, reusable):
+        if reusable and not session.closed:
+            self._idle.append(session)
+        else:
+            await session.close()
+
+    async def _request(self, escaped_text, config):
+        """
+        Один запрос с повторами: сбойное соединение выбрасывается,
+        запрос уходит по новому
+        """
+        attempt = 0
+        while True:
+            async with self._slots:
+                session = None
+                try:
+                    session = await self._acquire()
+                    reused = session.requests > 0
+                    result = await session.request(escaped_text, config)
+                    await self._release(session, True)
+                    self.requests += 1
+                    return result
+                except (aiohttp.ClientError, asyncio.TimeoutError, EdgeProtocolError, ConnectionError) as e:
+                    if session is not None:
+                        await self._release(session, False)
+                    if isinstance(e, aiohttp.WSServerHandshakeError) and e.status == 403:
+                        # Часы расходятся с сервисом - токен Sec-MS-GEC устарел
+                        DRM.handle_client_response_error(e)
+                    if attempt >= self.retries:
+                        raise
+                    reason = str(e) or type(e).__name__
+
+            attempt += 1
+            self.retried += 1
+            # Соединение, которое сервис закрыл во время простоя, - не повод ждать
+            if session is None or not reused:
+                delay = min(self.backoff * 2 ** (attempt - 1), MAX_BACKOFF)
+                print(f"Edge TTS: {reason}, повтор {attempt}/{self.retries} через {delay:.1f} с")
+                await asyncio.sleep(delay)
+
+    async def synthesize(self, text, voice, rate='+0%', boundary='WordBoundary'):
+        """
+        Озвучивает текст: возвращает MP3 данные и границы слов
+        [(начало, длительность, слово)] в секундах от начала текста
+        """
+        if not INTERNALS_AVAILABLE:
+            return await self._synthesize_communicate(text, voice, rate)
+
+        config = TTSConfig(voice, rate, '+0%', '+0Hz', boundary)
+        parts = split_text_by_byte_length(escape(remove_incompatible_characters(text)), 4096)
+
+        audio = []
+        words = []
+        offset = 0.0
+        for part in parts:
+            data, part_words = await self._request(part, config)
+            audio.append(data)
+            words.extend((start + offset, duration, word) for start, duration, word in part_words)
+            offset += len(data) / MP3_BYTES_PER_SECOND
+
+        return b''.join(audio), words
+
+    async def _synthesize_communicate(self, text, voice, rate):
+        """
+        Запасной путь без внутренних функций edge_tts: одна часть -
+        один edge_tts.Communicate (до size одновременно)
+        """
+        async with self._slots:
+            chunk = await synthesize_chunk(text, voice, rate)
+        self.connects += 1
+        self.requests += 1
+        return chunk.audio, chunk.words
+
+    def format_stats(self):
+        return (f"Соединений с Edge TTS: {self.connects}, запросов: {self.requests}, "
+                f"повторов: {self.retried}")
+
+    async def close(self):
+        while self._idle:
+            await self._idle.pop().close()
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
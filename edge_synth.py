@@ -0,0 +1,154 @@
+"""
+Параллельный синтез речи через Edge TTS по частям
+"""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import NamedTuple
+
+from audio_probe import mp3_duration_bytes
+
+
+# Время в метаданных Edge TTS указано в тиках по 100 нс
+TICKS_PER_SECOND = 10_000_000
+
+# Edge TTS отдаёт MP3 24 кГц моно
+SAMPLE_RATE = 24000
+
+
+class SynthesizedChunk(NamedTuple):
+    """
+    Озвученная часть текста: исходный текст, MP3 данные и границы слов
+    [(начало, длительность, слово)] в секундах от начала части
+    """
+    text: str
+    audio: bytes
+    words: list
+
+
+def speed_to_rate(speed):
+    """
+    Преобразует скорость (1.0 = нормально) в процент для Edge TTS.
+    0.8 = -20%, 1.0 = +0%, 1.3 = +30%
+    """
+    speed_change = int((speed - 1.0) * 100)
+    if speed_change >= 0:
+        return f"+{speed_change}%"
+    return f"{speed_change}%"
+
+
+def word_boundary(chunk):
+    """
+    Переводит событие WordBoundary из Edge TTS в (начало, длительность, слово)
+    """
+    return (
+        chunk["offset"] / TICKS_PER_SECOND,
+        chunk["duration"] / TICKS_PER_SECOND,
+        chunk["text"]
+    )
+
+
+async def synthesize_chunk(text, voice, rate, pool=None):
+    """
+    Синтезирует одну часть текста. Вместе с MP3 данными собирает
+    события WordBoundary - по ним строятся субтитры.
+    С pool (EdgeSessionPool) запрос идёт по уже открытому соединению.
+    """
+    if pool is not None:
+        audio, words = await pool.synthesize(text, voice, rate)
+        return SynthesizedChunk(text, audio, words)
+
+    import edge_tts
+
+    communicate = edge_tts.Communicate(text, voice, rate=rate, boundary='WordBoundary')
+
+    audio_parts = []
+    words = []
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            audio_parts.append(chunk["data"])
+        elif chunk["type"] == "WordBoundary":
+            words.append(word_boundary(chunk))
+
+    return SynthesizedChunk(text, b''.join(audio_parts), words)
+
+
+async def iter_synthesized_chunks(chunks, voice, rate, concurrency=4, cache=None, manifest=None,
+                                  pool=None):
+    """
+    Синтезирует части текста параллельно (не больше concurrency запросов
+    одновременно) и отдаёт SynthesizedChunk строго в исходном порядке.
+    Если передан cache (AudioCache), уже озвученные части берутся из него.
+    Если передан manifest (ChunkManifest), каждая готовая часть сразу
+    записывается в журнал задачи, а записанные ранее берутся из него.
+    pool (EdgeSessionPool) - общие соединения с сервисом.
+
+    Готовые, но ещё не отданные части держатся в памяти, их не больше
+    2 * concurrency - так длинная книга не копится в памяти целиком.
+    """
+    concurrency = max(1, concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    window = concurrency * 2
+
+    async def synthesize(text):
+        if cache is not None:
+            data = cache.get(text, 'edge', voice, rate)
+            words = cache.get_meta(text, 'edge', voice, rate) if data is not None else None
+            if words is not None:
+                return SynthesizedChunk(text, data, [tuple(w) for w in words])
+
+        async with semaphore:
+            chunk = await synthesize_chunk(text, voice, rate, pool)
+
+        if cache is not None:
+            cache.put(text, 'edge', voice, rate, chunk.audio)
+            cache.put_meta(text, 'edge', voice, rate, chunk.words)
+        return chunk
+
+    async def run(index, text):
+        if manifest is not None:
+            done = manifest.get(index, text)
+            if done is not None:
+                data, entry = done
+                return SynthesizedChunk(text, data, [tuple(w) for w in entry['words']])
+
+        chunk = await synthesize(text)
+        if manifest is not None:
+            manifest.add(index, text, chunk.audio, mp3_duration_bytes(chunk.audio), chunk.words)
+        return chunk
+
+    pending = deque()
+    chunk_iter = enumerate(chunks)
+
+    try:
+        for index, text in chunk_iter:
+            pending.append(asyncio.ensure_future(run(index, text)))
+            if len(pending) >= window:
+                yield await pending.popleft()
+
+        while pending:
+            yield await pending.popleft()
+    finally:
+        # При ошибке или досрочной остановке не оставляем висящих запросов
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+@asynccontextmanager
+async def session_pool(pool=None, size=4, verify_ssl=True):
+    """
+    Переданный пул (общий для нескольких задач, или SyntheticEngine) или
+    новый EdgeSessionPool на время блока. edge_session (aiohttp, edge_tts)
+    импортируется только для своего пула.
+    """
+    if pool is not None:
+        yield pool
+        return
+
+    from edge_session import EdgeSessionPool
+
+    async with EdgeSessionPool(size, verify_ssl=verify_ssl) as own_pool:
+        yield own_pool
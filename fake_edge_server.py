@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Локальная замена сервиса Edge TTS для проверок без сети.
+
+Говорит на том же websocket протоколе, что и speech.platform.bing.com:
+принимает speech.config и ssml, отвечает turn.start, response,
+audio.metadata (границы слов), бинарными сообщениями с MP3 и turn.end.
+По одному соединению можно отправлять сколько угодно запросов подряд.
+Вместо речи - тишина в том же формате (24 кГц, моно, 48 кбит/с CBR),
+длина пропорциональна тексту.
+
+Задержки рукопожатия и ответа, обрывы соединения и ограничение числа
+запросов на соединение настраиваются - так можно проверить повторное
+использование соединений, повторы и пропускную способность.
+
+Запуск:  python3 fake_edge_server.py [--port 5003] [--handshake-delay 0.2]
+Затем:   EDGE_TTS_URL=ws://127.0.0.1:5003/edge/v1 python3 text_to_speech.py story.txt
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from xml.sax.saxutils import unescape
+
+from aiohttp import web, WSMsgType
+
+from synthetic_tts import CHARS_PER_SECOND, silent_mp3, synthetic_words
+
+
+TICKS_PER_SECOND = 10_000_000
+
+DEFAULT_PATH = '/edge/v1'
+
+
+def _parse_message(text):
+    """
+    Заголовки и тело текстового сообщения протокола
+    """
+    head, _, body = text.partition('\r\n\r\n')
+    headers = {}
+    for line in head.split('\r\n'):
+        key, _, value = line.partition(':')
+        headers[key] = value
+    return headers, body
+
+
+def _text_message(request_id, path, body, content_type='application/json; charset=utf-8'):
+    return (
+        f"X-RequestId:{request_id}\r\n"
+        f"Content-Type:{content_type}\r\n"
+        f"Path:{path}\r\n\r\n"
+        f"{body}"
+    )
+
+
+def _audio_message(request_id, data, content_type='audio/mpeg'):
+    headers = f"X-RequestId:{request_id}\r\n"
+    if content_type:
+        headers += f"Content-Type:{content_type}\r\n"
+    # Длина заголовков включает завершающий \r\n - как у сервиса
+    header_bytes = (headers + "Path:audio\r\n").encode('utf-8')
+    return len(header_bytes).to_bytes(2, 'big') + header_bytes + data
+
+
+def ssml_text(ssml):
+    """
+    Текст из SSML запроса
+    """
+    return unescape(re.sub(r'<[^>]+>', '', ssml))
+
+
+class FakeEdgeServer:
+    """
+    Сервер с настраиваемым поведением и счётчиками.
+
+        server = FakeEdgeServer(handshake_delay=0.2)
+        url = await server.start()
+        ...
+        await server.stop()
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, handshake_delay=0.0, response_delay=0.0,
+                 fail_rate=0.0, max_requests=None, idle_timeout=None, chars_per_second=CHARS_PER_SECOND):
+        self.host = host
+        self.port = port
+        self.handshake_delay = handshake_delay
+        self.response_delay = response_delay
+        self.fail_rate = fail_rate
+        self.max_requests = max_requests
+        self.idle_timeout = idle_timeout
+        self.chars_per_second = chars_per_second
+
+        self.connections = 0
+        self.requests = 0
+        self.failures = 0
+        self._runner = None
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get(DEFAULT_PATH, self.handle)
+        return app
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self.url
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}{DEFAULT_PATH}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def handle(self, request):
+        # Имитация DNS + TCP + TLS рукопожатия настоящего сервиса
+        if self.handshake_delay:
+            await asyncio.sleep(self.handshake_delay)
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+
+        word_boundary = True
+        served = 0
+        while True:
+            try:
+                message = await ws.receive(timeout=self.idle_timeout)
+            except asyncio.TimeoutError:
+                # Простаивающее соединение сервис закрывает сам
+                break
+            if message.type != WSMsgType.TEXT:
+                break
+
+            headers, body = _parse_message(message.data)
+            path = headers.get('Path')
+            if path == 'speech.config':
+                options = json.loads(body)['context']['synthesis']['audio']['metadataoptions']
+                word_boundary = options.get('wordBoundaryEnabled') == 'true'
+                continue
+            if path != 'ssml':
+                continue
+
+            self.requests += 1
+            served += 1
+            request_id = headers.get('X-RequestId', uuid.uuid4().hex)
+
+            if self.fail_rate and random.random() < self.fail_rate:
+                # Обрыв посреди ответа
+                self.failures += 1
+                await ws.send_str(_text_message(request_id, 'turn.start', '{}'))
+                await ws.close()
+                break
+
+            await self._respond(ws, request_id, ssml_text(body), word_boundary)
+
+            if self.max_requests and served >= self.max_requests:
+                break
+
+        await ws.close()
+        return ws
+
+    async def _respond(self, ws, request_id, text, word_boundary):
+        if self.response_delay:
+            await asyncio.sleep(self.response_delay)
+
+        await ws.send_str(_text_message(request_id, 'turn.start', '{"context":{"serviceTag":"fake"}}'))
+        await ws.send_str(_text_message(request_id, 'response', '{"context":{"serviceTag":"fake"}}'))
+
+        # Слова равномерно по времени, пропорционально длине
+        words, duration = synthetic_words(text, self.chars_per_second)
+        metadata = [{
+            'Type': 'WordBoundary' if word_boundary else 'SentenceBoundary',
+            'Data': {
+                'Offset': int(start * TICKS_PER_SECOND),
+                'Duration': int(length * TICKS_PER_SECOND),
+                'text': {'Text': word, 'Length': len(word), 'BoundaryType': 'WordBoundary'},
+            },
+        } for start, length, word in words]
+
+        audio = silent_mp3(duration)
+        # Аудио идёт кусками, метаданные - вперемешку с ним, как у сервиса
+        step = 4096
+        for start in range(0, len(audio), step):
+            await ws.send_bytes(_audio_message(request_id, audio[start:start + step]))
+            if metadata:
+                await ws.send_str(_text_message(request_id, 'audio.metadata',
+                                                json.dumps({'Metadata': [metadata.pop(0)]})))
+        for item in metadata:
+            await ws.send_str(_text_message(request_id, 'audio.metadata', json.dumps({'Metadata': [item]})))
+
+        await ws.send_bytes(_audio_message(request_id, b'', content_type=None))
+        await ws.send_str(_text_message(request_id, 'turn.end', '{}'))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Локальная замена Edge TTS для проверок без сети'
+    )
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Адрес (по умолчанию: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=5003,
+                        help='Порт (по умолчанию: 5003)')
+    parser.add_argument('--handshake-delay', type=float, default=0.2,
+                        help='Задержка установки соединения, с (по умолчанию: 0.2 - как TLS к сервису)')
+    parser.add_argument('--response-delay', type=float, default=0.0,
+                        help='Задержка перед ответом на запрос, с (по умолчанию: 0)')
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help='Доля запросов, на которых соединение обрывается (по умолчанию: 0)')
+    parser.add_argument('--max-requests', type=int, default=None,
+                        help='Закрывать соединение после стольких запросов (по умолчанию: без ограничения)')
+    parser.add_argument('--idle-timeout', type=float, default=None,
+                        help='Закрывать соединение после стольких секунд простоя')
+    args = parser.parse_args()
+
+    server = FakeEdgeServer(args.host, args.port, args.handshake_delay, args.response_delay,
+                            args.fail_rate, args.max_requests, args.idle_timeout)
+
+    async def serve():
+        await server.start()
+        print(f"✓ Замена Edge TTS запущена: {server.url}")
+        print(f"  EDGE_TTS_URL={server.url}")
+        print("  Для остановки нажмите Ctrl+C")
+        started = time.monotonic()
+        try:
+            while True:
+                await asyncio.sleep(3600)
+        finally:
+            print(f"\nСоединений: {server.connections}, запросов: {server.requests}, "
+                  f"обрывов: {server.failures}, работал {time.monotonic() - started:.0f} с")
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Вызов ffmpeg напрямую, без покадровой обработки в Python
+"""
+
+import os
+import shutil
+import subprocess
+
+
+def get_ffmpeg_binary():
+    """
+    Возвращает путь к ffmpeg - тот же, что использует moviepy
+    """
+    binary = os.environ.get('FFMPEG_BINARY')
+    if binary and binary not in ('ffmpeg-imageio', 'auto-detect'):
+        return binary
+
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        pass
+
+    return shutil.which('ffmpeg') or 'ffmpeg'
+
+
+def run_ffmpeg(args):
+    """
+    Запускает ffmpeg с аргументами args.
+    При ошибке выбрасывает RuntimeError с хвостом вывода ffmpeg.
+    """
+    cmd = [get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y'] + [str(a) for a in args]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    if result.returncode != 0:
+        message = result.stderr.decode('utf-8', errors='replace').strip()
+        raise RuntimeError(f"ffmpeg завершился с ошибкой: {message[-2000:]}")
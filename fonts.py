@@ -0,0 +1,115 @@
+"""
+Поиск шрифтов с засечками для субтитров и постера.
+
+Список кандидатов проверяется один раз за процесс: сначала шрифты macOS,
+затем типичные пути Linux и Windows. Если ни одного нет, шрифт с засечками
+и кириллицей ищется через fontconfig (fc-match) - так находятся шрифты
+любого дистрибутива Linux. Загруженные шрифты PIL кэшируются по размеру.
+
+Перенос по словам (wrap_words) измеряет каждое слово один раз и набирает
+ширину строки сложением, без измерения всей растущей строки.
+"""
+
+import os
+import shutil
+import subprocess
+from functools import lru_cache
+
+
+SERIF_FONTS = [
+    # macOS
+    '/System/Library/Fonts/Supplemental/Palatino.ttc',
+    '/System/Library/Fonts/Supplemental/Times New Roman.ttf',
+    '/System/Library/Fonts/Supplemental/Georgia.ttf',
+    # Linux
+    '/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf',
+    '/usr/share/fonts/truetype/liberation/LiberationSerif-Regular.ttf',
+    '/usr/share/fonts/truetype/liberation2/LiberationSerif-Regular.ttf',
+    '/usr/share/fonts/truetype/noto/NotoSerif-Regular.ttf',
+    '/usr/share/fonts/dejavu/DejaVuSerif.ttf',
+    '/usr/share/fonts/liberation/LiberationSerif-Regular.ttf',
+    # Windows
+    'C:\\Windows\\Fonts\\times.ttf',
+    'C:\\Windows\\Fonts\\georgia.ttf',
+]
+
+
+@lru_cache(maxsize=None)
+def find_font_path(candidates=tuple(SERIF_FONTS)):
+    """
+    Первый существующий шрифт из списка, иначе найденный fontconfig, или None
+    """
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return _fontconfig_serif()
+
+
+def _fontconfig_serif():
+    """
+    Шрифт с засечками и кириллицей по fontconfig или None
+    """
+    if shutil.which('fc-match') is None:
+        return None
+    try:
+        result = subprocess.run(['fc-match', '--format=%{file}', 'serif:lang=ru'],
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    path = result.stdout.strip()
+    return path if result.returncode == 0 and path and os.path.exists(path) else None
+
+
+@lru_cache(maxsize=None)
+def load_font(size):
+    """
+    Шрифт PIL нужного размера (с засечками, если найден)
+    """
+    from PIL import ImageFont
+
+    path = find_font_path()
+    if path is not None:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            pass
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        # Pillow < 10.1 не умеет масштабировать встроенный шрифт
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=4096)
+def word_width(font_size, word):
+    """
+    Ширина слова в пикселях (с кэшем: слова повторяются между
+    заголовками, репликами и размерами постера)
+    """
+    return load_font(font_size).getlength(word)
+
+
+def wrap_words(words, font_size, max_width):
+    """
+    Переносит слова по строкам не шире max_width.
+    Возвращает [(строка, ширина)].
+    """
+    space = word_width(font_size, ' ')
+    lines = []
+    current = []
+    current_width = 0.0
+
+    for word in words:
+        width = word_width(font_size, word)
+        candidate = current_width + space + width if current else width
+        if candidate <= max_width or not current:
+            current.append(word)
+            current_width = candidate
+        else:
+            lines.append((' '.join(current), current_width))
+            current = [word]
+            current_width = width
+
+    if current:
+        lines.append((' '.join(current), current_width))
+    return lines
@@ -138,6 +138,7 @@ SPEED="1.0"                  # Нормальная скорость
 WIDTH="1920"                 # Full HD ширина
 HEIGHT="1080"                # Full HD высота
 BG_COLOR="20,20,30"          # Тёмно-синий фон
+TTS_CONCURRENCY="4"          # Параллельных запросов к Edge TTS
 
 print_info "Параметры генерации:"
 echo "  Голос: $VOICE"
@@ -158,7 +159,7 @@ fi
 echo ""
 
 # Формируем команду
-CMD="python3 text_to_video.py \"$TEXT_FILE_NAME\" -o \"$OUTPUT_FILE_NAME\" -v \"$VOICE\" -s $SPEED"
+CMD="python3 text_to_video.py \"$TEXT_FILE_NAME\" -o \"$OUTPUT_FILE_NAME\" -v \"$VOICE\" -s $SPEED -j $TTS_CONCURRENCY"
 
 # Добавляем параметры в зависимости от режима
 if [ "$AUDIO_ONLY" = true ]; then
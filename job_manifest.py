@@ -0,0 +1,148 @@
+"""
+Журнал готовых частей задачи озвучки для продолжения после сбоя.
+
+Каждая задача (результат + движок + голос + скорость) получает свою
+директорию output/.jobs/<id>. Готовая часть сразу сохраняется туда
+отдельным файлом, а в manifest.jsonl дописывается строка
+{"index", "hash", "path", "duration", "words"}. Журнал только
+дописывается, поэтому обрыв посреди записи портит не больше последней
+строки. С --resume части, у которых совпадает хэш текста, берутся из
+журнала, и заново озвучиваются только недостающие.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from audio_cache import normalize_text
+
+
+DEFAULT_JOBS_DIR = Path('output') / '.jobs'
+MANIFEST_NAME = 'manifest.jsonl'
+
+
+def text_hash(text):
+    """
+    Хэш части текста (после нормализации пробелов)
+    """
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def job_id(output_path, engine, voice='', rate=''):
+    """
+    Идентификатор задачи: один и тот же для повторного запуска с теми же
+    параметрами
+    """
+    payload = json.dumps(
+        [os.path.abspath(str(output_path)), engine, str(voice), str(rate)],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class ChunkManifest:
+    """
+    Готовые части одной задачи озвучки.
+
+        manifest = ChunkManifest.for_job(output, 'edge', voice, rate, resume=True)
+        entry = manifest.get(index, text)      # (байты, запись) или None
+        manifest.add(index, text, data, duration, words)
+        manifest.finish()                      # задача завершена - удалить части
+
+    add можно вызывать из нескольких потоков.
+    """
+
+    def __init__(self, job_dir, resume=False):
+        self.job_dir = Path(job_dir)
+        self.path = self.job_dir / MANIFEST_NAME
+        self.entries = {}
+        self.resumed = 0
+        self._lock = threading.Lock()
+
+        if resume:
+            self._load()
+        else:
+            # Новая задача: старые части с теми же параметрами не нужны
+            shutil.rmtree(self.job_dir, ignore_errors=True)
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def for_job(cls, output_path, engine, voice='', rate='', resume=False, jobs_dir=DEFAULT_JOBS_DIR):
+        return cls(Path(jobs_dir) / job_id(output_path, engine, voice, rate), resume)
+
+    def _load(self):
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except OSError:
+            return
+
+        with f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self.entries[int(entry['index'])] = entry
+                except (ValueError, KeyError, TypeError):
+                    # Недописанная строка после обрыва
+                    continue
+
+    def __len__(self):
+        return len(self.entries)
+
+    def contains(self, index, text):
+        """
+        Есть ли готовая часть (без чтения файла)
+        """
+        entry = self.entries.get(index)
+        return (entry is not None and entry['hash'] == text_hash(text)
+                and (self.job_dir / entry['path']).exists())
+
+    def get(self, index, text):
+        """
+        Готовая часть (байты, запись журнала) или None, если части нет
+        или её текст изменился
+        """
+        entry = self.entries.get(index)
+        if entry is None or entry['hash'] != text_hash(text):
+            return None
+
+        try:
+            with open(self.job_dir / entry['path'], 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        self.resumed += 1
+        return data, entry
+
+    def add(self, index, text, data, duration, words=None, ext='mp3'):
+        """
+        Сохраняет готовую часть и дописывает её в журнал
+        """
+        name = f"chunk_{index:05d}.{ext}"
+        tmp_path = self.job_dir / f"{name}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self.job_dir / name)
+
+        entry = {
+            'index': index,
+            'hash': text_hash(text),
+            'path': name,
+            'duration': duration,
+            'words': list(words or []),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            # Журнал дописывается только после того, как файл части на месте
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+            self.entries[index] = entry
+
+    def finish(self):
+        """
+        Задача завершена: части больше не нужны
+        """
+        shutil.rmtree(self.job_dir, ignore_errors=True)
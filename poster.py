@@ -0,0 +1,162 @@
+"""
+Постеры и превью к видео: несколько размеров и форматов за один вызов.
+
+Картинка фона декодируется один раз (background.load_image), под каждый
+размер из неё вырезается кадр через prepare_background с его кэшем.
+Заголовок переносится по словам: ширина каждого слова измеряется один раз
+и кэшируется, ширина строки набирается сложением - без повторного
+измерения всей растущей строки на каждом слове.
+
+Вёрстка задана для кадра 1080 px по короткой стороне и масштабируется
+под остальные размеры, так что превью 1280x720 и квадратная карточка
+выглядят как уменьшенный постер.
+
+Постер 1920x1080 по умолчанию повторяет прежнюю вёрстку, но не совпадает
+с прежним create_poster попиксельно: фон масштабируется LANCZOS из общего
+с видео кадра (а не через moviepy), шрифт ищется через fonts.find_font_path
+(в том числе пути Linux и fontconfig), а перенос по сумме ширин слов может
+на кернинге разойтись с измерением целой строки.
+
+    specs = [PosterSpec('', 1920, 1080), THUMBNAIL, SQUARE]
+    render_posters('src/cover.jpg', 'Заголовок', 'output/story', specs)
+    # output/story.png, output/story_thumb.jpg, output/story_square.png
+"""
+
+from pathlib import Path
+from typing import NamedTuple
+
+from fonts import load_font, wrap_words
+
+
+class PosterSpec(NamedTuple):
+    """
+    Один выходной файл: суффикс имени, размер и формат
+    """
+    suffix: str
+    width: int
+    height: int
+    format: str = 'PNG'
+    quality: int = 90
+
+    @property
+    def extension(self):
+        return '.jpg' if self.format == 'JPEG' else f".{self.format.lower()}"
+
+
+THUMBNAIL = PosterSpec('_thumb', 1280, 720, 'JPEG', 85)
+SQUARE = PosterSpec('_square', 1080, 1080, 'PNG')
+
+# Дополнительные форматы для --poster-extra
+POSTER_PRESETS = {
+    'thumb': THUMBNAIL,
+    'square': SQUARE,
+}
+
+# Вёрстка для кадра 1080 px по короткой стороне
+BASE_SIZE = 1080
+FONT_SIZE = 64
+MARGIN_LEFT = 120
+MARGIN_BOTTOM = 120
+PADDING = 40           # Отступ текста от краёв подложки
+LINE_SPACING = 10
+BOX_SHIFT_DOWN = 10    # Подложка сдвинута вниз относительно текста
+MAX_LINE_RATIO = 0.6   # Строка не шире 60% кадра
+BOX_FILL = (255, 255, 255, 200)  # Белый с прозрачностью 85%
+
+
+def parse_presets(value):
+    """
+    'thumb,square' -> [THUMBNAIL, SQUARE]. При неизвестном имени
+    выбрасывает ValueError.
+    """
+    specs = []
+    for name in value.split(','):
+        name = name.strip()
+        if name not in POSTER_PRESETS:
+            raise ValueError(f"неизвестный формат постера '{name}', доступны: {', '.join(POSTER_PRESETS)}")
+        specs.append(POSTER_PRESETS[name])
+    return specs
+
+
+def layout_title(title, width, height):
+    """
+    Вёрстка заголовка для кадра width x height: размер шрифта, строки и
+    прямоугольник подложки
+    """
+    scale = min(width, height) / BASE_SIZE
+    font_size = max(8, round(FONT_SIZE * scale))
+    padding = round(PADDING * scale)
+    line_spacing = round(LINE_SPACING * scale)
+
+    lines = wrap_words(title.split(), font_size, int(width * MAX_LINE_RATIO))
+
+    text_width = max((line_width for _, line_width in lines), default=0)
+    text_height = font_size * len(lines) + line_spacing * (len(lines) - 1)
+
+    box_width = round(text_width) + padding * 2
+    box_height = text_height + padding * 2
+    box_x = round(MARGIN_LEFT * scale)
+    box_y = height - box_height - round(MARGIN_BOTTOM * scale)
+
+    return {
+        'font_size': font_size,
+        'lines': [text for text, _ in lines],
+        'line_height': font_size + line_spacing,
+        'padding': padding,
+        'box': (box_x, box_y, box_width, box_height),
+        'shift': round(BOX_SHIFT_DOWN * scale),
+    }
+
+
+def render_poster(background_image, title, spec):
+    """
+    Постер одного размера: PIL Image (RGB)
+    """
+    from PIL import Image, ImageDraw
+    from background import prepare_background
+
+    # Фон готовит общий слой подготовки (тот же кадр, что и для видео, без градиента)
+    frame = prepare_background(background_image, spec.width, spec.height, gradient=None)
+    image = Image.fromarray(frame).convert('RGBA')
+
+    layout = layout_title(title, spec.width, spec.height)
+    font = load_font(layout['font_size'])
+    box_x, box_y, box_width, box_height = layout['box']
+    shift = layout['shift']
+
+    # Подложка и текст - на отдельном полупрозрачном слое
+    overlay = Image.new('RGBA', image.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    draw.rectangle(
+        [box_x, box_y + shift, box_x + box_width, box_y + box_height + shift],
+        fill=BOX_FILL
+    )
+
+    text_x = box_x + layout['padding']
+    text_y = box_y + layout['padding']
+    for line in layout['lines']:
+        draw.text((text_x, text_y), line, fill='black', font=font)
+        text_y += layout['line_height']
+
+    return Image.alpha_composite(image, overlay).convert('RGB')
+
+
+def save_poster(image, path, spec):
+    if spec.format == 'JPEG':
+        image.save(path, 'JPEG', quality=spec.quality, optimize=True)
+    else:
+        image.save(path, spec.format)
+
+
+def render_posters(background_image, title, output_base, specs):
+    """
+    Сохраняет постеры всех размеров: output_base + суффикс + расширение.
+    Возвращает пути к файлам.
+    """
+    output_base = Path(output_base)
+    paths = []
+    for spec in specs:
+        path = output_base.with_name(f"{output_base.name}{spec.suffix}{spec.extension}")
+        save_poster(render_poster(background_image, title, spec), path, spec)
+        paths.append(path)
+    return paths
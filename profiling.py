@@ -0,0 +1,255 @@
+"""
+Профиль выполнения по этапам (--profile).
+
+Для каждого именованного этапа записываются время по часам, процессорное
+время (самого процесса и дочерних - ffmpeg), пик RSS процесса за время
+этапа и максимум RSS дочерних процессов. Отчёт сохраняется в JSON рядом
+с результатом. По желанию один этап (или самый долгий) снимается
+cProfile, и статистика сохраняется в .prof для snakeviz / pstats.
+
+    start_profile('output/story.profile.json', cprofile='hottest')
+    ...
+    with stage('tts'):
+        ...
+
+Отчёт сохраняется при выходе из процесса - в том числе по ошибке или
+sys.exit, так что видно, на каком этапе задача остановилась.
+
+Код, которому нужно разбить свою работу на этапы, вызывает stage(name):
+без активного профилировщика это пустой контекст и ничего не стоит.
+Вложенные этапы записываются с именем родителя: 'video/encode'.
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    # Windows: без процессорного времени и памяти дочерних процессов
+    resource = None
+
+
+HOTTEST = 'hottest'
+
+_active = None
+
+
+def _page_size():
+    try:
+        return os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return 4096
+
+
+def _max_rss_bytes(who):
+    """
+    ru_maxrss в байтах (Linux отдаёт килобайты, macOS - байты)
+    """
+    if resource is None:
+        return 0
+    value = resource.getrusage(who).ru_maxrss
+    return value if sys.platform == 'darwin' else value * 1024
+
+
+def _children_cpu():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class RssSampler:
+    """
+    Пик RSS процесса за время блока: фоновый поток опрашивает
+    /proc/self/statm. Где /proc нет (macOS), берётся ru_maxrss - максимум
+    с начала процесса, а не с начала блока.
+    """
+
+    INTERVAL = 0.005
+
+    def __init__(self):
+        self.page_size = _page_size()
+        self.available = os.path.exists('/proc/self/statm')
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _rss(self):
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * self.page_size
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            self._stop.wait(self.INTERVAL)
+
+    def __enter__(self):
+        if self.available:
+            self.peak = self._rss()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, self._rss())
+        else:
+            self.peak = _max_rss_bytes(resource.RUSAGE_SELF) if resource else 0
+        return False
+
+
+class StageProfiler:
+    """
+    Замеры этапов одного запуска.
+    cprofile - имя этапа верхнего уровня для cProfile, 'hottest' - самый
+    долгий из них (снимаются все, сохраняется один), None - без cProfile.
+    """
+
+    def __init__(self, cprofile=None):
+        self.cprofile = cprofile
+        self.stages = []
+        self.started = datetime.now()
+        self._start = time.perf_counter()
+        self._stack = []
+        self._profiles = {}
+
+    @contextmanager
+    def activate(self):
+        """
+        Делает профилировщик текущим для stage()
+        """
+        global _active
+        previous, _active = _active, self
+        try:
+            yield self
+        finally:
+            _active = previous
+
+    def _wants_cprofile(self, name):
+        # cProfile один на поток - только для этапов верхнего уровня
+        return not self._stack and self.cprofile in (name, HOTTEST)
+
+    @contextmanager
+    def stage(self, name):
+        full_name = '/'.join(self._stack + [name])
+        record = {'name': full_name, 'depth': len(self._stack), 'status': 'ok'}
+        # Запись добавляется в начале - этапы в отчёте идут в порядке запуска
+        self.stages.append(record)
+
+        profile = cProfile.Profile() if self._wants_cprofile(name) else None
+        self._stack.append(name)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        children_cpu = _children_cpu()
+        sampler = RssSampler()
+        sampler.__enter__()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        except BaseException as e:
+            record['status'] = f"error: {type(e).__name__}"
+            raise
+        finally:
+            if profile is not None:
+                profile.disable()
+            sampler.__exit__(None, None, None)
+            self._stack.pop()
+            record.update({
+                'wall_s': round(time.perf_counter() - wall, 4),
+                'cpu_s': round(time.process_time() - cpu, 4),
+                'children_cpu_s': round(_children_cpu() - children_cpu, 4),
+                'peak_rss_mb': round(sampler.peak / 2 ** 20, 1),
+                'children_max_rss_mb': round(_max_rss_bytes(resource.RUSAGE_CHILDREN) / 2 ** 20, 1)
+                if resource else 0.0,
+            })
+            if profile is not None:
+                self._profiles[full_name] = profile
+
+    def hottest(self):
+        """
+        Самый долгий этап верхнего уровня
+        """
+        top = [s for s in self.stages if s['depth'] == 0 and 'wall_s' in s]
+        return max(top, key=lambda s: s['wall_s']) if top else None
+
+    def report(self):
+        return {
+            'command': Path(sys.argv[0]).name,
+            'argv': sys.argv[1:],
+            'started': self.started.isoformat(timespec='seconds'),
+            'total_wall_s': round(time.perf_counter() - self._start, 4),
+            'peak_rss_mb': round(_max_rss_bytes(resource.RUSAGE_SELF) / 2 ** 20, 1) if resource else None,
+            'stages': [s for s in self.stages if 'wall_s' in s],
+        }
+
+    def format_summary(self):
+        lines = [f"  {'Этап':<24}{'Время, с':>10}{'CPU, с':>10}{'ffmpeg CPU, с':>15}{'Пик RSS, МБ':>13}"]
+        for s in self.report()['stages']:
+            lines.append(f"  {s['name']:<24}{s['wall_s']:>10.2f}{s['cpu_s']:>10.2f}"
+                         f"{s['children_cpu_s']:>15.2f}{s['peak_rss_mb']:>13.0f}")
+        return '\n'.join(lines)
+
+    def save(self, path):
+        """
+        Сохраняет отчёт JSON и, если был cProfile, статистику этапа в
+        <имя отчёта>.<этап>.prof. Возвращает путь к .prof или None.
+        """
+        path = Path(path)
+        report = self.report()
+
+        prof_path = None
+        if self._profiles:
+            if self.cprofile == HOTTEST:
+                name = self.hottest()['name']
+            else:
+                name = self.cprofile
+            profile = self._profiles.get(name)
+            if profile is not None:
+                prof_path = path.parent / f"{path.stem}.{name.replace('/', '_')}.prof"
+                profile.dump_stats(str(prof_path))
+                report['cprofile'] = {'stage': name, 'path': str(prof_path)}
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return prof_path
+
+
+def stage(name):
+    """
+    Этап текущего профилировщика или пустой контекст, если профиль не ведётся
+    """
+    if _active is None:
+        return nullcontext()
+    return _active.stage(name)
+
+
+def start_profile(report_path, cprofile=None):
+    """
+    Включает профиль до конца процесса; отчёт и сводка - при выходе
+    """
+    global _active
+    profiler = StageProfiler(cprofile)
+    _active = profiler
+    atexit.register(_finish_profile, profiler, report_path)
+    return profiler
+
+
+def _finish_profile(profiler, report_path):
+    prof_path = profiler.save(report_path)
+    print("\n=== Профиль ===")
+    print(profiler.format_summary())
+    print(f"✓ Отчёт профиля: {report_path}")
+    if prof_path is not None:
+        print(f"✓ cProfile: {prof_path} (python3 -m pstats {prof_path})")
@@ -0,0 +1,123 @@
+"""
+Разбиение текста на предложения и части для озвучки.
+
+Один проход по тексту регулярным выражением, без замены знаков
+препинания: восклицательные и вопросительные знаки остаются на месте,
+поэтому движок сохраняет интонацию. Все функции - генераторы, так что
+первые части можно отправлять на озвучку, пока остальной текст ещё
+разбивается.
+"""
+
+import re
+
+
+# Оптимальная длина части (в символах) для каждого движка
+CHUNK_BUDGETS = {
+    # Edge TTS сам режет запрос на куски по 4096 байт и отправляет их
+    # последовательно. 2000 символов кириллицы (~4000 байт UTF-8) укладываются
+    # в один такой кусок, поэтому каждая часть - это ровно один запрос к сервису.
+    'edge': 2000,
+    # gTTS принимает до 5000 символов за запрос
+    'gtts': 4500,
+    # Coqui XTTS на длинных фрагментах начинает сбиваться и "проглатывать" слова
+    'coqui': 500,
+    # Синтетический движок режется как Edge TTS, чтобы бенчмарки проходили тот же путь
+    'synthetic': 2000,
+}
+
+# Граница предложения: пробелы после . ! ? … (возможно, за закрывающей
+# кавычкой или скобкой)
+_BOUNDARY = re.compile(r'(?:(?<=[.!?…])|(?<=[.!?…]["»”)]))\s+')
+_COMMA = re.compile(r',\s*')
+
+
+def chunk_budget(engine):
+    """
+    Длина части для движка; None - движок принимает текст целиком
+    """
+    return CHUNK_BUDGETS.get(engine)
+
+
+def iter_sentences(text):
+    """
+    Предложения текста вместе с их знаками препинания
+    """
+    start = 0
+    for match in _BOUNDARY.finditer(text):
+        sentence = text[start:match.start()].strip()
+        if sentence:
+            yield sentence
+        start = match.end()
+
+    sentence = text[start:].strip()
+    if sentence:
+        yield sentence
+
+
+def _split_long(sentence, max_chars):
+    """
+    Режет слишком длинное предложение по пробелам на куски до max_chars
+    """
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(' ', 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        yield sentence[:cut].strip()
+        sentence = sentence[cut:].strip()
+    if sentence:
+        yield sentence
+
+
+def iter_chunks(text, max_chars):
+    """
+    Части текста не длиннее max_chars из целых предложений.
+    Предложение длиннее max_chars режется по пробелам.
+    """
+    current = []
+    current_len = 0
+
+    for sentence in iter_sentences(text):
+        for piece in _split_long(sentence, max_chars):
+            if current and current_len + 1 + len(piece) > max_chars:
+                yield ' '.join(current)
+                current, current_len = [], 0
+
+            current.append(piece)
+            current_len += len(piece) + (1 if current_len else 0)
+
+    if current:
+        yield ' '.join(current)
+
+
+def iter_engine_chunks(text, engine):
+    """
+    Части текста под оптимальный размер для движка
+    """
+    budget = chunk_budget(engine)
+    if budget is None:
+        text = text.strip()
+        if text:
+            yield text
+        return
+    yield from iter_chunks(text, budget)
+
+
+def iter_phrases(text, max_words=10):
+    """
+    Короткие фразы для субтитров: предложения длиннее max_words слов
+    делятся после запятых, запятые остаются в тексте
+    """
+    for sentence in iter_sentences(text):
+        if len(sentence.split()) <= max_words:
+            yield sentence
+            continue
+
+        start = 0
+        for match in _COMMA.finditer(sentence):
+            phrase = sentence[start:match.start() + 1].strip()
+            if phrase:
+                yield phrase
+            start = match.end()
+        phrase = sentence[start:].strip()
+        if phrase:
+            yield phrase
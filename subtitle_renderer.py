@@ -0,0 +1,153 @@
+"""
+Вшитые субтитры без покадровой сборки клипов.
+
+Каждая реплика один раз растеризуется в обрезанный RGBA спрайт, время
+реплик хранится в отсортированных массивах и ищется бинарным поиском,
+а в кадр смешивается только прямоугольник спрайта. Кадр с репликой
+поверх статичного фона собирается один раз на реплику, поэтому стоимость
+растёт с числом субтитров, а не с числом кадров.
+"""
+
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from fonts import load_font, wrap_words
+
+
+class Sprite(NamedTuple):
+    """
+    Растеризованная реплика: позиция в кадре, цвет с учётом прозрачности
+    и доля фона, которая остаётся под спрайтом
+    """
+    x: int
+    y: int
+    color: np.ndarray
+    keep: np.ndarray
+
+
+class SubtitleRenderer:
+    """
+    Рисует реплики (start, end, text) поверх кадров видео
+    """
+
+    def __init__(self, cues, video_width=1920, video_height=1080, font_size=48,
+                 line_spacing=15, side_margin=300, bottom_margin=200,
+                 color=(255, 255, 255), stroke_width=2, stroke_color=(0, 0, 0)):
+        cues = sorted(cues, key=lambda cue: cue[0])
+        self.starts = array('d', (cue[0] for cue in cues))
+        self.ends = array('d', (cue[1] for cue in cues))
+        self.texts = [cue[2] for cue in cues]
+
+        self.video_width = video_width
+        self.video_height = video_height
+        self.font_size = font_size
+        self.font = load_font(font_size)
+        self.line_height = font_size + line_spacing
+        self.max_width = video_width - 2 * side_margin
+        self.bottom_margin = bottom_margin
+        self.color = color
+        self.stroke_width = stroke_width
+        self.stroke_color = stroke_color
+
+        # Спрайт нужен, пока идёт его реплика, поэтому держим только несколько
+        self.sprite = lru_cache(maxsize=4)(self._rasterize)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def cue_at(self, t):
+        """
+        Индекс реплики, которая видна в момент t, или None
+        """
+        index = bisect_right(self.starts, t) - 1
+        if index >= 0 and t < self.ends[index]:
+            return index
+        return None
+
+    def _wrap(self, text):
+        """
+        Разбивает текст на строки не шире max_width
+        """
+        return [line for line, _ in wrap_words(text.split(), self.font_size, self.max_width)]
+
+    def _rasterize(self, index):
+        """
+        Растеризует реплику в спрайт, обрезанный по непрозрачным пикселям
+        """
+        from PIL import Image, ImageDraw
+
+        lines = self._wrap(self.texts[index])
+        pad = self.stroke_width + 2
+        height = len(lines) * self.line_height + 2 * pad
+        canvas = Image.new('RGBA', (self.max_width + 2 * pad, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(canvas)
+
+        center = canvas.width // 2
+        for number, line in enumerate(lines):
+            draw.text(
+                (center, pad + number * self.line_height),
+                line,
+                font=self.font,
+                fill=self.color,
+                anchor='ma',
+                stroke_width=self.stroke_width,
+                stroke_fill=self.stroke_color
+            )
+
+        bbox = canvas.getbbox()
+        if bbox is None:
+            return None
+        rgba = np.asarray(canvas.crop(bbox), dtype=np.float32)
+
+        # По центру по горизонтали, низ текста - на bottom_margin от края
+        x = (self.video_width - canvas.width) // 2 + bbox[0]
+        y = self.video_height - self.bottom_margin - canvas.height + bbox[1]
+
+        alpha = rgba[:, :, 3:] / 255.0
+        return Sprite(x, y, rgba[:, :, :3] * alpha, 1.0 - alpha)
+
+    def blend(self, frame, index):
+        """
+        Возвращает копию кадра с репликой index
+        """
+        sprite = self.sprite(index)
+        if sprite is None:
+            return frame
+
+        height, width = frame.shape[:2]
+        x0, y0 = max(sprite.x, 0), max(sprite.y, 0)
+        x1 = min(sprite.x + sprite.color.shape[1], width)
+        y1 = min(sprite.y + sprite.color.shape[0], height)
+        if x0 >= x1 or y0 >= y1:
+            return frame
+
+        sx, sy = x0 - sprite.x, y0 - sprite.y
+        color = sprite.color[sy:sy + y1 - y0, sx:sx + x1 - x0]
+        keep = sprite.keep[sy:sy + y1 - y0, sx:sx + x1 - x0]
+
+        result = frame.copy()
+        region = result[y0:y1, x0:x1].astype(np.float32)
+        result[y0:y1, x0:x1] = (region * keep + color + 0.5).astype(np.uint8)
+        return result
+
+    def frame_function(self, background):
+        """
+        Функция кадра для moviepy VideoClip поверх статичного фона.
+        Кадр с репликой собирается один раз и отдаётся, пока она на экране.
+        """
+        last = [None, background]
+
+        def make_frame(t):
+            index = self.cue_at(t)
+            if index is None:
+                return background
+            if last[0] != index:
+                last[0] = index
+                last[1] = self.blend(background, index)
+            return last[1]
+
+        return make_frame
@@ -0,0 +1,157 @@
+"""
+Субтитры по границам слов из Edge TTS.
+
+Edge TTS присылает события WordBoundary с точным временем каждого слова.
+Слова сопоставляются с исходным текстом (чтобы вернуть знаки препинания),
+группируются в реплики и сохраняются в SRT или WebVTT.
+"""
+
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+
+class Cue(NamedTuple):
+    """
+    Одна реплика субтитров: время в секундах и текст
+    """
+    start: float
+    end: float
+    text: str
+
+
+# Ограничения реплики: две строки по ~42 символа и не дольше 6 секунд
+MAX_CUE_CHARS = 84
+MAX_CUE_DURATION = 6.0
+# Пауза между словами, после которой начинается новая реплика
+MAX_WORD_GAP = 0.8
+
+_SENTENCE_END = re.compile(r'[.!?…]["»”)]*$')
+
+
+class SubtitleTrack:
+    """
+    Собирает границы слов из частей аудио в общую временную шкалу
+    """
+
+    def __init__(self):
+        # (начало, конец, фрагмент исходного текста со знаками препинания)
+        self.words = []
+        self.offset = 0.0
+
+    def add_chunk(self, text, words, chunk_duration):
+        """
+        Добавляет слова очередной части. words - [(начало, длительность, слово)]
+        относительно начала части, chunk_duration - длительность её аудио.
+        """
+        aligned = []
+        cursor = 0
+
+        for start, duration, word in words:
+            index = text.find(word, cursor)
+            if index < 0:
+                aligned.append([start, start + duration, word, None])
+                continue
+
+            # Открывающие кавычки и скобки перед словом относятся к нему
+            word_start = index
+            while word_start > cursor and not text[word_start - 1].isspace():
+                word_start -= 1
+
+            aligned.append([start, start + duration, word, word_start])
+            cursor = index + len(word)
+
+        # Фрагмент слова тянется до начала следующего: так в него попадают
+        # знаки препинания и кавычки после слова
+        next_index = len(text)
+        for item in reversed(aligned):
+            if item[3] is not None:
+                item[2] = text[item[3]:next_index].strip()
+                next_index = item[3]
+
+        for start, end, word, _ in aligned:
+            self.words.append((self.offset + start, self.offset + end, word))
+
+        self.offset += chunk_duration
+
+    def cues(self, max_chars=MAX_CUE_CHARS, max_duration=MAX_CUE_DURATION, max_gap=MAX_WORD_GAP):
+        """
+        Группирует слова в реплики
+        """
+        cues = []
+        current = []
+
+        def flush():
+            if current:
+                cues.append(Cue(current[0][0], current[-1][1], ' '.join(w[2] for w in current)))
+                current.clear()
+
+        for word in self.words:
+            if current:
+                length = sum(len(w[2]) + 1 for w in current) + len(word[2])
+                if (length > max_chars
+                        or word[1] - current[0][0] > max_duration
+                        or word[0] - current[-1][1] > max_gap):
+                    flush()
+
+            current.append(word)
+
+            if _SENTENCE_END.search(word[2]):
+                flush()
+
+        flush()
+        return cues
+
+    def write(self, path):
+        """
+        Сохраняет субтитры; формат выбирается по расширению (.srt или .vtt)
+        """
+        write_cues(path, self.cues())
+
+
+def _timestamp(seconds, separator):
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def format_srt(cues):
+    """
+    Реплики в формате SubRip
+    """
+    blocks = []
+    for number, cue in enumerate(cues, 1):
+        blocks.append(
+            f"{number}\n"
+            f"{_timestamp(cue.start, ',')} --> {_timestamp(cue.end, ',')}\n"
+            f"{cue.text}\n"
+        )
+    return '\n'.join(blocks)
+
+
+def format_vtt(cues):
+    """
+    Реплики в формате WebVTT
+    """
+    blocks = ["WEBVTT\n"]
+    for cue in cues:
+        blocks.append(
+            f"{_timestamp(cue.start, '.')} --> {_timestamp(cue.end, '.')}\n"
+            f"{cue.text}\n"
+        )
+    return '\n'.join(blocks)
+
+
+def write_cues(path, cues):
+    """
+    Сохраняет реплики; формат выбирается по расширению (.srt или .vtt)
+    """
+    if Path(path).suffix.lower() == '.vtt':
+        content = format_vtt(cues)
+    else:
+        content = format_srt(cues)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
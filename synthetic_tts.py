@@ -0,0 +1,93 @@
+"""
+Синтетический TTS движок для проверок и бенчмарков без сети.
+
+Вместо речи - тишина в формате Edge TTS (MP3, 24 кГц, моно, 48 кбит/с
+CBR), длина пропорциональна тексту. Границы слов расставляются
+равномерно по тем же правилам, поэтому субтитры, кэш, журнал задачи и
+склейка работают как с настоящим движком. Результат детерминирован:
+один и тот же текст и скорость дают одни и те же байты.
+
+SyntheticEngine подключается вместо EdgeSessionPool (тот же метод
+synthesize), так что весь путь text_to_video.py проходит без сети.
+"""
+
+import re
+
+
+# MPEG-2 Layer III, 48 кбит/с, 24 кГц, моно, без CRC. Нулевая побочная
+# информация (main_data_begin = 0, part2_3_length = 0) - кадр тишины.
+SILENT_FRAME = bytes([0xFF, 0xF3, 0x64, 0xC4]) + bytes(140)
+FRAME_SECONDS = 576 / 24000
+
+# Темп "речи": символов в секунду при скорости 1.0
+CHARS_PER_SECOND = 15
+
+_WORD = re.compile(r"\w+(?:[-']\w+)*")
+_RATE = re.compile(r'^([+-]\d+)%$')
+
+
+def silent_mp3(seconds):
+    """
+    Тишина заданной длины в формате Edge TTS
+    """
+    return SILENT_FRAME * max(1, round(seconds / FRAME_SECONDS))
+
+
+def rate_to_speed(rate):
+    """
+    Процент Edge TTS ('+10%') обратно в множитель скорости (1.1)
+    """
+    match = _RATE.match(rate or '+0%')
+    return 1.0 + int(match.group(1)) / 100 if match else 1.0
+
+
+def synthetic_words(text, chars_per_second=CHARS_PER_SECOND):
+    """
+    Равномерные границы слов [(начало, длительность, слово)] и общая
+    длительность текста в секундах
+    """
+    words = []
+    offset = 0.0
+    for match in _WORD.finditer(text):
+        word = match.group()
+        duration = len(word) / chars_per_second
+        words.append((offset, duration, word))
+        # Пробел или знак препинания после слова - ещё один "символ"
+        offset += duration + 1 / chars_per_second
+    return words, max(offset, len(text) / chars_per_second)
+
+
+def synthesize(text, speed=1.0):
+    """
+    MP3 данные и границы слов для текста
+    """
+    words, duration = synthetic_words(text, CHARS_PER_SECOND * speed)
+    return silent_mp3(duration), words
+
+
+class SyntheticEngine:
+    """
+    Замена EdgeSessionPool: тот же интерфейс, без сети.
+
+        async with SyntheticEngine() as engine:
+            audio, words = await engine.synthesize(text, voice, '+10%')
+    """
+
+    def __init__(self):
+        self.requests = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    async def synthesize(self, text, voice='', rate='+0%', boundary='WordBoundary'):
+        self.requests += 1
+        return synthesize(text, rate_to_speed(rate))
+
+    def format_stats(self):
+        return f"Синтетический движок: запросов {self.requests}"
+
+    async def close(self):
+        pass
@@ -0,0 +1,73 @@
+"""
+add_yo: без учёта регистра результат совпадает с прежним вариантом
+(около 60 re.sub), регистр букв сохраняется, потоковая обработка и
+реестр обработанных файлов.
+"""
+
+import io
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from add_yo import add_yo, add_yo_file, is_processed, iter_add_yo, load_dictionary
+from bench_add_yo import SAMPLE_WORDS, legacy_add_yo
+
+
+def random_text(seed, words=2000):
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(words):
+        word = rng.choice(SAMPLE_WORDS)
+        roll = rng.random()
+        if roll < 0.1:
+            word = word.capitalize()
+        elif roll < 0.13:
+            word = word.upper()
+        parts.append(word + rng.choice(['', '', '', ',', '.', '!', '?', ' -', ':']))
+    return ' '.join(parts)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_same_as_legacy_ignoring_case(seed):
+    text = random_text(seed)
+    assert add_yo(text).lower() == legacy_add_yo(text).lower()
+
+
+def test_case_is_preserved():
+    assert add_yo('Все ВСЕ все, Черный ЖЕЛТЫЙ стекло') == 'Всё ВСЁ всё, Чёрный ЖЁЛТЫЙ стёкло'
+
+
+def test_whole_words_and_stems():
+    # Без звёздочки - только слово целиком, со звёздочкой - любое окончание
+    assert add_yo('всем чемодан') == 'всем чемодан'
+    assert add_yo('зеленые зеленая') == 'зелёные зелёная'
+
+
+def test_stream_matches_whole_text():
+    text = random_text(42, words=500)
+    for block_size in (1, 7, 64, 4096):
+        assert ''.join(iter_add_yo(io.StringIO(text), block_size=block_size)) == add_yo(text)
+
+
+def test_external_dictionary(tmp_path):
+    path = tmp_path / 'yo.txt'
+    path.write_text('# свои слова\nёлк*\nвёл\n', encoding='utf-8')
+    dictionary = load_dictionary(path)
+    assert add_yo('елка вел все', dictionary) == 'ёлка вёл всё'
+
+
+def test_file_is_processed_once(tmp_path):
+    story = tmp_path / 'story.txt'
+    registry = tmp_path / 'registry.json'
+    story.write_text('Все идет хорошо.\n', encoding='utf-8')
+
+    assert add_yo_file(story, registry_path=registry) is True
+    assert story.read_text(encoding='utf-8') == 'Всё идёт хорошо.\n'
+    assert is_processed(story, registry_path=registry)
+    assert add_yo_file(story, registry_path=registry) is False
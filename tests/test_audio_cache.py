@@ -0,0 +1,68 @@
+"""
+AudioCache: ключ по нормализованному тексту, голосу и скорости,
+LRU вытеснение по размеру и учёт размера при записи из нескольких потоков.
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_cache import AudioCache, make_key
+from synthetic_tts import synthesize
+
+
+def test_round_trip_and_stats(tmp_path):
+    cache = AudioCache(tmp_path)
+    audio, words = synthesize('Привет, мир.')
+
+    assert cache.get('Привет, мир.', 'edge', 'voice', '+0%') is None
+    cache.put('Привет, мир.', 'edge', 'voice', '+0%', audio)
+    cache.put_meta('Привет, мир.', 'edge', 'voice', '+0%', words)
+
+    assert cache.get('Привет, мир.', 'edge', 'voice', '+0%') == audio
+    assert [tuple(w) for w in cache.get_meta('Привет, мир.', 'edge', 'voice', '+0%')] == words
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_key_ignores_whitespace_but_not_voice_or_rate():
+    assert make_key('Привет,  мир.\n', 'edge') == make_key(' Привет, мир.', 'edge')
+    assert make_key('Привет', 'edge', 'a', '+0%') != make_key('Привет', 'edge', 'b', '+0%')
+    assert make_key('Привет', 'edge', 'a', '+0%') != make_key('Привет', 'edge', 'a', '+10%')
+    assert make_key('Привет', 'edge') != make_key('Привет', 'gtts')
+
+
+def test_evicts_least_recently_used(tmp_path):
+    entry = 100 * 1024
+    cache = AudioCache(tmp_path, max_size_mb=3.5 * entry / 1024 / 1024)
+
+    for age, text in enumerate(['a', 'b', 'c']):
+        path = cache.put(text, 'edge', data=bytes(entry))
+        os.utime(path, (1000 + age, 1000 + age))
+
+    # Обращение к самой старой записи делает давней всех 'b'
+    assert cache.get('a', 'edge') is not None
+    cache.put('d', 'edge', data=bytes(entry))
+
+    assert [cache.contains(text, 'edge') for text in 'abcd'] == [True, False, True, True]
+    assert cache.size() <= cache.max_size
+
+
+def test_size_accounting_with_threads(tmp_path):
+    cache = AudioCache(tmp_path)
+    cache.size()
+
+    def worker(n):
+        for i in range(20):
+            cache.put(f"{n}-{i}", 'edge', data=bytes(1000))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.size() == 80 * 1000
+    assert cache.size() == sum(size for _, size, _ in cache._entries())
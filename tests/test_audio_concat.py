@@ -0,0 +1,104 @@
+"""
+Склейка частей без декодирования: у MP3 частей отрезаются ID3 теги и
+Xing/Info кадр, кадры дописываются как есть; WAV части склеиваются
+через wave.
+"""
+
+import io
+import os
+import sys
+import wave
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_concat import AudioJoiner, Mp3Concatenator, mp3_frames_range
+from audio_probe import mp3_duration_bytes, probe_duration, wav_duration_bytes
+from synthetic_tts import SILENT_FRAME, silent_mp3
+
+
+def id3v2_tag(payload_size):
+    size = bytes((payload_size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b'ID3\x04\x00\x00' + size + bytes(payload_size)
+
+
+def id3v1_tag():
+    return b'TAG' + bytes(125)
+
+
+def xing_frame(frames):
+    frame = bytearray(SILENT_FRAME)
+    frame[13:25] = b'Xing' + (1).to_bytes(4, 'big') + frames.to_bytes(4, 'big')
+    return bytes(frame)
+
+
+def wav_bytes(seconds, rate=24000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(2 * int(seconds * rate)))
+    return buffer.getvalue()
+
+
+def test_tags_and_xing_frame_are_stripped():
+    audio = silent_mp3(1.0)
+    part = id3v2_tag(300) + xing_frame(10) + audio + id3v1_tag()
+    start, end, sample_rate, channels = mp3_frames_range(part)
+    assert part[start:end] == audio
+    assert (sample_rate, channels) == (24000, 1)
+
+
+def test_parts_are_joined_frame_by_frame():
+    parts = [id3v2_tag(100) + xing_frame(5) + silent_mp3(seconds) + id3v1_tag()
+             for seconds in (0.5, 1.0, 2.0)]
+    out = io.BytesIO()
+    concat = Mp3Concatenator(out)
+    for part in parts:
+        concat.add(part)
+
+    data = out.getvalue()
+    assert data == silent_mp3(0.5) + silent_mp3(1.0) + silent_mp3(2.0)
+    assert mp3_duration_bytes(data) == pytest.approx(sum(mp3_duration_bytes(silent_mp3(s))
+                                                         for s in (0.5, 1.0, 2.0)))
+
+
+def test_mp3_format_mismatch():
+    # MPEG-1, 128 кбит/с, 44.1 кГц, моно - другой формат кадров
+    frame_44k = bytes([0xFF, 0xFB, 0x90, 0xC4]) + bytes(413)
+    concat = Mp3Concatenator(io.BytesIO())
+    concat.add(silent_mp3(0.5))
+    with pytest.raises(ValueError):
+        concat.add(frame_44k * 10)
+
+
+def test_joiner_writes_mp3_directly(tmp_path):
+    output = tmp_path / 'out.mp3'
+    with AudioJoiner(output, 'mp3') as joiner:
+        joiner.add(silent_mp3(1.0))
+        joiner.add(id3v2_tag(50) + silent_mp3(1.0))
+    assert output.read_bytes() == silent_mp3(1.0) * 2
+    assert not list(tmp_path.glob('*.parts.*'))
+
+
+def test_joiner_wav_parts(tmp_path):
+    output = tmp_path / 'out.wav'
+    with AudioJoiner(output, 'wav') as joiner:
+        joiner.add(wav_bytes(0.5))
+        joiner.add(wav_bytes(0.25))
+    assert wav_duration_bytes(output.read_bytes()) == pytest.approx(0.75)
+
+    with pytest.raises(ValueError):
+        with AudioJoiner(tmp_path / 'mixed.wav', 'wav') as joiner:
+            joiner.add(wav_bytes(0.5, rate=24000))
+            joiner.add(wav_bytes(0.5, rate=16000))
+
+
+def test_joiner_speed_goes_through_ffmpeg(tmp_path):
+    output = tmp_path / 'fast.mp3'
+    with AudioJoiner(output, 'mp3', speed=2.0) as joiner:
+        joiner.add(silent_mp3(4.0))
+    assert probe_duration(output) == pytest.approx(2.0, abs=0.1)
+    assert not list(tmp_path.glob('*.parts.*'))
@@ -0,0 +1,31 @@
+"""
+Цепочка atempo: каждый фильтр в допустимых пределах, итоговая скорость
+совпадает с заданной, неположительная скорость - ошибка.
+"""
+
+import math
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_post import atempo_filter, audio_filters
+
+
+@pytest.mark.parametrize('speed', [0.2, 0.5, 0.8, 1.1, 2.0, 5.0])
+def test_atempo_chain(speed):
+    factors = [float(f.split('=')[1]) for f in atempo_filter(speed).split(',')]
+    assert all(0.5 <= factor <= 2.0 for factor in factors)
+    assert math.prod(factors) == pytest.approx(speed, rel=1e-5)
+
+
+@pytest.mark.parametrize('speed', [0, -1.0, float('nan')])
+def test_atempo_rejects_non_positive_speed(speed):
+    with pytest.raises(ValueError):
+        atempo_filter(speed)
+
+
+def test_no_filters_at_normal_speed():
+    assert audio_filters(1.0) is None
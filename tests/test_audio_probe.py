@@ -0,0 +1,81 @@
+"""
+Длительность аудио по заголовкам: MP3 постоянного битрейта (как у Edge
+TTS и синтетического движка), с ID3 тегом, с Xing заголовком и WAV.
+"""
+
+import io
+import os
+import sys
+import wave
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_probe import (id3v2_size, is_xing_frame, mp3_duration_bytes, parse_frame_header,
+                         probe_duration, wav_duration_bytes)
+from synthetic_tts import FRAME_SECONDS, SILENT_FRAME, silent_mp3
+
+
+def id3_tag(payload_size):
+    # Размер в ID3v2 - 4 байта по 7 бит
+    size = bytes((payload_size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b'ID3\x04\x00\x00' + size + bytes(payload_size)
+
+
+def xing_frame(frames):
+    frame = bytearray(SILENT_FRAME)
+    # MPEG-2 моно: метка сразу после 4 байт заголовка и 9 байт side info
+    frame[13:25] = b'Xing' + (1).to_bytes(4, 'big') + frames.to_bytes(4, 'big')
+    return bytes(frame)
+
+
+def wav_bytes(seconds, rate=24000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(2 * int(seconds * rate)))
+    return buffer.getvalue()
+
+
+def test_frame_header():
+    length, samples, sample_rate, channels, bitrate = parse_frame_header(SILENT_FRAME[:4])
+    assert (length, samples, sample_rate, channels, bitrate) == (len(SILENT_FRAME), 576, 24000, 1, 48000)
+    assert parse_frame_header(b'ID3\x04') is None
+
+
+def test_cbr_duration():
+    data = silent_mp3(12.5)
+    frames = len(data) // len(SILENT_FRAME)
+    assert mp3_duration_bytes(data) == pytest.approx(frames * FRAME_SECONDS)
+
+
+def test_id3_tag_is_skipped():
+    data = silent_mp3(3.0)
+    tag = id3_tag(1000)
+    assert id3v2_size(tag + data) == len(tag)
+    assert mp3_duration_bytes(tag + data) == pytest.approx(mp3_duration_bytes(data))
+
+
+def test_xing_frame_count():
+    data = xing_frame(500) + silent_mp3(1.0)
+    assert is_xing_frame(data, 0)
+    assert mp3_duration_bytes(data) == pytest.approx(500 * FRAME_SECONDS)
+
+
+def test_empty_and_garbage():
+    assert mp3_duration_bytes(b'') == 0.0
+    assert mp3_duration_bytes(b'not an mp3 at all') == 0.0
+
+
+def test_probe_duration_files(tmp_path):
+    mp3_path = tmp_path / 'a.mp3'
+    mp3_path.write_bytes(silent_mp3(2.0))
+    wav_path = tmp_path / 'a.wav'
+    wav_path.write_bytes(wav_bytes(1.5))
+
+    assert probe_duration(mp3_path) == pytest.approx(mp3_duration_bytes(silent_mp3(2.0)))
+    assert probe_duration(wav_path) == pytest.approx(1.5)
+    assert wav_duration_bytes(wav_bytes(0.25)) == pytest.approx(0.25)
@@ -0,0 +1,46 @@
+"""
+Кэш фона в памяти ограничен, а хэш неизменённой картинки не
+пересчитывается.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+import background
+
+
+def make_cover(path, color):
+    Image.new('RGB', (64, 48), color).save(path)
+    return str(path)
+
+
+def test_memory_caches_are_bounded(tmp_path):
+    for i in range(background.MAX_PREPARED_FRAMES + 5):
+        cover = make_cover(tmp_path / f"cover_{i}.png", (i * 10, 0, 0))
+        frame = background.prepare_background(cover, 32, 32, cache_dir=None)
+        assert frame.shape == (32, 32, 3)
+
+    assert len(background._decoded_images) <= background.MAX_DECODED_IMAGES
+    assert len(background._prepared_frames) <= background.MAX_PREPARED_FRAMES
+
+
+def test_image_hash_is_computed_once(tmp_path, monkeypatch):
+    cover = make_cover(tmp_path / 'cover.png', (0, 128, 0))
+    calls = []
+    real_hash = background.file_hash
+    monkeypatch.setattr(background, 'file_hash', lambda path: calls.append(path) or real_hash(path))
+
+    first = background.prepare_background(cover, 16, 16, cache_dir=None)
+    second = background.prepare_background(cover, 16, 16, cache_dir=None)
+    assert first is second
+    assert len(calls) == 1
+
+    # Изменённый файл - новый хэш и новый кадр
+    make_cover(tmp_path / 'cover.png', (0, 0, 255))
+    os.utime(cover, ns=(0, 10 ** 9))
+    background.prepare_background(cover, 16, 16, cache_dir=None)
+    assert len(calls) == 2
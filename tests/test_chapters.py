@@ -0,0 +1,55 @@
+"""
+Заголовки глав по умолчанию: порядковые числительные - только из списка,
+римские цифры - только заглавными.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chapters import DEFAULT_CHAPTER_PATTERNS, compile_patterns, is_heading, split_chapters
+
+
+PATTERNS = compile_patterns(DEFAULT_CHAPTER_PATTERNS)
+
+
+@pytest.mark.parametrize('line', [
+    'Глава 1',
+    'Часть II',
+    'Глава первая. Начало',
+    'ГЛАВА ЧЕТВЁРТАЯ',
+    'Часть двадцать третья',
+    'Глава одиннадцатая',
+    'Chapter 3',
+    'CHAPTER XII: Home',
+    '# Название',
+    'IV',
+    'XIV.',
+])
+def test_heading(line):
+    assert is_heading(line, PATTERNS)
+
+
+@pytest.mark.parametrize('line', [
+    'Часть старая, часть новая.',
+    'Глава большая и добрая сидела за столом.',
+    'Mix',
+    'Civil',
+    'DC',
+    'Liv',
+    'iv',
+    'Chapter iv',
+    'Часть двадцать',
+])
+def test_not_heading(line):
+    assert not is_heading(line, PATTERNS)
+
+
+def test_split_keeps_prose_lines():
+    text = 'Глава первая\nЧасть старая, часть новая.\nMix\nII\nКонец.'
+    chapters = split_chapters(text, PATTERNS)
+    assert [chapter.title for chapter in chapters] == ['Глава первая', 'II']
+    assert 'Часть старая, часть новая.\nMix' in chapters[0].text
@@ -0,0 +1,89 @@
+"""
+Пул Coqui: аудио каждой части должно соответствовать её тексту, даже
+если текст повторяется или часть уже есть в кэше.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import text_to_speech
+from audio_cache import AudioCache
+from coqui_parallel import iter_parallel_synthesis
+
+
+class FakeJoiner:
+    def __init__(self, *args, **kwargs):
+        self.parts = []
+        FakeJoiner.last = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, data):
+        self.parts.append(data)
+
+
+def fake_synthesis(chunks, language='ru', workers=2, threads=None):
+    for chunk in chunks:
+        yield f"wav:{chunk}".encode('utf-8')
+
+
+def run_coqui(monkeypatch, tmp_path, chunks, cache):
+    monkeypatch.setattr(text_to_speech, 'COQUI_AVAILABLE', True)
+    monkeypatch.setattr(text_to_speech, 'iter_engine_chunks', lambda text, engine: iter(chunks))
+    monkeypatch.setattr(text_to_speech, 'iter_parallel_synthesis', fake_synthesis)
+    monkeypatch.setattr(text_to_speech, 'AudioJoiner', FakeJoiner)
+    text_to_speech.text_to_speech_coqui(' '.join(chunks), str(tmp_path / 'out.wav'), cache=cache,
+                                        worker_url=None, workers=2, threads=1)
+    return [part.decode('utf-8') for part in FakeJoiner.last.parts]
+
+
+def test_repeated_chunks_keep_their_audio(monkeypatch, tmp_path):
+    cache = AudioCache(tmp_path / 'cache')
+    chunks = ['A', 'B', 'A', 'C']
+    assert run_coqui(monkeypatch, tmp_path, chunks, cache) == ['wav:A', 'wav:B', 'wav:A', 'wav:C']
+
+
+def test_repeated_chunks_without_cache(monkeypatch, tmp_path):
+    chunks = ['A', 'B', 'A', 'C', 'B']
+    assert run_coqui(monkeypatch, tmp_path, chunks, None) == ['wav:A', 'wav:B', 'wav:A', 'wav:C', 'wav:B']
+
+
+def test_partly_cached_chunks(monkeypatch, tmp_path):
+    cache = AudioCache(tmp_path / 'cache')
+    voice = f"{text_to_speech.COQUI_MODEL}:ru"
+    cache.put('B', 'coqui', voice, '', b'wav:B', ext='wav')
+    chunks = ['A', 'B', 'C', 'A']
+    assert run_coqui(monkeypatch, tmp_path, chunks, cache) == ['wav:A', 'wav:B', 'wav:C', 'wav:A']
+
+
+def test_pool_without_tts_uses_worker(monkeypatch, tmp_path):
+    monkeypatch.setattr(text_to_speech, 'COQUI_AVAILABLE', False)
+    monkeypatch.setattr(text_to_speech, 'iter_engine_chunks', lambda text, engine: iter(['A', 'B']))
+    monkeypatch.setattr(text_to_speech, 'AudioJoiner', FakeJoiner)
+    monkeypatch.setattr(text_to_speech, 'worker_info', lambda url: {'model': text_to_speech.COQUI_MODEL})
+    monkeypatch.setattr(text_to_speech, 'synthesize_remote',
+                        lambda chunk, language, url: f"remote:{chunk}".encode('utf-8'))
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("пул не должен запускаться без TTS")
+
+    monkeypatch.setattr(text_to_speech, 'iter_parallel_synthesis', no_pool)
+    text_to_speech.text_to_speech_coqui('A B', str(tmp_path / 'out.wav'), worker_url='http://worker',
+                                        workers=2, threads=1)
+    assert FakeJoiner.last.parts == [b'remote:A', b'remote:B']
+
+
+def test_pool_reports_model_load_failure():
+    # Модели с таким именем нет (а без TTS не будет и импорта) - ошибка
+    # должна дойти до вызывающего, а не повесить пул
+    synthesis = iter_parallel_synthesis(['A', 'B'], workers=2, threads=1, model_name='no/such/model')
+    with pytest.raises(RuntimeError, match='не загрузил модель'):
+        next(synthesis)
@@ -0,0 +1,84 @@
+"""
+Журнал задачи: готовые части переживают обрыв, с --resume заново
+озвучиваются только недостающие или изменённые.
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edge_synth import iter_synthesized_chunks, speed_to_rate
+from job_manifest import ChunkManifest, job_id
+from synthetic_tts import SyntheticEngine, synthesize
+
+CHUNKS = [f"Часть номер {i}." for i in range(6)]
+
+
+def synthesize_all(chunks, manifest):
+    engine = SyntheticEngine()
+
+    async def run():
+        return [chunk async for chunk in iter_synthesized_chunks(chunks, 'voice', '+0%', 2,
+                                                                 manifest=manifest, pool=engine)]
+
+    return asyncio.run(run()), engine.requests
+
+
+def test_resume_synthesizes_only_missing_chunks(tmp_path):
+    # Прерванный запуск успел записать первые три части
+    manifest = ChunkManifest(tmp_path / 'job')
+    for index, text in enumerate(CHUNKS[:3]):
+        audio, words = synthesize(text)
+        manifest.add(index, text, audio, 1.0, words)
+
+    resumed = ChunkManifest(tmp_path / 'job', resume=True)
+    chunks, requests = synthesize_all(CHUNKS, resumed)
+
+    assert [chunk.text for chunk in chunks] == CHUNKS
+    assert [chunk.audio for chunk in chunks] == [synthesize(text)[0] for text in CHUNKS]
+    assert [chunk.words for chunk in chunks] == [synthesize(text)[1] for text in CHUNKS]
+    assert resumed.resumed == 3
+    assert requests == 3
+    assert len(ChunkManifest(tmp_path / 'job', resume=True)) == len(CHUNKS)
+
+
+def test_changed_text_is_not_reused(tmp_path):
+    manifest = ChunkManifest(tmp_path / 'job')
+    audio, words = synthesize(CHUNKS[0])
+    manifest.add(0, CHUNKS[0], audio, 1.0, words)
+
+    resumed = ChunkManifest(tmp_path / 'job', resume=True)
+    assert resumed.get(0, '  Часть   номер 0. ') is not None
+    assert resumed.get(0, 'Другой текст.') is None
+    assert not resumed.contains(1, CHUNKS[1])
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    manifest = ChunkManifest(tmp_path / 'job')
+    for index in range(2):
+        manifest.add(index, CHUNKS[index], synthesize(CHUNKS[index])[0], 1.0)
+    with open(manifest.path, 'a', encoding='utf-8') as f:
+        f.write('{"index": 2, "hash": "ab')
+
+    resumed = ChunkManifest(tmp_path / 'job', resume=True)
+    assert sorted(resumed.entries) == [0, 1]
+
+
+def test_new_job_and_finish_remove_chunks(tmp_path):
+    manifest = ChunkManifest(tmp_path / 'job')
+    manifest.add(0, CHUNKS[0], b'data', 1.0)
+
+    fresh = ChunkManifest(tmp_path / 'job')
+    assert len(fresh) == 0
+    assert not (tmp_path / 'job' / 'chunk_00000.mp3').exists()
+
+    fresh.finish()
+    assert not (tmp_path / 'job').exists()
+
+
+def test_job_id_uses_rate_string():
+    # text_to_speech и text_to_video передают скорость одинаково ("+10%")
+    assert job_id('out.mp3', 'edge', 'voice', speed_to_rate(1.1)) == job_id('out.mp3', 'edge', 'voice', '+10%')
+    assert job_id('out.mp3', 'edge', 'voice', '+10%') != job_id('out.mp3', 'edge', 'voice', '+0%')
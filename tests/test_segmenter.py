@@ -0,0 +1,73 @@
+"""
+Общее разбиение текста: предложения со знаками препинания, части в
+пределах бюджета движка, ленивость генераторов.
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from segmenter import CHUNK_BUDGETS, iter_chunks, iter_engine_chunks, iter_phrases, iter_sentences
+
+
+def random_text(seed, sentences=300):
+    rng = random.Random(seed)
+    words = ['слово', 'длинное', 'предложение', 'тест', 'озвучка', 'и', 'он', 'x' * 40]
+    result = []
+    for _ in range(sentences):
+        sentence = ' '.join(rng.choice(words) for _ in range(rng.randint(1, 60)))
+        end = rng.choice(['.', '!', '?', '…', '.»', '!»', '?)'])
+        result.append(sentence.capitalize() + end)
+    return ' '.join(result)
+
+
+def test_sentences_keep_punctuation_and_quotes():
+    text = 'Он сказал: «Да!» Потом ушёл… Правда? (Нет.) Конец'
+    assert list(iter_sentences(text)) == ['Он сказал: «Да!»', 'Потом ушёл…', 'Правда?', '(Нет.)', 'Конец']
+
+
+@pytest.mark.parametrize('engine', sorted(CHUNK_BUDGETS))
+def test_chunks_fit_engine_budget(engine):
+    text = random_text(1)
+    chunks = list(iter_engine_chunks(text, engine))
+    assert all(len(chunk) <= CHUNK_BUDGETS[engine] for chunk in chunks)
+    # Ни один символ не теряется и не дублируется
+    assert ' '.join(chunks).split() == text.split()
+
+
+def test_short_sentences_are_not_split():
+    text = 'Первое. Второе предложение! Третье? «Четвёртое.» Пятое…'
+    sentences = list(iter_sentences(text))
+    chunks = list(iter_chunks(text, 30))
+    # Каждая часть - целые предложения подряд
+    assert [s for chunk in chunks for s in iter_sentences(chunk)] == sentences
+    assert all(len(chunk) <= 30 for chunk in chunks)
+
+
+def test_long_sentence_is_cut_on_spaces():
+    sentence = ' '.join(['слово'] * 100) + '.'
+    pieces = list(iter_chunks(sentence, 64))
+    assert all(len(piece) <= 64 for piece in pieces)
+    assert all(word == 'слово' or word == 'слово.' for piece in pieces for word in piece.split())
+
+
+def test_engine_without_budget_gets_whole_text():
+    assert list(iter_engine_chunks('  Весь текст. Целиком.  ', 'pyttsx3')) == ['Весь текст. Целиком.']
+    assert list(iter_engine_chunks('   ', 'pyttsx3')) == []
+
+
+def test_chunks_are_lazy():
+    # Первая часть готова без разбора всего текста
+    chunks = iter_chunks('Раз. ' * 100000, 20)
+    assert next(chunks) == 'Раз. Раз. Раз. Раз.'
+
+
+def test_phrases_split_after_commas():
+    text = 'Короткое предложение. ' + ', '.join(['один два три'] * 5) + '.'
+    phrases = list(iter_phrases(text, max_words=10))
+    assert phrases[0] == 'Короткое предложение.'
+    assert phrases[1:] == ['один два три,'] * 4 + ['один два три.']
@@ -0,0 +1,66 @@
+"""
+Субтитры по границам слов: сдвиг частей по длительности аудио, знаки
+препинания из исходного текста, разбиение на реплики и формат SRT/VTT.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_probe import mp3_duration_bytes
+from subtitles import Cue, SubtitleTrack, format_srt, format_vtt, write_cues
+from synthetic_tts import synthesize
+
+
+def track_for(chunks):
+    track = SubtitleTrack()
+    for text in chunks:
+        audio, words = synthesize(text)
+        track.add_chunk(text, words, mp3_duration_bytes(audio))
+    return track
+
+
+def test_chunks_are_offset_by_audio_duration():
+    first, second = 'Первая часть.', 'Вторая часть.'
+    audio, _ = synthesize(first)
+    track = track_for([first, second])
+
+    assert [w[2] for w in track.words] == ['Первая', 'часть.', 'Вторая', 'часть.']
+    assert track.words[2][0] == pytest.approx(mp3_duration_bytes(audio))
+    assert all(a[0] <= b[0] for a, b in zip(track.words, track.words[1:]))
+
+
+def test_punctuation_and_quotes_stay_with_words():
+    track = track_for(['Он сказал: «Да, конечно!» И ушёл.'])
+    assert [w[2] for w in track.words] == ['Он', 'сказал:', '«Да,', 'конечно!»', 'И', 'ушёл.']
+    assert [cue.text for cue in track.cues()] == ['Он сказал: «Да, конечно!»', 'И ушёл.']
+
+
+def test_cue_limits():
+    track = track_for([' '.join(['слово'] * 40) + '.'])
+    cues = track.cues(max_chars=30)
+    assert len(cues) > 1
+    assert all(len(cue.text) <= 30 for cue in cues)
+    assert all(cue.end - cue.start <= 6.0 for cue in track.cues())
+    assert ' '.join(cue.text for cue in cues) == ' '.join(['слово'] * 40) + '.'
+
+
+def test_srt_and_vtt_timing(tmp_path):
+    cues = [Cue(0.0, 1.2345, 'Первая.'), Cue(3661.5, 3662.0, 'Вторая.')]
+
+    assert format_srt(cues) == (
+        "1\n00:00:00,000 --> 00:00:01,234\nПервая.\n\n"
+        "2\n01:01:01,500 --> 01:01:02,000\nВторая.\n"
+    )
+    assert format_vtt(cues) == (
+        "WEBVTT\n\n00:00:00.000 --> 00:00:01.234\nПервая.\n\n"
+        "01:01:01.500 --> 01:01:02.000\nВторая.\n"
+    )
+
+    write_cues(tmp_path / 'a.vtt', cues)
+    write_cues(tmp_path / 'a.srt', cues)
+    assert (tmp_path / 'a.vtt').read_text(encoding='utf-8').startswith('WEBVTT')
+    assert (tmp_path / 'a.srt').read_text(encoding='utf-8').startswith('1\n')
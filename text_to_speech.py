@@ -4,11 +4,27 @@
 Поддерживает несколько TTS движков для качественной озвучки рассказов.
 """
 
+import io
 import os
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 import argparse
 
+from audio_cache import AudioCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE_MB
+from audio_concat import AudioJoiner
+from audio_post import DEFAULT_LOUDNESS, postprocess_in_place
+from audio_probe import mp3_duration_bytes, wav_duration_bytes
+from coqui_worker import COQUI_MODEL, DEFAULT_WORKER_URL, worker_info, synthesize_remote
+from coqui_parallel import iter_parallel_synthesis, default_threads
+from edge_synth import speed_to_rate
+from segmenter import iter_engine_chunks
+from job_manifest import ChunkManifest
+from synthetic_tts import synthesize as synthesize_silence
+from profiling import start_profile, stage, HOTTEST
+
 try:
     from gtts import gTTS
     GTTS_AVAILABLE = True
@@ -27,94 +43,85 @@ try:
 except ImportError:
     COQUI_AVAILABLE = False
 
+# edge_session импортирует edge_tts и aiohttp - без них Edge недоступен
 try:
-    import edge_tts
     import asyncio
+    from edge_synth import iter_synthesized_chunks
+    from edge_session import EdgeSessionPool
     EDGE_TTS_AVAILABLE = True
 except ImportError:
     EDGE_TTS_AVAILABLE = False
 
 
-def split_text(text, max_length=4500):
+# Сколько частей gTTS запрашивать параллельно, если -j не указан
+GTTS_CONCURRENCY = 4
+
+
+def _gtts_fetch(index, chunk, language, cache=None, manifest=None):
     """
-    Разбивает длинный текст на части для обработки.
-    Старается разбивать по предложениям.
+    Синтезирует одну часть через gTTS в память
     """
-    if len(text) <= max_length:
-        return [text]
-
-    sentences = text.replace('!', '.').replace('?', '.').split('.')
-    chunks = []
-    current_chunk = ""
+    if manifest is not None:
+        done = manifest.get(index, chunk)
+        if done is not None:
+            return done[0]
 
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
+    data = cache.get(chunk, 'gtts', language, 'com') if cache is not None else None
+    if data is None:
+        data = _gtts_synthesize(chunk, language)
+        if cache is not None:
+            cache.put(chunk, 'gtts', language, 'com', data)
 
-        if len(current_chunk) + len(sentence) + 2 <= max_length:
-            current_chunk += sentence + ". "
-        else:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = sentence + ". "
+    if manifest is not None:
+        manifest.add(index, chunk, data, mp3_duration_bytes(data))
+    return data
 
-    if current_chunk:
-        chunks.append(current_chunk.strip())
 
-    return chunks
+def _gtts_synthesize(chunk, language):
+    """
+    Один запрос к gTTS: MP3 части в байтах
+    """
+    # tld='com' даёт более чёткий голос для русского
+    tts = gTTS(text=chunk, lang=language, slow=False, tld='com')
+    buffer = io.BytesIO()
+    tts.write_to_fp(buffer)
+    return buffer.getvalue()
 
 
-def text_to_speech_gtts(text, output_file, language='ru', speed=1.0):
+def text_to_speech_gtts(text, output_file, language='ru', speed=1.0, cache=None,
+                        concurrency=GTTS_CONCURRENCY, manifest=None, loudness=None):
     """
     Google Text-to-Speech (gTTS) - простой и быстрый вариант.
     Качество среднее, но стабильное.
+    Части запрашиваются параллельно (до concurrency одновременно) и
+    собираются в памяти в исходном порядке, без временных файлов.
+    manifest (ChunkManifest) - журнал готовых частей для --resume.
+    loudness - целевая громкость в LUFS (в том же проходе, что и скорость).
     """
     if speed != 1.0:
         print(f"Использую Google TTS (gTTS) со скоростью {speed}x...")
     else:
         print("Использую Google TTS (gTTS)...")
 
-    chunks = split_text(text)
-    temp_files = []
-
-    for i, chunk in enumerate(chunks):
-        print(f"Обработка части {i+1}/{len(chunks)}...")
-        temp_file = f"temp_chunk_{i}.mp3"
-        # tld='com' даёт более чёткий голос для русского
-        tts = gTTS(text=chunk, lang=language, slow=False, tld='com')
-        tts.save(temp_file)
-        temp_files.append(temp_file)
-
-    # Объединяем файлы и ускоряем
-    try:
-        from pydub import AudioSegment
-        from pydub.playback import play
-
-        if len(temp_files) == 1:
-            audio = AudioSegment.from_mp3(temp_files[0])
-            os.remove(temp_files[0])
-        else:
-            print("Объединяю части...")
-            combined = AudioSegment.empty()
-            for temp_file in temp_files:
-                audio = AudioSegment.from_mp3(temp_file)
-                combined += audio
-                os.remove(temp_file)
-            audio = combined
-
-        # Ускоряем речь без изменения тона
-        if speed != 1.0:
-            print(f"Применяю ускорение {speed}x...")
-            audio = audio.speedup(playback_speed=speed)
-
-        # Экспортируем с высоким битрейтом для качества
-        audio.export(output_file, format="mp3", bitrate="192k")
+    chunks = list(iter_engine_chunks(text, 'gtts'))
+    workers = max(1, min(concurrency, len(chunks)))
+    print(f"Текст разбит на {len(chunks)} частей, параллельно до {workers} запросов")
 
-    except ImportError:
-        print("Для обработки аудио установите pydub: pip install pydub")
-        print(f"Сохранены отдельные файлы: {temp_files}")
-        return
+    if speed != 1.0:
+        print(f"Ускорение {speed}x будет применено после склейки")
+
+    # Части склеиваются кадрами по мере готовности; декодирование нужно
+    # только для ускорения
+    with AudioJoiner(output_file, 'mp3', speed, loudness=loudness) as joiner:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map отдаёт результаты в порядке частей
+            done = 0
+            fetch = partial(_gtts_fetch, language=language, cache=cache, manifest=manifest)
+            for part in pool.map(fetch, range(len(chunks)), chunks):
+                joiner.add(part)
+                done += 1
+                print(f"Готово частей: {done}/{len(chunks)}", end='\r')
+        print()
 
     print(f"✓ Аудио сохранено: {output_file}")
 
@@ -160,61 +167,129 @@ def text_to_speech_pyttsx3(text, output_file, speed=180):
     print(f"✓ Аудио сохранено: {output_file}")
 
 
-def text_to_speech_coqui(text, output_file, language='ru'):
+def text_to_speech_coqui(text, output_file, language='ru', cache=None, worker_url=DEFAULT_WORKER_URL,
+                         workers=1, threads=None, manifest=None, speed=1.0, loudness=None):
     """
     Coqui TTS - высококачественный открытый TTS.
     Лучшее бесплатное качество, но требует больше ресурсов.
+    Если запущен coqui_worker.py, части озвучиваются им и модель
+    не загружается заново. При workers > 1 части озвучиваются пулом
+    процессов на CPU, у каждого своя модель и threads потоков torch.
+    manifest (ChunkManifest) - журнал готовых частей для --resume.
+    speed и loudness применяются после склейки одним проходом ffmpeg.
     """
     print("Использую Coqui TTS (высокое качество)...")
-
-    # Инициализация модели
-    # Для русского языка используем многоязычную модель
-    tts = TTS(model_name="tts_models/multilingual/multi-dataset/xtts_v2")
+    if speed != 1.0:
+        print(f"Ускорение {speed}x будет применено после склейки")
+
+    # Пул процессов запрошен явно - сервис не используем. Без TTS пул
+    # загрузить модель не сможет, тогда остаётся только сервис.
+    use_pool = workers > 1 and COQUI_AVAILABLE
+    if workers > 1 and not COQUI_AVAILABLE:
+        print("Предупреждение: Coqui TTS не установлен, пул процессов недоступен - использую сервис")
+    worker = worker_info(worker_url) if worker_url and not use_pool else None
+    if worker is not None and worker.get('model') != COQUI_MODEL:
+        print(f"Предупреждение: сервис Coqui использует другую модель ({worker.get('model')}), не использую его")
+        worker = None
+    if worker is not None:
+        print(f"Использую запущенный сервис Coqui: {worker_url}")
+
+    # Модель загружается только при первом промахе кэша
+    tts = None
 
     # Разбиваем текст на части
-    chunks = split_text(text, max_length=500)  # Coqui лучше работает с короткими фрагментами
-    temp_files = []
-
-    for i, chunk in enumerate(chunks):
-        print(f"Обработка части {i+1}/{len(chunks)}...")
-        temp_file = f"temp_chunk_{i}.wav"
-        tts.tts_to_file(
-            text=chunk,
-            file_path=temp_file,
-            language=language
-        )
-        temp_files.append(temp_file)
-
-    # Объединяем файлы
-    if len(temp_files) == 1:
-        os.rename(temp_files[0], output_file)
-    else:
-        print("Объединяю части...")
-        try:
-            from pydub import AudioSegment
-            combined = AudioSegment.empty()
-            for temp_file in temp_files:
-                audio = AudioSegment.from_wav(temp_file)
-                combined += audio
+    # Coqui лучше работает с короткими фрагментами
+    chunks = list(iter_engine_chunks(text, 'coqui'))
+    voice = f"{COQUI_MODEL}:{language}"
+
+    # Части, которых нет в кэше, озвучиваются пулом заранее по очереди.
+    # Одинаковый текст озвучивается один раз; результаты привязаны к тексту,
+    # а не к очереди, так что повтор части или изменение кэша во время
+    # цикла не сдвигают аудио на соседние части.
+    synthesis = None
+    pooled = None
+    pooled_results = {}
+    missing_set = set()
+    if use_pool:
+        missing = list(dict.fromkeys(
+            chunk for i, chunk in enumerate(chunks)
+            if (manifest is None or not manifest.contains(i, chunk))
+            and (cache is None or not cache.contains(chunk, 'coqui', voice, '', ext='wav'))
+        ))
+        threads = threads or default_threads(workers)
+        print(f"Пул Coqui: {workers} процессов по {threads} потоков, частей к озвучке: {len(missing)}")
+        synthesis = iter_parallel_synthesis(missing, language, workers, threads)
+        pooled = zip(missing, synthesis)
+        missing_set = set(missing)
+    # Последнее вхождение текста - после него результат пула не нужен
+    last_index = {chunk: i for i, chunk in enumerate(chunks)}
+
+    # Модель пишет только в файл - даём ей собственную временную директорию,
+    # чтобы параллельные запуски не перезаписывали части друг друга.
+    # WAV части сразу дописываются в общий файл; для .mp3 в конце одно кодирование.
+    with AudioJoiner(output_file, 'wav', speed, loudness=loudness) as joiner, \
+            tempfile.TemporaryDirectory(prefix='coqui_') as scratch_dir:
+        for i, chunk in enumerate(chunks):
+            print(f"Обработка части {i+1}/{len(chunks)}...")
+
+            done = manifest.get(i, chunk) if manifest is not None else None
+            if done is not None:
+                joiner.add(done[0])
+                continue
+
+            data = pooled_results.get(chunk)
+            if data is None and cache is not None:
+                data = cache.get(chunk, 'coqui', voice, '', ext='wav')
+            if data is None and chunk in missing_set:
+                # Результаты идут в порядке первых вхождений - забираем до нужного
+                while chunk not in pooled_results:
+                    text_done, wav = next(pooled)
+                    pooled_results[text_done] = wav
+                    if cache is not None:
+                        cache.put(text_done, 'coqui', voice, '', wav, ext='wav')
+                data = pooled_results[chunk]
+            elif data is None and worker is not None:
+                data = synthesize_remote(chunk, language, worker_url)
+                if cache is not None:
+                    cache.put(chunk, 'coqui', voice, '', data, ext='wav')
+            elif data is None:
+                if tts is None:
+                    # Инициализация модели
+                    # Для русского языка используем многоязычную модель
+                    with stage('model_load'):
+                        tts = TTS(model_name=COQUI_MODEL)
+
+                temp_file = os.path.join(scratch_dir, f"chunk_{i}.wav")
+                tts.tts_to_file(
+                    text=chunk,
+                    file_path=temp_file,
+                    language=language
+                )
+                with open(temp_file, 'rb') as f:
+                    data = f.read()
                 os.remove(temp_file)
+                if cache is not None:
+                    cache.put(chunk, 'coqui', voice, '', data, ext='wav')
+            if last_index[chunk] == i:
+                pooled_results.pop(chunk, None)
+            if manifest is not None:
+                manifest.add(i, chunk, data, wav_duration_bytes(data), ext='wav')
+            joiner.add(data)
 
-            # Сохраняем в формате MP3 для меньшего размера
-            if output_file.endswith('.mp3'):
-                combined.export(output_file, format="mp3", bitrate="192k")
-            else:
-                combined.export(output_file, format="wav")
-        except ImportError:
-            print("Для объединения файлов установите pydub: pip install pydub")
-            print(f"Сохранены отдельные файлы: {temp_files}")
-            return
+        if synthesis is not None:
+            synthesis.close()
 
     print(f"✓ Аудио сохранено: {output_file}")
 
 
-def text_to_speech_edge(text, output_file, voice='ru-RU-DmitryNeural', speed=1.0):
+def text_to_speech_edge(text, output_file, voice='ru-RU-DmitryNeural', speed=1.0, cache=None,
+                        concurrency=1, manifest=None, verify_ssl=True):
     """
     Edge TTS - Microsoft TTS с отличными голосами.
     Бесплатный, качественный, мужские голоса для русского.
+    Части идут по постоянным соединениям из EdgeSessionPool, без нового
+    рукопожатия на каждую часть.
+    manifest (ChunkManifest) - журнал готовых частей для --resume.
     """
     if speed != 1.0:
         print(f"Использую Microsoft Edge TTS (голос: {voice}, скорость: {speed}x)...")
@@ -224,14 +299,17 @@ def text_to_speech_edge(text, output_file, voice='ru-RU-DmitryNeural', speed=1.0
     async def _generate():
         # Преобразуем скорость в процент для Edge TTS
         # 0.8 = -20%, 1.0 = +0%, 1.3 = +30%, 1.5 = +50%
-        speed_change = int((speed - 1.0) * 100)
-        if speed_change >= 0:
-            speed_percent = f"+{speed_change}%"
-        else:
-            speed_percent = f"{speed_change}%"
-
-        communicate = edge_tts.Communicate(text, voice, rate=speed_percent)
-        await communicate.save(output_file)
+        speed_percent = speed_to_rate(speed)
+
+        # Озвучиваем по частям, чтобы неизменённые части брались из кэша.
+        # Части отправляются на синтез по мере разбиения текста.
+        chunks = iter_engine_chunks(text, 'edge')
+        async with EdgeSessionPool(concurrency, verify_ssl=verify_ssl) as pool:
+            with open(output_file, 'wb') as audio_file:
+                async for chunk in iter_synthesized_chunks(chunks, voice, speed_percent, concurrency, cache,
+                                                           manifest, pool):
+                    audio_file.write(chunk.audio)
+            print(pool.format_stats())
 
     # Запускаем асинхронную функцию
     asyncio.run(_generate())
@@ -239,6 +317,21 @@ def text_to_speech_edge(text, output_file, voice='ru-RU-DmitryNeural', speed=1.0
     print(f"✓ Аудио сохранено: {output_file}")
 
 
+def text_to_speech_synthetic(text, output_file, speed=1.0):
+    """
+    Синтетический движок - тишина длиной по тексту, без сети.
+    Для проверок и бенчмарков: результат детерминирован.
+    """
+    print("Использую синтетический движок (тишина длиной по тексту)...")
+
+    with open(output_file, 'wb') as audio_file:
+        for chunk in iter_engine_chunks(text, 'synthetic'):
+            audio, _ = synthesize_silence(chunk, speed)
+            audio_file.write(audio)
+
+    print(f"✓ Аудио сохранено: {output_file}")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Конвертация текста в речь с использованием бесплатных TTS'
@@ -254,9 +347,10 @@ def main():
     )
     parser.add_argument(
         '-e', '--engine',
-        choices=['edge', 'gtts', 'pyttsx3', 'coqui', 'auto'],
+        choices=['edge', 'gtts', 'pyttsx3', 'coqui', 'synthetic', 'auto'],
         default='auto',
-        help='TTS движок (по умолчанию: auto - выбирает лучший доступный)'
+        help='TTS движок (по умолчанию: auto - выбирает лучший доступный; '
+             'synthetic - тишина длиной по тексту, без сети)'
     )
     parser.add_argument(
         '-v', '--voice',
@@ -274,9 +368,81 @@ def main():
         default=1.0,
         help='Скорость речи: 1.0 = нормально (по умолчанию), 1.3 = быстрее, 0.8 = медленнее'
     )
+    parser.add_argument(
+        '-j', '--tts-concurrency',
+        type=int,
+        default=None,
+        help=f'Сколько частей текста синтезировать параллельно '
+             f'(по умолчанию: 1 для Edge TTS, {GTTS_CONCURRENCY} для gTTS)'
+    )
+    parser.add_argument(
+        '--coqui-workers',
+        type=int,
+        default=1,
+        help='Процессов Coqui для параллельной озвучки на CPU (по умолчанию: 1)'
+    )
+    parser.add_argument(
+        '--coqui-threads',
+        type=int,
+        default=None,
+        help='Потоков torch на процесс Coqui (по умолчанию: ядра поровну между процессами)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Не использовать кэш синтезированных частей аудио'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=str(DEFAULT_CACHE_DIR),
+        help=f'Директория кэша аудио (по умолчанию: {DEFAULT_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=DEFAULT_MAX_SIZE_MB,
+        help=f'Максимальный размер кэша аудио в МБ (по умолчанию: {DEFAULT_MAX_SIZE_MB})'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Продолжить прерванную озвучку: синтезировать только недостающие части'
+    )
+    parser.add_argument(
+        '--insecure-ssl',
+        action='store_true',
+        help='Не проверять SSL сертификат Edge TTS (только если у сервиса истёк сертификат)'
+    )
+    parser.add_argument(
+        '--loudness',
+        metavar='LUFS',
+        type=float,
+        nargs='?',
+        const=DEFAULT_LOUDNESS,
+        default=None,
+        help=f'Выровнять громкость (EBU R128) до LUFS; без значения - {DEFAULT_LOUDNESS:g} '
+             f'(по умолчанию: не выравнивать)'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Записать время, процессорное время и пик памяти каждого этапа в <результат>.profile.json'
+    )
+    parser.add_argument(
+        '--cprofile',
+        metavar='STAGE',
+        nargs='?',
+        const=HOTTEST,
+        default=None,
+        help='Вместе с --profile снять cProfile этапа (read, tts); без значения - самого долгого'
+    )
 
     args = parser.parse_args()
 
+    if not args.speed > 0:
+        print(f"Ошибка: скорость речи должна быть больше нуля (--speed {args.speed})")
+        sys.exit(1)
+
     # Определяем директории
     SRC_DIR = Path('src')
     OUTPUT_DIR = Path('output')
@@ -288,6 +454,9 @@ def main():
     input_file_path = SRC_DIR / args.input_file
     output_file_path = OUTPUT_DIR / args.output
 
+    if args.profile or args.cprofile:
+        start_profile(output_file_path.with_suffix('.profile.json'), args.cprofile)
+
     # Проверяем существование входного файла
     if not input_file_path.exists():
         print(f"Ошибка: файл '{input_file_path}' не найден")
@@ -295,7 +464,7 @@ def main():
 
     # Читаем текст
     print(f"Читаю текст из {input_file_path}...")
-    with open(input_file_path, 'r', encoding='utf-8') as f:
+    with stage('read'), open(input_file_path, 'r', encoding='utf-8') as f:
         text = f.read().strip()
 
     if not text:
@@ -324,39 +493,76 @@ def main():
             print("Установите хотя бы один: pip install edge-tts или pip install gTTS")
             sys.exit(1)
 
+    cache = None if args.no_cache else AudioCache(args.cache_dir, args.cache_size)
+
+    # Готовые части сохраняются в журнал задачи, чтобы после сбоя
+    # можно было продолжить с --resume
+    manifest = None
+    if engine in ('edge', 'gtts', 'coqui'):
+        voice = {'edge': args.voice, 'gtts': args.language, 'coqui': f"{COQUI_MODEL}:{args.language}"}[engine]
+        # Скорость в ключе задачи - как в text_to_video ("+20%"), чтобы
+        # журналы обоих скриптов совпадали
+        manifest = ChunkManifest.for_job(output_file_path, engine, voice, speed_to_rate(args.speed), args.resume)
+        if args.resume:
+            print(f"Продолжаю задачу: готовых частей в журнале {len(manifest)}")
+
     # Генерируем речь
     try:
-        if engine == 'edge':
-            if not EDGE_TTS_AVAILABLE:
-                print("Ошибка: Edge TTS не установлен. Установите: pip install edge-tts")
-                sys.exit(1)
-            text_to_speech_edge(text, output_file_path, args.voice, args.speed)
-
-        elif engine == 'gtts':
-            if not GTTS_AVAILABLE:
-                print("Ошибка: gTTS не установлен. Установите: pip install gTTS")
-                sys.exit(1)
-            text_to_speech_gtts(text, output_file_path, args.language, args.speed)
-
-        elif engine == 'pyttsx3':
-            if not PYTTSX3_AVAILABLE:
-                print("Ошибка: pyttsx3 не установлен. Установите: pip install pyttsx3")
-                sys.exit(1)
-            # pyttsx3 использует разные единицы скорости (слова в минуту)
-            pyttsx3_speed = int(args.speed * 150)  # базовая скорость 150
-            text_to_speech_pyttsx3(text, output_file_path, pyttsx3_speed)
-
-        elif engine == 'coqui':
-            if not COQUI_AVAILABLE:
-                print("Ошибка: Coqui TTS не установлен.")
-                print("Установите: pip install TTS")
-                sys.exit(1)
-            text_to_speech_coqui(text, output_file_path, args.language)
-
+        with stage('tts'):
+            if engine == 'edge':
+                if not EDGE_TTS_AVAILABLE:
+                    print("Ошибка: Edge TTS не установлен. Установите: pip install edge-tts")
+                    sys.exit(1)
+                text_to_speech_edge(text, output_file_path, args.voice, args.speed, cache,
+                                    args.tts_concurrency or 1, manifest, not args.insecure_ssl)
+
+            elif engine == 'gtts':
+                if not GTTS_AVAILABLE:
+                    print("Ошибка: gTTS не установлен. Установите: pip install gTTS")
+                    sys.exit(1)
+                text_to_speech_gtts(text, output_file_path, args.language, args.speed, cache,
+                                    args.tts_concurrency or GTTS_CONCURRENCY, manifest, args.loudness)
+
+            elif engine == 'pyttsx3':
+                if not PYTTSX3_AVAILABLE:
+                    print("Ошибка: pyttsx3 не установлен. Установите: pip install pyttsx3")
+                    sys.exit(1)
+                # pyttsx3 использует разные единицы скорости (слова в минуту)
+                pyttsx3_speed = int(args.speed * 150)  # базовая скорость 150
+                text_to_speech_pyttsx3(text, output_file_path, pyttsx3_speed)
+
+            elif engine == 'coqui':
+                if not COQUI_AVAILABLE and worker_info() is None:
+                    print("Ошибка: Coqui TTS не установлен и сервис coqui_worker.py не запущен.")
+                    print("Установите: pip install TTS")
+                    sys.exit(1)
+                text_to_speech_coqui(text, output_file_path, args.language, cache,
+                                     workers=args.coqui_workers, threads=args.coqui_threads,
+                                     manifest=manifest, speed=args.speed, loudness=args.loudness)
+
+            elif engine == 'synthetic':
+                text_to_speech_synthetic(text, output_file_path, args.speed)
+
+        # gTTS и Coqui выравнивают громкость при склейке, остальным нужен
+        # отдельный проход
+        if args.loudness is not None and engine not in ('gtts', 'coqui'):
+            print(f"Выравниваю громкость до {args.loudness:g} LUFS...")
+            with stage('audio_post'):
+                postprocess_in_place(output_file_path, loudness=args.loudness)
+
+        if cache is not None and engine not in ('pyttsx3', 'synthetic'):
+            print(cache.format_stats())
+        if manifest is not None:
+            if manifest.resumed:
+                print(f"Взято из журнала задачи частей: {manifest.resumed}")
+            manifest.finish()
         print("\n✓ Готово!")
 
     except Exception as e:
         print(f"Ошибка при генерации речи: {e}")
+        if manifest is not None and len(manifest):
+            print(f"Готовых частей сохранено: {len(manifest)}. "
+                  f"Чтобы продолжить, повторите команду с --resume")
         sys.exit(1)
 
 
@@ -6,73 +6,46 @@
 import os
 import sys
 import argparse
+import asyncio
 import subprocess
 import tempfile
-import ssl
-import certifi
+from importlib.util import find_spec
 from pathlib import Path
 
-try:
-    from moviepy import (
-        AudioFileClip,
-        TextClip,
-        CompositeVideoClip,
-        ColorClip,
-        concatenate_videoclips
-    )
-    MOVIEPY_AVAILABLE = True
-except ImportError:
-    try:
-        # Попробуем старый путь импорта
-        from moviepy.editor import (
-            AudioFileClip,
-            TextClip,
-            CompositeVideoClip,
-            ColorClip,
-            concatenate_videoclips
-        )
-        MOVIEPY_AVAILABLE = True
-    except ImportError:
-        MOVIEPY_AVAILABLE = False
-
-try:
-    import edge_tts
-    import asyncio
-    EDGE_TTS_AVAILABLE = True
-
-    # ВРЕМЕННОЕ РЕШЕНИЕ: Патчим edge_tts для обхода истекшего сертификата Microsoft
-    # Заменяем создание SSL контекста в модуле edge_tts
-    import edge_tts.communicate
-    original_ssl_create = ssl.create_default_context
-
-    def patched_ssl_create(*args, **kwargs):
-        ctx = original_ssl_create(*args, **kwargs)
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-        return ctx
-
-    # Патчим модуль ssl внутри edge_tts.communicate
-    edge_tts.communicate.ssl.create_default_context = patched_ssl_create
-
-except ImportError:
-    EDGE_TTS_AVAILABLE = False
-
-from add_yo import add_yo
-
-# Устанавливаем путь к сертификатам certifi для SSL соединений
-# Пробуем несколько источников сертификатов
-cert_paths = [
-    certifi.where(),  # certifi пакет
-    '/tmp/cacert.pem',  # Загруженные сертификаты
-    '/etc/ssl/cert.pem',  # Системные сертификаты macOS
-    '/private/etc/ssl/cert.pem',  # Альтернативный путь на macOS
-]
-
-for cert_path in cert_paths:
-    if os.path.exists(cert_path):
-        os.environ['SSL_CERT_FILE'] = cert_path
-        print(f"Используются SSL сертификаты: {cert_path}")
-        break
+# Тяжёлые зависимости (moviepy - секунды, edge_tts и aiohttp - сотни мс)
+# загружаются только этапами, которым они нужны. Здесь - лишь проверка,
+# что они установлены.
+MOVIEPY_AVAILABLE = find_spec('moviepy') is not None
+EDGE_TTS_AVAILABLE = find_spec('edge_tts') is not None and find_spec('aiohttp') is not None
+
+from add_yo import add_yo, is_processed
+from audio_cache import AudioCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE_MB
+from ffmpeg_tools import run_ffmpeg, get_ffmpeg_binary
+from audio_probe import probe_duration, mp3_duration_bytes
+from subtitles import SubtitleTrack, Cue, write_cues
+from fonts import find_font_path
+from segmenter import iter_engine_chunks, iter_phrases
+from job_manifest import ChunkManifest
+from synthetic_tts import SyntheticEngine
+from edge_synth import speed_to_rate, iter_synthesized_chunks, session_pool, SAMPLE_RATE
+from profiling import start_profile, stage, HOTTEST
+from audio_post import DEFAULT_LOUDNESS, audio_filters, postprocess_in_place
+from poster import PosterSpec, parse_presets, render_poster, render_posters, save_poster
+from chapters import (DEFAULT_CHAPTER_PATTERNS, ChapterStore, chapter_key, chapter_starts, compile_patterns,
+                      concat_chapters, split_chapters)
+
+
+def load_moviepy():
+    """
+    Модуль moviepy с клипами. Импортируется только в режимах, где кадры
+    собирает moviepy (compose и вшитые субтитры).
+    """
+    import moviepy
+    if hasattr(moviepy, 'AudioFileClip'):
+        return moviepy
+    # Старый путь импорта (moviepy 1.x)
+    import moviepy.editor
+    return moviepy.editor
 
 
 def split_text_to_sentences(text, max_words=10):
@@ -80,67 +53,61 @@ def split_text_to_sentences(text, max_words=10):
     Разбивает текст на предложения для субтитров.
     Старается не превышать max_words слов в одном субтитре.
     """
-    # Разбиваем по знакам препинания
-    import re
-
-    # Разделяем по точкам, восклицательным и вопросительным знакам
-    sentences = re.split(r'([.!?…]\s+)', text)
-
-    # Объединяем предложения с их знаками препинания
-    result = []
-    for i in range(0, len(sentences)-1, 2):
-        sentence = sentences[i]
-        punctuation = sentences[i+1] if i+1 < len(sentences) else ''
-        full_sentence = (sentence + punctuation).strip()
-
-        if full_sentence:
-            # Если предложение слишком длинное, разбиваем по запятым
-            words = full_sentence.split()
-            if len(words) > max_words:
-                parts = full_sentence.split(',')
-                for part in parts:
-                    if part.strip():
-                        result.append(part.strip())
-            else:
-                result.append(full_sentence)
-
-    # Последнее предложение если есть
-    if len(sentences) % 2 == 1 and sentences[-1].strip():
-        result.append(sentences[-1].strip())
-
-    return result
+    return list(iter_phrases(text, max_words))
 
 
-async def generate_audio(text, output_audio, voice='ru-RU-DmitryNeural', speed=1.0):
+async def generate_audio(text, output_audio, voice='ru-RU-DmitryNeural', speed=1.0, concurrency=1,
+                         cache=None, subtitle_paths=(), subtitle_track=None, manifest=None,
+                         pool=None, verify_ssl=True):
     """
-    Генерирует аудио и возвращает длительность
+    Генерирует аудио и возвращает длительность.
+    Текст режется по предложениям на части, которые синтезируются
+    параллельно (до concurrency) и склеиваются в исходном порядке.
+    subtitle_paths - куда сохранить субтитры (.srt/.vtt) по границам слов
+    из Edge TTS; subtitle_track - SubtitleTrack, который нужно заполнить
+    (например, для вшитых субтитров).
+    manifest (ChunkManifest) - журнал готовых частей для --resume.
+    pool (EdgeSessionPool) - общие соединения с сервисом; если не передан,
+    открывается свой пул на время озвучки.
     """
     # Преобразуем скорость в процент для Edge TTS
-    speed_change = int((speed - 1.0) * 100)
-    if speed_change >= 0:
-        speed_percent = f"+{speed_change}%"
-    else:
-        speed_percent = f"{speed_change}%"
+    speed_percent = speed_to_rate(speed)
 
     # Генерируем аудио
     print(f"Генерирую аудио с голосом {voice}...")
-    print("ВНИМАНИЕ: Проверка SSL сертификатов отключена из-за истекшего сертификата Microsoft")
-
-    communicate = edge_tts.Communicate(text, voice, rate=speed_percent)
-
-    # Сохраняем аудио
-    with open(output_audio, 'wb') as audio_file:
-        async for chunk in communicate.stream():
-            if chunk["type"] == "audio":
-                audio_file.write(chunk["data"])
-
-    # Получаем длительность аудио
-    temp_audio_clip = AudioFileClip(output_audio)
-    total_duration = temp_audio_clip.duration
-    temp_audio_clip.close()
-
-    return total_duration
-
+    if not verify_ssl:
+        print("ВНИМАНИЕ: Проверка SSL сертификата Edge TTS отключена")
+
+    track = subtitle_track
+    if track is None and subtitle_paths:
+        track = SubtitleTrack()
+
+    # Части уходят на синтез по мере разбиения текста
+    chunks = iter_engine_chunks(text, 'edge')
+    print(f"Текст озвучивается по частям, параллельно до {concurrency} запросов")
+
+    # MP3 кадры Edge TTS можно склеивать побайтно
+    async with session_pool(pool, concurrency, verify_ssl) as sessions:
+        with open(output_audio, 'wb') as audio_file:
+            done = 0
+            async for chunk in iter_synthesized_chunks(chunks, voice, speed_percent, concurrency, cache,
+                                                       manifest, sessions):
+                audio_file.write(chunk.audio)
+                if track is not None:
+                    track.add_chunk(chunk.text, chunk.words, mp3_duration_bytes(chunk.audio))
+                done += 1
+                print(f"Готово частей: {done}", end='\r')
+        print()
+        if pool is None:
+            print(sessions.format_stats())
+
+    for path in subtitle_paths:
+        track.write(path)
+        print(f"✓ Субтитры сохранены: {path}")
+
+    # Получаем длительность аудио по заголовкам MP3 кадров, без декодирования
+    with stage('duration'):
+        return probe_duration(output_audio)
 
 
 def create_gradient_overlay(video_width, video_height, duration):
@@ -149,26 +116,17 @@ def create_gradient_overlay(video_width, video_height, duration):
     Слева прозрачность 20%, справа 50%
     """
     import numpy as np
-    from moviepy import ImageClip
+    from background import gradient_alpha
+
+    mp = load_moviepy()
 
     # Создаём изображение с градиентом
-    # RGBA: Red, Green, Blue, Alpha
+    # RGBA: Red, Green, Blue, Alpha - чёрный цвет, меняется только прозрачность
     gradient = np.zeros((video_height, video_width, 4), dtype=np.uint8)
-
-    # Чёрный цвет (RGB = 0,0,0)
-    gradient[:, :, 0] = 0  # R
-    gradient[:, :, 1] = 0  # G
-    gradient[:, :, 2] = 0  # B
-
-    # Создаём горизонтальный градиент прозрачности
-    # Прозрачность 20% слева = 80% непрозрачности = 204/255 alpha
-    # Прозрачность 50% справа = 50% непрозрачности = 128/255 alpha
-    for x in range(video_width):
-        alpha = int(204 - (204 - 128) * (x / video_width))
-        gradient[:, x, 3] = alpha  # A (alpha channel)
+    gradient[:, :, 3] = gradient_alpha(video_width)
 
     # Создаём клип из изображения
-    gradient_clip = ImageClip(gradient).with_duration(duration)
+    gradient_clip = mp.ImageClip(gradient).with_duration(duration)
 
     return gradient_clip
 
@@ -176,273 +134,378 @@ def create_gradient_overlay(video_width, video_height, duration):
 def create_poster(background_image, title_text, output_path, video_width=1920, video_height=1080):
     """
     Создаёт постер из фонового изображения с названием на белой подложке.
-    Текст располагается справа снизу с отступами от краёв.
+    Текст располагается слева снизу с отступами от краёв (вёрстка - poster.py).
+    Формат по расширению: .jpg - JPEG, иначе PNG.
     """
     print(f"Создаю постер: {output_path}...")
 
-    from moviepy import ImageClip, CompositeVideoClip
-    import numpy as np
-    from PIL import Image, ImageDraw, ImageFont
-
-    # Загружаем и масштабируем фоновое изображение
-    img_clip = ImageClip(background_image)
-
-    # Масштабируем изображение под размер
-    img_clip = img_clip.resized(height=video_height)
-
-    if img_clip.w < video_width:
-        img_clip = img_clip.resized(width=video_width)
-
-    # Обрезаем по центру если нужно
-    if img_clip.w > video_width or img_clip.h > video_height:
-        x_center = img_clip.w / 2
-        y_center = img_clip.h / 2
-        img_clip = img_clip.cropped(
-            x_center=x_center,
-            y_center=y_center,
-            width=video_width,
-            height=video_height
-        )
-
-    # Получаем изображение как numpy array
-    background_array = img_clip.get_frame(0)
-
-    # Конвертируем в PIL Image для рисования текста
-    pil_image = Image.fromarray(background_array.astype('uint8'))
-
-    # Конвертируем в RGBA для поддержки прозрачности
-    pil_image = pil_image.convert('RGBA')
-
-    # Создаём отдельный слой для подложки с прозрачностью
-    overlay = Image.new('RGBA', pil_image.size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay)
-
-    # Пробуем загрузить шрифты с засечками (как в видео)
-    fonts_to_try = [
-        '/System/Library/Fonts/Supplemental/Palatino.ttc',
-        '/System/Library/Fonts/Supplemental/Times New Roman.ttf',
-        '/System/Library/Fonts/Supplemental/Georgia.ttf',
-    ]
+    is_jpeg = Path(output_path).suffix.lower() in ('.jpg', '.jpeg')
+    spec = PosterSpec('', video_width, video_height, 'JPEG' if is_jpeg else 'PNG')
+    save_poster(render_poster(background_image, title_text, spec), output_path, spec)
 
-    font_size = 64
-    font = None
-
-    for font_path in fonts_to_try:
-        try:
-            if os.path.exists(font_path):
-                font = ImageFont.truetype(font_path, font_size)
-                break
-        except:
-            continue
-
-    # Если не нашли, используем дефолтный
-    if font is None:
-        font = ImageFont.load_default()
-
-    # Отступы от краёв
-    margin_left = 120
-    margin_bottom = 120
-    padding = 40  # Отступ текста от краёв подложки
-
-    # Разбиваем текст на строки для многострочного отображения
-    words = title_text.split()
-    lines = []
-    current_line = []
-    max_line_width = int(video_width * 0.6)  # Максимум 60% ширины экрана для лучших отступов
-
-    for word in words:
-        test_line = ' '.join(current_line + [word])
-        bbox = draw.textbbox((0, 0), test_line, font=font)
-        line_width = bbox[2] - bbox[0]
-
-        if line_width <= max_line_width:
-            current_line.append(word)
-        else:
-            if current_line:
-                lines.append(' '.join(current_line))
-            current_line = [word]
+    print(f"✓ Постер создан: {output_path}")
 
-    if current_line:
-        lines.append(' '.join(current_line))
 
-    # Вычисляем размеры текстового блока
-    line_info = []
-    max_text_width = 0
+def create_subtitle_clip(subtitle_text, start_time, end_time, video_width=1920, video_height=1080):
+    """
+    Создаёт клип с субтитрами, расположенными внизу экрана в 2 строки.
+    Используется шрифт с засечками и межстрочный интервал.
+    """
+    duration = end_time - start_time
 
-    for line in lines:
-        bbox = draw.textbbox((0, 0), line, font=font)
-        line_width = bbox[2] - bbox[0]
-        # Используем getbbox для получения точной высоты текста с учётом baseline
-        line_info.append({
-            'text': line,
-            'width': line_width,
-            'bbox': bbox
-        })
-        max_text_width = max(max_text_width, line_width)
+    # Размер шрифта для читаемости в 2 строки
+    font_size = 48
 
-    # Используем font_size для межстрочного интервала (более надёжно)
-    line_spacing = 10
-    # Вычисляем общую высоту на основе размера шрифта
-    single_line_height = font_size
-    total_text_height = single_line_height * len(lines) + line_spacing * (len(lines) - 1)
+    # Межстрочный интервал (line spacing)
+    line_spacing = 15  # пикселей между строками
 
-    # Размеры белой подложки
-    box_width = max_text_width + padding * 2
-    box_height = total_text_height + padding * 2
+    # Шрифт с засечками ищется один раз за процесс (None - шрифт по умолчанию)
+    txt_clip = load_moviepy().TextClip(
+        text=subtitle_text,
+        font_size=font_size,
+        color='white',
+        font=find_font_path(),
+        size=(video_width - 600, None),  # Ограничиваем ширину (по 300px с каждой стороны)
+        method='caption',
+        text_align='center',
+        interline=line_spacing  # Межстрочный интервал
+    )
 
-    # Позиция подложки (слева снизу с отступами)
-    box_x = margin_left
-    box_y = video_height - box_height - margin_bottom
+    # Позиционируем внизу экрана с отступом
+    bottom_margin = 200
+    txt_clip = txt_clip.with_position(('center', video_height - bottom_margin - txt_clip.h))
+    txt_clip = txt_clip.with_start(start_time)
+    txt_clip = txt_clip.with_duration(duration)
 
-    # Сдвиг подложки вниз (текст остаётся на месте)
-    box_shift_down = 10
+    return txt_clip
 
-    # Рисуем белую подложку с прозрачностью 85% (alpha = 200), сдвинутую вниз
-    draw.rectangle(
-        [box_x, box_y + box_shift_down, box_x + box_width, box_y + box_height + box_shift_down],
-        fill=(255, 255, 255, 200)  # Белый цвет с прозрачностью 85%
-    )
 
-    # Рисуем текст построчно с выравниванием по левому краю
-    # Начинаем с padding сверху для равномерного отступа (текст остаётся на исходной позиции)
-    current_y = box_y + padding
+# Частота кадров для вшитых субтитров в режиме still
+BURN_SUBS_FPS = 10
 
-    for i, info in enumerate(line_info):
-        # Выравниваем по левому краю относительно подложки
-        text_x = box_x + padding
-        text_y = current_y
 
-        # Рисуем текст чёрным цветом
-        draw.text((text_x, text_y), info['text'], fill='black', font=font)
+def render_background_frame(video_width=1920, video_height=1080,
+                            background_color=(20, 20, 30),
+                            background_image=None):
+    """
+    Один раз собирает кадр фона: картинка, обрезанная по центру, с
+    градиентным затемнением, или сплошной цвет. Возвращает RGB numpy массив.
+    """
+    import numpy as np
+    from background import prepare_background
 
-        # Переход на следующую строку
-        current_y += single_line_height + line_spacing
+    if not (background_image and os.path.exists(background_image)):
+        frame = np.empty((video_height, video_width, 3), dtype=np.uint8)
+        frame[:, :] = background_color
+        return frame
 
-    # Объединяем фон с полупрозрачным оверлеем
-    pil_image = Image.alpha_composite(pil_image, overlay)
+    return prepare_background(background_image, video_width, video_height)
 
-    # Конвертируем обратно в RGB для сохранения как PNG
-    pil_image = pil_image.convert('RGB')
 
-    # Сохраняем как PNG
-    pil_image.save(output_path, 'PNG')
+def create_video_still(audio_file, output_video, frame, duration, fps=1, segment_seconds=60,
+                       subtitle_file=None):
+    """
+    Быстрый режим для статичного фона: кадр один раз кодируется в короткий
+    отрезок (x264 с настройкой под статичное изображение и низкой частотой
+    кадров), который затем зацикливается без перекодирования на всю длину
+    аудио. Аудио не проходит через Python - ffmpeg кодирует его в AAC сам
+    (или копирует, если оно уже AAC). subtitle_file (.srt) добавляется
+    отдельной дорожкой mov_text - без отрисовки на кадрах.
+    """
+    from PIL import Image
+
+    segment_seconds = max(1, min(segment_seconds, int(duration) + 1))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        frame_path = os.path.join(tmp_dir, 'frame.png')
+        segment_path = os.path.join(tmp_dir, 'segment.mp4')
+        Image.fromarray(frame).save(frame_path)
+
+        # Кодируем отрезок с одним ключевым кадром. Без B-кадров: иначе
+        # при копировании потока с -t видео выходит на пару секунд длиннее аудио
+        run_ffmpeg([
+            '-loop', '1', '-framerate', fps, '-i', frame_path,
+            '-t', segment_seconds,
+            '-c:v', 'libx264', '-tune', 'stillimage', '-preset', 'medium', '-bf', 0,
+            '-crf', '20', '-g', segment_seconds * fps, '-pix_fmt', 'yuv420p',
+            segment_path
+        ])
+
+        if Path(audio_file).suffix.lower() in ('.m4a', '.aac'):
+            audio_args = ['-c:a', 'copy']
+        else:
+            audio_args = ['-c:a', 'aac', '-b:a', '192k']
 
-    print(f"✓ Постер создан: {output_path}")
+        if subtitle_file:
+            subtitle_args = ['-i', subtitle_file, '-map', '2:s', '-c:s', 'mov_text']
+        else:
+            subtitle_args = []
+
+        # Зацикливаем отрезок копированием потока. Длительность задаём явно:
+        # -shortest с зацикленным входом заканчивает видео слишком поздно.
+        # Кадров - целое число, не длиннее аудио: последний кадр длится
+        # 1/fps, и лишний кадр удлинил бы контейнер (а в книге по главам
+        # добавил бы тишину в конце каждой главы).
+        video_seconds = max(1, int(duration * fps)) / fps
+        run_ffmpeg([
+            '-stream_loop', '-1', '-t', f"{video_seconds:.3f}", '-i', segment_path,
+            '-i', audio_file,
+            *subtitle_args[:2],
+            '-map', '0:v', '-map', '1:a',
+            *subtitle_args[2:],
+            '-c:v', 'copy',
+            *audio_args,
+            '-t', f"{duration:.3f}", '-movflags', '+faststart',
+            output_video
+        ])
+
+
+def add_soft_subtitles(video_file, subtitle_file):
+    """
+    Добавляет в готовый MP4 дорожку субтитров mov_text без перекодирования
+    """
+    video_file = Path(video_file)
+    tmp_path = video_file.with_name(f".{video_file.stem}.subs{video_file.suffix}")
 
+    try:
+        run_ffmpeg([
+            '-i', video_file, '-i', subtitle_file,
+            '-map', '0', '-map', '1:s',
+            '-c', 'copy', '-c:s', 'mov_text',
+            '-movflags', '+faststart',
+            tmp_path
+        ])
+        os.replace(tmp_path, video_file)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+async def create_video_streaming(text, output_video, frame, voice='ru-RU-DmitryNeural', speed=1.0,
+                                 concurrency=1, cache=None, fps=1, subtitle_paths=(), manifest=None,
+                                 verify_ssl=True, pool=None, loudness=None):
+    """
+    Потоковый режим: части аудио из Edge TTS сразу уходят в stdin ffmpeg,
+    который кодирует статичный фон и собирает MP4, пока синтез ещё идёт.
+    Промежуточный MP3 на диск не пишется; в конце видео обрезается по
+    аудио копированием потоков. Возвращает длительность аудио.
+    subtitle_paths - куда сохранить субтитры по границам слов.
+    manifest (ChunkManifest) - журнал готовых частей для --resume.
+    pool - общие соединения с Edge TTS или SyntheticEngine.
+    loudness - целевая громкость в LUFS: loudnorm в том же ffmpeg.
+    """
+    from PIL import Image
+
+    speed_percent = speed_to_rate(speed)
+    chunks = iter_engine_chunks(text, 'edge')
+    print(f"Текст озвучивается по частям, параллельно до {concurrency} запросов")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        frame_path = os.path.join(tmp_dir, 'frame.png')
+        encoded_path = os.path.join(tmp_dir, 'stream.mp4')
+        Image.fromarray(frame).save(frame_path)
+
+        # Видео кодируется вживую вместе с приходящим аудио. Без lookahead
+        # и B-кадров x264 не копит кадры. -shortest останавливает видео
+        # только с точностью до буфера муксера, поэтому точная длина
+        # задаётся после, когда длительность аудио известна.
+        proc = await asyncio.create_subprocess_exec(
+            get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y',
+            '-loop', '1', '-framerate', str(fps), '-i', frame_path,
+            '-f', 'mp3', '-i', 'pipe:0',
+            '-map', '0:v', '-map', '1:a',
+            '-c:v', 'libx264', '-tune', 'stillimage', '-preset', 'veryfast',
+            '-bf', '0', '-x264-params', 'rc-lookahead=0:sync-lookahead=0', '-threads', '1',
+            '-pix_fmt', 'yuv420p',
+            *(['-filter:a', audio_filters(loudness=loudness, sample_rate=SAMPLE_RATE)]
+              if loudness is not None else []),
+            '-c:a', 'aac', '-b:a', '192k',
+            '-shortest', '-fflags', '+shortest', '-max_interleave_delta', '0',
+            encoded_path,
+            stdin=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
 
-def create_subtitle_clip(subtitle_text, start_time, end_time, video_width=1920, video_height=1080):
+        track = SubtitleTrack() if subtitle_paths else None
+        duration = 0.0
+        done = 0
+        try:
+            async with session_pool(pool, concurrency, verify_ssl) as sessions:
+                async for chunk in iter_synthesized_chunks(chunks, voice, speed_percent, concurrency, cache,
+                                                           manifest, sessions):
+                    proc.stdin.write(chunk.audio)
+                    await proc.stdin.drain()
+                    chunk_duration = mp3_duration_bytes(chunk.audio)
+                    if track is not None:
+                        track.add_chunk(chunk.text, chunk.words, chunk_duration)
+                    duration += chunk_duration
+                    done += 1
+                    print(f"Готово частей: {done}", end='\r')
+                print()
+                print(sessions.format_stats())
+        except BaseException:
+            proc.kill()
+            await proc.wait()
+            raise
+
+        proc.stdin.close()
+        stderr = await proc.stderr.read()
+        await proc.wait()
+
+        if proc.returncode != 0:
+            message = stderr.decode('utf-8', errors='replace').strip()
+            raise RuntimeError(f"ffmpeg завершился с ошибкой: {message[-2000:]}")
+
+        # Целое число кадров, не длиннее аудио, как в create_video_still;
+        # аудио копируется целиком
+        video_seconds = max(1, int(duration * fps)) / fps
+        run_ffmpeg([
+            '-t', f"{video_seconds:.3f}", '-i', encoded_path,
+            '-i', encoded_path,
+            '-map', '0:v', '-map', '1:a',
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            str(output_video)
+        ])
+
+    for path in subtitle_paths:
+        track.write(path)
+        print(f"✓ Субтитры сохранены: {path}")
+
+    return duration
+
+
+def create_video_burned(audio_file, output_video, frame, cues, duration, fps=24,
+                        subtitle_file=None):
     """
-    Создаёт клип с субтитрами, расположенными внизу экрана в 2 строки.
-    Используется шрифт с засечками и межстрочный интервал.
+    Видео с вшитыми субтитрами: кадры собирает SubtitleRenderer поверх
+    готового фона (каждая реплика растеризуется один раз), moviepy только
+    кодирует их вместе с аудио.
     """
-    duration = end_time - start_time
+    from subtitle_renderer import SubtitleRenderer
 
-    # Размер шрифта для читаемости в 2 строки
-    font_size = 48
+    mp = load_moviepy()
 
-    # Межстрочный интервал (line spacing)
-    line_spacing = 15  # пикселей между строками
+    height, width = frame.shape[:2]
+    renderer = SubtitleRenderer(cues, width, height)
+    print(f"Вшиваю субтитры: {len(renderer)} реплик")
 
-    # Создаём текстовый клип со шрифтом с засечками
-    # Пробуем разные шрифты с засечками в порядке предпочтения
-    fonts_to_try = [
-        '/System/Library/Fonts/Supplemental/Palatino.ttc',  # Palatino - элегантный шрифт с засечками
-        '/System/Library/Fonts/Supplemental/Times New Roman.ttf',  # Times New Roman
-        '/System/Library/Fonts/Supplemental/Georgia.ttf',  # Georgia
-        'Palatino',  # Системное имя
-        'Times-New-Roman',  # Резервный вариант
-    ]
-
-    txt_clip = None
-    for font in fonts_to_try:
-        try:
-            txt_clip = TextClip(
-                text=subtitle_text,
-                font_size=font_size,
-                color='white',
-                font=font,
-                size=(video_width - 600, None),  # Ограничиваем ширину (по 300px с каждой стороны)
-                method='caption',
-                text_align='center',
-                interline=line_spacing  # Межстрочный интервал
-            )
-            break  # Если успешно создали, выходим из цикла
-        except:
-            continue  # Пробуем следующий шрифт
-
-    # Если ни один шрифт не сработал, создаём с дефолтным
-    if txt_clip is None:
-        txt_clip = TextClip(
-            text=subtitle_text,
-            font_size=font_size,
-            color='white',
-            size=(video_width - 600, None),  # Ограничиваем ширину (по 300px с каждой стороны)
-            method='caption',
-            text_align='center',
-            interline=line_spacing
-        )
+    audio_clip = mp.AudioFileClip(audio_file)
+    video = mp.VideoClip(renderer.frame_function(frame), duration=duration)
+    video = video.with_audio(audio_clip)
 
-    # Позиционируем внизу экрана с отступом
-    bottom_margin = 200
-    txt_clip = txt_clip.with_position(('center', video_height - bottom_margin - txt_clip.h))
-    txt_clip = txt_clip.with_start(start_time)
-    txt_clip = txt_clip.with_duration(duration)
+    video.write_videofile(
+        output_video,
+        fps=fps,
+        codec='libx264',
+        audio_codec='aac',
+        audio_bitrate='192k',
+        temp_audiofile='temp-audio.m4a',
+        remove_temp=True,
+        preset='veryfast',
+        ffmpeg_params=['-tune', 'stillimage', '-crf', '20'],
+        threads=4,
+        logger='bar'
+    )
 
-    return txt_clip
+    if subtitle_file:
+        add_soft_subtitles(output_video, subtitle_file)
 
 
 def create_video(audio_file, output_video,
                  video_width=1920, video_height=1080,
                  background_color=(20, 20, 30),
-                 background_image=None):
+                 background_image=None,
+                 render_mode='still',
+                 still_fps=1,
+                 duration=None,
+                 subtitle_file=None,
+                 subtitle_cues=None):
     """
-    Создаёт видео с фоном (цвет или картинка) без субтитров
+    Создаёт видео с фоном (цвет или картинка).
+    render_mode='still' - кадр собирается один раз и кодируется ffmpeg
+    как статичная картинка; 'compose' - покадровая сборка через moviepy.
+    duration - длительность аудио, если уже известна.
+    subtitle_file - SRT, который добавляется мягкой дорожкой mov_text.
+    subtitle_cues - реплики (start, end, text), которые вшиваются в кадр.
     """
     print("Создаю видео...")
 
+    if subtitle_cues:
+        if background_image and not os.path.exists(background_image):
+            print(f"Предупреждение: изображение '{background_image}' не найдено, использую цветной фон")
+
+        if duration is None:
+            with stage('duration'):
+                duration = probe_duration(audio_file)
+
+        with stage('background'):
+            frame = render_background_frame(video_width, video_height, background_color, background_image)
+
+        # Кадр меняется только на границах реплик, поэтому в режиме still
+        # хватает невысокой частоты - лишь бы реплики не сдвигались заметно
+        fps = max(still_fps, BURN_SUBS_FPS) if render_mode == 'still' else 24
+
+        print(f"Сохраняю видео в {output_video} (вшитые субтитры, {fps} кадр/с)...")
+        with stage('encode'):
+            create_video_burned(audio_file, output_video, frame, subtitle_cues, duration, fps,
+                                subtitle_file=subtitle_file)
+
+        print("✓ Видео создано!")
+        return
+
+    if render_mode == 'still':
+        if background_image and not os.path.exists(background_image):
+            print(f"Предупреждение: изображение '{background_image}' не найдено, использую цветной фон")
+        elif background_image:
+            print(f"Использую фоновое изображение: {background_image}")
+
+        if duration is None:
+            with stage('duration'):
+                duration = probe_duration(audio_file)
+
+        with stage('background'):
+            frame = render_background_frame(video_width, video_height, background_color, background_image)
+
+        print(f"Сохраняю видео в {output_video} (статичный фон, {still_fps} кадр/с)...")
+        with stage('encode'):
+            create_video_still(audio_file, output_video, frame, duration, still_fps,
+                               subtitle_file=subtitle_file)
+
+        print("✓ Видео создано!")
+        return
+
+    from background import prepare_background
+
+    mp = load_moviepy()
+
     # Загружаем аудио
-    audio_clip = AudioFileClip(audio_file)
-    duration = audio_clip.duration
+    with stage('duration'):
+        audio_clip = mp.AudioFileClip(audio_file)
+        duration = audio_clip.duration
 
     # Создаём фон
     if background_image and os.path.exists(background_image):
         print(f"Использую фоновое изображение: {background_image}")
-        from moviepy import ImageClip
-
-        # Загружаем изображение
-        img_clip = ImageClip(background_image)
-
-        # Масштабируем изображение под размер видео
-        # Используем "crop" чтобы заполнить весь экран без искажений
-        img_clip = img_clip.resized(height=video_height)
-
-        # Если изображение уже по ширине, центрируем по ширине
-        if img_clip.w < video_width:
-            img_clip = img_clip.resized(width=video_width)
-
-        # Обрезаем по центру если нужно
-        if img_clip.w > video_width or img_clip.h > video_height:
-            x_center = img_clip.w / 2
-            y_center = img_clip.h / 2
-            img_clip = img_clip.cropped(
-                x_center=x_center,
-                y_center=y_center,
-                width=video_width,
-                height=video_height
-            )
+
+        # Загружаем подготовленное изображение (масштаб и обрезка по центру
+        # без искажений уже выполнены)
+        with stage('background'):
+            img_clip = mp.ImageClip(prepare_background(background_image, video_width, video_height, gradient=None))
 
         # Устанавливаем длительность
         background = img_clip.with_duration(duration)
 
         # Создаём градиентный слой поверх фонового изображения
         print("Создаю градиентный слой...")
-        gradient_overlay = create_gradient_overlay(video_width, video_height, duration)
+        with stage('gradient'):
+            gradient_overlay = create_gradient_overlay(video_width, video_height, duration)
     else:
         if background_image:
             print(f"Предупреждение: изображение '{background_image}' не найдено, использую цветной фон")
 
         # Создаём тёмный фон
-        background = ColorClip(
+        background = mp.ColorClip(
             size=(video_width, video_height),
             color=background_color,
             duration=duration
@@ -451,7 +514,7 @@ def create_video(audio_file, output_video,
 
     # Создаём композицию видео
     if gradient_overlay is not None:
-        video = CompositeVideoClip([background, gradient_overlay])
+        video = mp.CompositeVideoClip([background, gradient_overlay])
     else:
         video = background
 
@@ -460,23 +523,253 @@ def create_video(audio_file, output_video,
 
     # Сохраняем видео
     print(f"Сохраняю видео в {output_video}...")
-    video.write_videofile(
-        output_video,
-        fps=24,
-        codec='libx264',
-        audio_codec='aac',
-        audio_bitrate='192k',
-        bitrate='2000k',
-        temp_audiofile='temp-audio.m4a',
-        remove_temp=True,
-        preset='medium',
-        threads=4,
-        logger='bar'
-    )
+    with stage('encode'):
+        video.write_videofile(
+            output_video,
+            fps=24,
+            codec='libx264',
+            audio_codec='aac',
+            audio_bitrate='192k',
+            bitrate='2000k',
+            temp_audiofile='temp-audio.m4a',
+            remove_temp=True,
+            preset='medium',
+            threads=4,
+            logger='bar'
+        )
+
+    if subtitle_file:
+        with stage('soft_subs'):
+            add_soft_subtitles(output_video, subtitle_file)
 
     print("✓ Видео создано!")
 
 
+def parse_renditions(value):
+    """
+    '1920x1080,1280x720,1080x1920' -> [(1920, 1080), (1280, 720), (1080, 1920)].
+    При неверном формате выбрасывает ValueError.
+    """
+    renditions = []
+    for item in value.split(','):
+        width, sep, height = item.strip().lower().partition('x')
+        if not sep or not width.isdigit() or not height.isdigit() or int(width) < 2 or int(height) < 2:
+            raise ValueError(f"неверное разрешение '{item.strip()}', нужно ШИРИНАxВЫСОТА, например 1280x720")
+        # x264 с yuv420p требует чётные размеры
+        size = (int(width) // 2 * 2, int(height) // 2 * 2)
+        if size not in renditions:
+            renditions.append(size)
+    return renditions
+
+
+def rendition_path(output_path, width, height):
+    """
+    output/story.mp4 -> output/story_1280x720.mp4
+    """
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}_{width}x{height}{output_path.suffix}")
+
+
+def encode_aac(audio_file, output_audio, bitrate='192k'):
+    """
+    Кодирует аудио в AAC (.m4a) один раз - видео всех разрешений
+    копируют этот поток без перекодирования
+    """
+    run_ffmpeg(['-i', audio_file, '-vn', '-c:a', 'aac', '-b:a', bitrate, output_audio])
+
+
+def create_renditions(audio_file, output_path, renditions,
+                      background_color=(20, 20, 30), background_image=None,
+                      still_fps=1, duration=None, subtitle_file=None):
+    """
+    Видео нескольких разрешений из одной озвучки: аудио кодируется в AAC
+    один раз, картинка фона декодируется один раз (prepare_background
+    режет из неё кадр под каждое разрешение), для каждого разрешения
+    кодируется только статичный отрезок видео. Возвращает пути к видео.
+    """
+    if duration is None:
+        with stage('duration'):
+            duration = probe_duration(audio_file)
+
+    paths = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        aac_path = os.path.join(tmp_dir, 'audio.m4a')
+        print("Кодирую аудио в AAC (один раз для всех разрешений)...")
+        with stage('aac'):
+            encode_aac(audio_file, aac_path)
+
+        for width, height in renditions:
+            path = rendition_path(output_path, width, height)
+            print(f"\n--- {width}x{height} ---")
+            with stage(f"{width}x{height}"):
+                create_video(aac_path, str(path), width, height, background_color, background_image,
+                             'still', still_fps, duration, subtitle_file)
+            paths.append(path)
+
+    return paths
+
+
+def normalize_loudness(audio_file, loudness):
+    """
+    Выравнивает громкость готового аудио одним проходом ffmpeg (audio_post)
+    """
+    print(f"Выравниваю громкость до {loudness:g} LUFS...")
+    with stage('audio_post'):
+        postprocess_in_place(audio_file, loudness=loudness)
+
+
+def create_posters(background_image, title, output_base, poster_specs):
+    """
+    Постеры с заголовком из первой строки файла; картинка фона
+    декодируется один раз для всех размеров
+    """
+    print("\n=== Создание постера ===")
+    with stage('poster'):
+        poster_paths = render_posters(background_image, title, output_base, poster_specs)
+
+    for path in poster_paths:
+        print(f"✓ Постер сохранён: {path}")
+
+
+def create_chapter_book(chapters, output_path, book_title, settings, video_options=None, engine='edge',
+                        voice='ru-RU-DmitryNeural', speed=1.0, concurrency=1, cache=None, pool=None,
+                        verify_ssl=True, resume=False, needs_yo=False, loudness=None, burn_subs=False,
+                        subtitle_paths=(), soft_subtitle_file=None):
+    """
+    Книга по главам: каждая глава озвучивается и кодируется отдельно
+    (видео с параметрами video_options для create_video или, если их нет,
+    AAC), готовые главы берутся из ChapterStore по хэшу текста и settings.
+    Затем главы склеиваются копированием потоков в output_path с метками
+    глав, субтитры глав сдвигаются на начало главы и объединяются.
+    """
+    store = ChapterStore.for_output(output_path)
+    ext = 'm4a' if video_options is None else 'mp4'
+    keys = [chapter_key(chapter, settings) for chapter in chapters]
+
+    pending = [i for i, key in enumerate(keys) if store.get(key) is None]
+    print(f"\nГлав: {len(chapters)}, готовых: {len(chapters) - len(pending)}, "
+          f"собрать: {len(pending)}")
+
+    for number, index in enumerate(pending, 1):
+        chapter, key = chapters[index], keys[index]
+        chapter_title, chapter_text = chapter
+        if needs_yo:
+            with stage('add_yo'):
+                chapter_title, chapter_text = add_yo(chapter_title), add_yo(chapter_text)
+
+        print(f"\n=== Глава {index + 1} ({number}/{len(pending)}): {chapter_title} ===")
+        chapter_path = store.path_for(key, ext)
+        manifest = ChunkManifest.for_job(chapter_path, engine, voice, speed_to_rate(speed), resume)
+        track = SubtitleTrack()
+
+        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp_audio:
+            temp_audio_path = tmp_audio.name
+
+        try:
+            with stage('tts'):
+                duration = run_synthesis(
+                    generate_audio(chapter_text, temp_audio_path, voice, speed, concurrency, cache,
+                                   subtitle_track=track, manifest=manifest, pool=pool, verify_ssl=verify_ssl),
+                    manifest
+                )
+
+            if loudness is not None:
+                normalize_loudness(temp_audio_path, loudness)
+
+            if video_options is None:
+                with stage('aac'):
+                    encode_aac(temp_audio_path, chapter_path)
+            else:
+                with stage('video'):
+                    create_video(temp_audio_path, str(chapter_path), duration=duration,
+                                 subtitle_cues=track.cues() if burn_subs else None, **video_options)
+        finally:
+            if os.path.exists(temp_audio_path):
+                os.remove(temp_audio_path)
+
+        # Метки глав ставятся по длительности контейнера (как её видит
+        # ffmpeg) - на неё же concat сдвигает следующую главу
+        store.add(key, chapter_path, chapter_title, probe_duration(chapter_path), track.cues())
+        manifest.finish()
+
+    removed = store.prune(keys)
+    if removed:
+        print(f"Удалено устаревших глав: {removed}")
+
+    if cache is not None:
+        print(cache.format_stats())
+
+    entries = [store.get(key) for key in keys]
+    durations = [entry['duration'] for entry in entries]
+
+    # Субтитры глав сдвигаются на начало главы в книге
+    if subtitle_paths:
+        cues = [Cue(start + offset, end + offset, text)
+                for entry, offset in zip(entries, chapter_starts(durations))
+                for start, end, text in entry['cues']]
+        for path in subtitle_paths:
+            write_cues(path, cues)
+            print(f"✓ Субтитры сохранены: {path}")
+
+    print(f"\n=== Сборка {output_path.name} из {len(entries)} глав ===")
+    with stage('concat'):
+        concat_chapters([store.file(entry) for entry in entries], output_path, book_title,
+                        [entry['title'] for entry in entries], durations, soft_subtitle_file)
+
+    print(f"\n✓ Длительность: {sum(durations) / 60:.1f} мин")
+    print(f"✓ Готово! Книга по главам сохранена: {output_path}")
+
+
+def run_synthesis(coro, manifest):
+    """
+    Запускает озвучку. При сбое готовые части остаются в журнале задачи -
+    подсказываем, как продолжить.
+    """
+    try:
+        return asyncio.run(coro)
+    except Exception as e:
+        print(f"\nОшибка при генерации речи: {e}")
+        if len(manifest):
+            print(f"Готовых частей сохранено: {len(manifest)}. "
+                  f"Чтобы продолжить, повторите команду с --resume")
+        sys.exit(1)
+
+
+def load_story(input_file_path, audio_only=False):
+    """
+    Читает файл рассказа и возвращает (заголовок, текст).
+    Для audio-only весь файл - это текст для озвучки, заголовок None.
+    Для видео первая строка - заголовок для постера, остальное - текст.
+    При неподходящем содержимом выбрасывает ValueError.
+    """
+    with open(input_file_path, 'r', encoding='utf-8') as f:
+        content = f.read().strip()
+
+    if not content:
+        raise ValueError("файл пустой")
+
+    if audio_only:
+        return None, content
+
+    # Разделяем на заголовок (первая строка) и текст (остальное)
+    lines = content.split('\n', 1)
+
+    if len(lines) < 2:
+        raise ValueError(
+            "для создания видео файл должен содержать минимум 2 строки:\n"
+            "  - Первая строка: заголовок для постера\n"
+            "  - Остальные строки: текст для аудио"
+        )
+
+    title = lines[0].strip()
+    text = lines[1].strip()
+
+    if not text:
+        raise ValueError("текст для озвучки пустой (начиная со второй строки)")
+
+    return title, text
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Создание видео с аудио'
@@ -495,6 +788,13 @@ def main():
         default='ru-RU-DmitryNeural',
         help='Голос для Edge TTS (по умолчанию: ru-RU-DmitryNeural - мужской)'
     )
+    parser.add_argument(
+        '-e', '--engine',
+        choices=['edge', 'synthetic'],
+        default='edge',
+        help='TTS движок: edge - Microsoft Edge TTS (по умолчанию), '
+             'synthetic - тишина длиной по тексту, без сети (для проверок и бенчмарков)'
+    )
     parser.add_argument(
         '-s', '--speed',
         type=float,
@@ -513,6 +813,18 @@ def main():
         default=1080,
         help='Высота видео (по умолчанию: 1080)'
     )
+    parser.add_argument(
+        '--renditions',
+        default=None,
+        help='Несколько разрешений из одной озвучки через запятую, например '
+             '1920x1080,1280x720,1080x1920 (вместо --width/--height; файлы получают суффикс _ШxВ)'
+    )
+    parser.add_argument(
+        '--poster-extra',
+        default=None,
+        help='Дополнительные постеры через запятую: thumb - превью 1280x720 JPEG, '
+             'square - карточка 1080x1080 (по умолчанию: только постер размера видео)'
+    )
     parser.add_argument(
         '--bg-color',
         default='20,20,30',
@@ -528,9 +840,117 @@ def main():
         action='store_true',
         help='Создать только аудио файл без видео (формат .mp3)'
     )
+    parser.add_argument(
+        '-j', '--tts-concurrency',
+        type=int,
+        default=1,
+        help='Сколько частей текста синтезировать параллельно (по умолчанию: 1)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Не использовать кэш синтезированных частей аудио'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=str(DEFAULT_CACHE_DIR),
+        help=f'Директория кэша аудио (по умолчанию: {DEFAULT_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=DEFAULT_MAX_SIZE_MB,
+        help=f'Максимальный размер кэша аудио в МБ (по умолчанию: {DEFAULT_MAX_SIZE_MB})'
+    )
+    parser.add_argument(
+        '--render-mode',
+        choices=['still', 'compose'],
+        default='still',
+        help='Режим кодирования: still - статичный фон кодируется один раз (быстро), '
+             'compose - покадровая сборка через moviepy (по умолчанию: still)'
+    )
+    parser.add_argument(
+        '--still-fps',
+        type=int,
+        default=1,
+        help='Частота кадров в режиме still (по умолчанию: 1)'
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Потоковый режим: аудио из Edge TTS сразу идёт в ffmpeg без временного MP3'
+    )
+    parser.add_argument(
+        '--subtitles',
+        choices=['srt', 'vtt', 'both'],
+        default=None,
+        help='Сохранить субтитры по границам слов рядом с результатом (.srt, .vtt или оба)'
+    )
+    parser.add_argument(
+        '--burn-subs',
+        action='store_true',
+        help='Вшить субтитры по границам слов в изображение видео'
+    )
+    parser.add_argument(
+        '--soft-subs',
+        action='store_true',
+        help='Добавить в видео дорожку субтитров (mov_text), которую можно включить в плеере'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Продолжить прерванную озвучку: синтезировать только недостающие части'
+    )
+    parser.add_argument(
+        '--chapters',
+        action='store_true',
+        help='Собирать книгу по главам: каждая глава озвучивается и кодируется отдельно, '
+             'при повторной сборке - только изменённые; результат - MP4 (с --audio-only - M4B) с метками глав'
+    )
+    parser.add_argument(
+        '--chapter-pattern',
+        metavar='REGEX',
+        action='append',
+        default=None,
+        help='Регулярное выражение строки-заголовка главы (без учёта регистра, можно указать несколько раз; '
+             'по умолчанию: "Глава 1", "Часть вторая", "Chapter 3", "# Название", римская цифра заглавными)'
+    )
+    parser.add_argument(
+        '--insecure-ssl',
+        action='store_true',
+        help='Не проверять SSL сертификат Edge TTS (только если у сервиса истёк сертификат)'
+    )
+    parser.add_argument(
+        '--loudness',
+        metavar='LUFS',
+        type=float,
+        nargs='?',
+        const=DEFAULT_LOUDNESS,
+        default=None,
+        help=f'Выровнять громкость (EBU R128) до LUFS; без значения - {DEFAULT_LOUDNESS:g} '
+             f'(по умолчанию: не выравнивать)'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Записать время, процессорное время и пик памяти каждого этапа в <результат>.profile.json'
+    )
+    parser.add_argument(
+        '--cprofile',
+        metavar='STAGE',
+        nargs='?',
+        const=HOTTEST,
+        default=None,
+        help='Вместе с --profile снять cProfile этапа (read, add_yo, tts, video, stream, poster); '
+             'без значения - самого долгого'
+    )
 
     args = parser.parse_args()
 
+    if not args.speed > 0:
+        print(f"Ошибка: скорость речи должна быть больше нуля (--speed {args.speed})")
+        sys.exit(1)
+
     # Определяем директории
     SRC_DIR = Path('src')
     OUTPUT_DIR = Path('output')
@@ -541,21 +961,55 @@ def main():
     # Составляем полные пути
     input_file_path = SRC_DIR / args.input_file
 
-    # Если режим audio-only, меняем расширение на .mp3
+    # Если режим audio-only, меняем расширение на .mp3 (по главам - .m4b)
     if args.audio_only:
-        output_path = OUTPUT_DIR / Path(args.output).with_suffix('.mp3').name
+        suffix = '.m4b' if args.chapters else '.mp3'
+        output_path = OUTPUT_DIR / Path(args.output).with_suffix(suffix).name
     else:
         output_path = OUTPUT_DIR / args.output
 
     background_image_path = SRC_DIR / args.bg_image if args.bg_image else None
 
+    if args.profile or args.cprofile:
+        start_profile(output_path.with_suffix('.profile.json'), args.cprofile)
+
+    poster_extra = []
+    if args.poster_extra:
+        try:
+            poster_extra = parse_presets(args.poster_extra)
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+            sys.exit(1)
+
+    renditions = None
+    if args.renditions and not args.audio_only:
+        try:
+            renditions = parse_renditions(args.renditions)
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+            sys.exit(1)
+        if args.stream or args.burn_subs or args.render_mode != 'still':
+            print("Ошибка: --renditions работает только с --render-mode still, без --stream и --burn-subs")
+            sys.exit(1)
+
+    chapter_patterns = None
+    if args.chapters:
+        try:
+            chapter_patterns = compile_patterns(args.chapter_pattern or DEFAULT_CHAPTER_PATTERNS)
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+            sys.exit(1)
+        if args.stream or renditions:
+            print("Ошибка: --chapters не работает вместе с --stream и --renditions")
+            sys.exit(1)
+
     # Проверяем зависимости
     if not args.audio_only and not MOVIEPY_AVAILABLE:
         print("Ошибка: moviepy не установлен")
         print("Установите: pip install moviepy")
         sys.exit(1)
 
-    if not EDGE_TTS_AVAILABLE:
+    if args.engine == 'edge' and not EDGE_TTS_AVAILABLE:
         print("Ошибка: edge-tts не установлен")
         print("Установите: pip install edge-tts")
         sys.exit(1)
@@ -567,118 +1021,289 @@ def main():
 
     # Читаем текст
     print(f"Читаю текст из {input_file_path}...")
-    with open(input_file_path, 'r', encoding='utf-8') as f:
-        content = f.read().strip()
-
-    if not content:
-        print("Ошибка: файл пустой")
-        sys.exit(1)
-
-    # Для audio-only режима весь файл - это текст для озвучки
-    # Для видео - первая строка заголовок, остальное - текст
-    if args.audio_only:
-        title = None
-        text = content
-        print(f"Длина текста для озвучки: {len(text)} символов")
-    else:
-        # Разделяем на заголовок (первая строка) и текст (остальное)
-        lines = content.split('\n', 1)
-
-        if len(lines) < 2:
-            print("Ошибка: для создания видео файл должен содержать минимум 2 строки:")
-            print("  - Первая строка: заголовок для постера")
-            print("  - Остальные строки: текст для аудио")
+    try:
+        with stage('read'):
+            title, text = load_story(input_file_path, args.audio_only)
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        if not args.audio_only:
             print("\nДля создания только аудио используйте флаг --audio-only")
-            sys.exit(1)
-
-        title = lines[0].strip()
-        text = lines[1].strip()
-
-        if not text:
-            print("Ошибка: текст для озвучки пустой (начиная со второй строки)")
-            sys.exit(1)
-
-        print(f"Заголовок: {title}")
-        print(f"Длина текста для озвучки: {len(text)} символов")
+        sys.exit(1)
 
-    # Расставляем букву ё
-    print("Расставляю букву ё...")
     if title:
-        title = add_yo(title)
-    text = add_yo(text)
+        print(f"Заголовок: {title}")
+    print(f"Длина текста для озвучки: {len(text)} символов")
+
+    # Расставляем букву ё (если файл не обработан заранее, например generate_video.sh)
+    needs_yo = not is_processed(input_file_path)
+    if not needs_yo:
+        print("Буква ё уже расставлена в файле, пропускаю")
+    elif args.chapters:
+        # По главам ё расставляется только в тех, что будут собираться заново
+        if title:
+            with stage('add_yo'):
+                title = add_yo(title)
+    else:
+        print("Расставляю букву ё...")
+        with stage('add_yo'):
+            if title:
+                title = add_yo(title)
+            text = add_yo(text)
 
     # Парсим цвет фона
     bg_color = tuple(int(x) for x in args.bg_color.split(','))
 
-    # Если режим audio-only, сохраняем аудио напрямую
-    if args.audio_only:
-        print("\n=== Генерация аудио ===")
-        duration = asyncio.run(
-            generate_audio(
-                text,
+    # Синтетические части не должны попасть в кэш под видом Edge TTS
+    engine_pool = SyntheticEngine() if args.engine == 'synthetic' else None
+    use_cache = not args.no_cache and engine_pool is None
+    cache = AudioCache(args.cache_dir, args.cache_size) if use_cache else None
+
+    # Субтитры рядом с результатом
+    subtitle_paths = []
+    if args.subtitles in ('srt', 'both'):
+        subtitle_paths.append(output_path.with_suffix('.srt'))
+    if args.subtitles in ('vtt', 'both'):
+        subtitle_paths.append(output_path.with_suffix('.vtt'))
+
+    # Для мягкой дорожки нужен SRT; если он не запрошен, пишем временный
+    soft_subtitle_file = None
+    temp_subtitle_file = None
+    if args.soft_subs and not args.audio_only:
+        soft_subtitle_file = next((p for p in subtitle_paths if p.suffix == '.srt'), None)
+        if soft_subtitle_file is None:
+            fd, temp_subtitle_file = tempfile.mkstemp(suffix='.srt')
+            os.close(fd)
+            soft_subtitle_file = Path(temp_subtitle_file)
+            subtitle_paths.append(soft_subtitle_file)
+
+    # Для вшитых субтитров реплики нужны в памяти, а не в файле
+    subtitle_track = SubtitleTrack() if args.burn_subs and not args.audio_only else None
+
+    # Временный SRT для мягкой дорожки удаляется при любом исходе,
+    # в каждом режиме сборки
+    try:
+        if args.chapters:
+            settings = {
+                'engine': args.engine,
+                'voice': args.voice,
+                'speed': args.speed,
+                'loudness': args.loudness,
+                'add_yo': needs_yo,
+                'audio_only': args.audio_only,
+            }
+            video_options = None
+            if not args.audio_only:
+                video_options = {
+                    'video_width': args.width,
+                    'video_height': args.height,
+                    'background_color': bg_color,
+                    'background_image': background_image_path,
+                    'render_mode': args.render_mode,
+                    'still_fps': args.still_fps,
+                }
+                settings.update({
+                    'width': args.width,
+                    'height': args.height,
+                    'bg_color': bg_color,
+                    'render_mode': args.render_mode,
+                    'still_fps': args.still_fps,
+                    'burn_subs': args.burn_subs,
+                })
+                # Картинка фона входит в ключ главы по имени, размеру и времени изменения
+                if background_image_path and os.path.exists(background_image_path):
+                    image_stat = os.stat(background_image_path)
+                    settings['bg_image'] = [str(background_image_path), image_stat.st_size, image_stat.st_mtime_ns]
+
+            create_chapter_book(
+                split_chapters(text, chapter_patterns),
                 output_path,
+                title or input_file_path.stem,
+                settings,
+                video_options,
+                args.engine,
                 args.voice,
-                args.speed
+                args.speed,
+                args.tts_concurrency,
+                cache,
+                engine_pool,
+                not args.insecure_ssl,
+                args.resume,
+                needs_yo,
+                args.loudness,
+                args.burn_subs,
+                subtitle_paths,
+                soft_subtitle_file
             )
-        )
 
-        print(f"\n✓ Аудио создано: {duration:.1f} секунд")
-        print(f"✓ Готово! Аудио сохранено: {output_path}")
-    else:
-        # Создаём временный файл для аудио
-        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp_audio:
-            temp_audio_path = tmp_audio.name
+            if not args.audio_only and background_image_path and os.path.exists(background_image_path):
+                create_posters(background_image_path, title, OUTPUT_DIR / Path(args.output).stem,
+                               [PosterSpec('', args.width, args.height)] + poster_extra)
+            return
 
-        try:
-            # Генерируем аудио
+        # Готовые части сохраняются в журнал задачи, чтобы после сбоя
+        # можно было продолжить с --resume
+        manifest = ChunkManifest.for_job(output_path, args.engine, args.voice, speed_to_rate(args.speed), args.resume)
+        if args.resume:
+            print(f"Продолжаю задачу: готовых частей в журнале {len(manifest)}")
+
+        # Если режим audio-only, сохраняем аудио напрямую
+        if args.audio_only:
             print("\n=== Генерация аудио ===")
-            duration = asyncio.run(
-                generate_audio(
-                    text,
-                    temp_audio_path,
-                    args.voice,
-                    args.speed
+            with stage('tts'):
+                duration = run_synthesis(
+                    generate_audio(
+                        text,
+                        output_path,
+                        args.voice,
+                        args.speed,
+                        args.tts_concurrency,
+                        cache,
+                        subtitle_paths,
+                        manifest=manifest,
+                        pool=engine_pool,
+                        verify_ssl=not args.insecure_ssl
+                    ),
+                    manifest
                 )
-            )
-
-            print(f"\n✓ Аудио создано: {duration:.1f} секунд")
 
-            # Создаём видео
-            print("\n=== Создание видео ===")
-            create_video(
-                temp_audio_path,
-                output_path,
-                args.width,
-                args.height,
-                bg_color,
-                background_image_path
-            )
+            if args.loudness is not None:
+                normalize_loudness(output_path, args.loudness)
 
-            print(f"\n✓ Готово! Видео сохранено: {output_path}")
+            if cache is not None:
+                print(cache.format_stats())
+            print(f"\n✓ Аудио создано: {duration:.1f} секунд")
+            print(f"✓ Готово! Аудио сохранено: {output_path}")
+            manifest.finish()
+        else:
+            if args.stream:
+                if args.render_mode != 'still':
+                    print("Ошибка: потоковый режим работает только с --render-mode still")
+                    sys.exit(1)
+                if args.burn_subs:
+                    print("Ошибка: потоковый режим не поддерживает --burn-subs")
+                    sys.exit(1)
+
+                # Аудио и видео создаются одновременно, без временного файла
+                print("\n=== Потоковая генерация аудио и видео ===")
+                with stage('background'):
+                    frame = render_background_frame(args.width, args.height, bg_color, background_image_path)
+                with stage('stream'):
+                    duration = run_synthesis(
+                        create_video_streaming(
+                            text,
+                            output_path,
+                            frame,
+                            args.voice,
+                            args.speed,
+                            args.tts_concurrency,
+                            cache,
+                            args.still_fps,
+                            subtitle_paths,
+                            manifest,
+                            not args.insecure_ssl,
+                            engine_pool,
+                            args.loudness
+                        ),
+                        manifest
+                    )
+
+                if soft_subtitle_file is not None:
+                    with stage('soft_subs'):
+                        add_soft_subtitles(output_path, soft_subtitle_file)
+
+                if cache is not None:
+                    print(cache.format_stats())
+                print(f"\n✓ Аудио создано: {duration:.1f} секунд")
+            else:
+                # Создаём временный файл для аудио
+                with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp_audio:
+                    temp_audio_path = tmp_audio.name
+
+                try:
+                    # Генерируем аудио
+                    print("\n=== Генерация аудио ===")
+                    with stage('tts'):
+                        duration = run_synthesis(
+                            generate_audio(
+                                text,
+                                temp_audio_path,
+                                args.voice,
+                                args.speed,
+                                args.tts_concurrency,
+                                cache,
+                                subtitle_paths,
+                                subtitle_track,
+                                manifest,
+                                pool=engine_pool,
+                                verify_ssl=not args.insecure_ssl
+                            ),
+                            manifest
+                        )
+
+                    if args.loudness is not None:
+                        normalize_loudness(temp_audio_path, args.loudness)
+
+                    if cache is not None:
+                        print(cache.format_stats())
+                    print(f"\n✓ Аудио создано: {duration:.1f} секунд")
+
+                    # Создаём видео
+                    print("\n=== Создание видео ===")
+                    if renditions:
+                        with stage('video'):
+                            video_paths = create_renditions(
+                                temp_audio_path,
+                                output_path,
+                                renditions,
+                                bg_color,
+                                background_image_path,
+                                args.still_fps,
+                                duration,
+                                soft_subtitle_file
+                            )
+                    else:
+                        with stage('video'):
+                            create_video(
+                                temp_audio_path,
+                                output_path,
+                                args.width,
+                                args.height,
+                                bg_color,
+                                background_image_path,
+                                args.render_mode,
+                                args.still_fps,
+                                duration,
+                                soft_subtitle_file,
+                                subtitle_track.cues() if subtitle_track is not None else None
+                            )
+
+                finally:
+                    # Удаляем временное аудио
+                    if os.path.exists(temp_audio_path):
+                        os.remove(temp_audio_path)
+
+            if renditions:
+                print("\n✓ Готово! Видео сохранены:")
+                for path in video_paths:
+                    print(f"  {path}")
+            else:
+                print(f"\n✓ Готово! Видео сохранено: {output_path}")
+            manifest.finish()
 
             # Создаём постер (если есть фоновое изображение)
             if background_image_path and os.path.exists(background_image_path):
-                print("\n=== Создание постера ===")
-
-                # Формируем путь для постера (такое же имя как видео, но .png)
-                poster_filename = Path(args.output).stem + '.png'
-                poster_path = OUTPUT_DIR / poster_filename
-
-                # Используем заголовок из первой строки файла для текста на постере
-                create_poster(
-                    background_image_path,
-                    title,
-                    poster_path,
-                    args.width,
-                    args.height
-                )
-
-                print(f"\n✓ Постер сохранён: {poster_path}")
-
-        finally:
-                # Удаляем временное аудио
-                if os.path.exists(temp_audio_path):
-                    os.remove(temp_audio_path)
+                # Постер - такое же имя как у видео, но .png; для каждого
+                # разрешения - с тем же суффиксом, что и видео
+                if renditions:
+                    poster_specs = [PosterSpec(f"_{w}x{h}", w, h) for w, h in renditions]
+                else:
+                    poster_specs = [PosterSpec('', args.width, args.height)]
+                poster_specs += poster_extra
+
+                create_posters(background_image_path, title, OUTPUT_DIR / Path(args.output).stem, poster_specs)
+    finally:
+        if temp_subtitle_file and os.path.exists(temp_subtitle_file):
+            os.remove(temp_subtitle_file)
 
 
 if __name__ == "__main__":